@@ -0,0 +1,213 @@
+"""Solicitudes de adopción: mascota resuelta por id y conteos por mascota.
+
+- `resolve_pets()` traduce el `pet_name` libre de /formulario (`?pet=Nombre`) a
+  `Mascota.id` con una sola consulta, sin distinguir mayúsculas ni espacios al
+  borde; si hay varias con el mismo nombre se prefiere la no adoptada más
+  reciente.
+- `adopcion_conteos` guarda total y confirmadas por mascota. Se ajusta en la
+  misma transacción que cambia `adoptar_mascotas`: los flush del ORM con un
+  listener `before_flush` (igual que los refcount de Config.uploads) y las
+  inserciones de Core (Config.adoption_queue) llamando a `adjust_counts()`.
+  Para que el listener vea el valor anterior, la fila debe estar cargada antes
+  de modificarla (p. ej. con `get_or_404`).
+- `review_page()` lista solicitudes por keyset (`id` descendente) sobre los
+  índices `(mascota_id, id)` e `(is_confirmed, id)`.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import case, delete, event, func, inspect, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from Config.db import db
+from Config.listing import keyset_page
+from Config.search import normalize
+from Config.serializers import row_encoder
+from Models.adopcion_conteos import AdopcionConteo
+from Models.adoptar_mascotas import adoptar_mascotas, adoptar_mascotasSchema
+from Models.mascotas import Mascota
+
+_solicitudes = adoptar_mascotas.__table__
+_conteos = AdopcionConteo.__table__
+ORDERS = {
+    "pendientes": (_conteos.c.total - _conteos.c.confirmadas).desc(),
+    "total": _conteos.c.total.desc(),
+    "confirmadas": _conteos.c.confirmadas.desc(),
+}
+
+
+def _pet_key(name):
+    return normalize(name).strip()
+
+
+def resolve_pets(names, conn=None):
+    """`{nombre pedido: Mascota.id}` para los nombres que existen (sin distinguir mayúsculas)."""
+    conn = conn or db.session
+    names = {str(n) for n in names if n and str(n).strip()}
+    if not names:
+        return {}
+    if db.engine.dialect.name == "mysql":
+        # collation *_ci: la igualdad ya ignora mayúsculas (y espacios finales) y usa ix_mascotas_nombre
+        match = Mascota.nombre.in_({n.strip() for n in names})
+    else:
+        match = func.lower(func.trim(Mascota.nombre)).in_({n.strip().lower() for n in names})
+    best = {}
+    rows = conn.execute(select(Mascota.id, Mascota.nombre, Mascota.is_adopted).where(match))
+    for pk, nombre, adopted in rows:
+        key, rank = _pet_key(nombre), (not adopted, pk)
+        if key not in best or rank > best[key][0]:
+            best[key] = (rank, pk)
+    return {name: best[_pet_key(name)][1] for name in names if _pet_key(name) in best}
+
+
+def pet_ids(value, conn=None):
+    """Ids de mascota para el filtro `?pet=`: un id numérico o todas las que se llaman así."""
+    value = (value or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return [int(value)]
+    conn = conn or db.session
+    return list(conn.execute(select(Mascota.id).where(Mascota.nombre == value)).scalars())
+
+
+# --- conteos incrementales ---
+
+def adjust_counts(conn, deltas):
+    """Suma `{mascota_id: (Δtotal, Δconfirmadas)}` a adopcion_conteos con un solo upsert."""
+    rows = [
+        {"mascota_id": pk, "total": total, "confirmadas": confirmed, "updated_at": datetime.utcnow()}
+        for pk, (total, confirmed) in sorted(deltas.items())
+        if pk is not None and (total or confirmed)
+    ]
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect == "mysql":
+        stmt = mysql_insert(_conteos).values(rows)
+        stmt = stmt.on_duplicate_key_update(
+            total=_conteos.c.total + stmt.inserted.total,
+            confirmadas=_conteos.c.confirmadas + stmt.inserted.confirmadas,
+            updated_at=stmt.inserted.updated_at,
+        )
+        conn.execute(stmt)
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(_conteos).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_conteos.c.mascota_id],
+            set_={
+                "total": _conteos.c.total + stmt.excluded.total,
+                "confirmadas": _conteos.c.confirmadas + stmt.excluded.confirmadas,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        conn.execute(stmt)
+    else:
+        for row in rows:
+            updated = conn.execute(
+                update(_conteos).where(_conteos.c.mascota_id == row["mascota_id"]).values(
+                    total=_conteos.c.total + row["total"],
+                    confirmadas=_conteos.c.confirmadas + row["confirmadas"],
+                    updated_at=row["updated_at"],
+                )
+            )
+            if not updated.rowcount:
+                conn.execute(_conteos.insert().values(row))
+
+
+def counts_for_rows(rows, sign=1):
+    """Deltas de `rows` (dicts con `mascota_id` / `is_confirmed`) para `adjust_counts`."""
+    deltas = {}
+    for row in rows:
+        if row.get("mascota_id") is not None:
+            total, confirmed = deltas.get(row["mascota_id"], (0, 0))
+            deltas[row["mascota_id"]] = (total + sign, confirmed + sign * bool(row.get("is_confirmed")))
+    return deltas
+
+
+@event.listens_for(Session, "before_flush")
+def _track_counts(session, flush_context, instances):
+    added, removed = [], []
+    for obj in session.new:
+        if isinstance(obj, adoptar_mascotas):
+            added.append({"mascota_id": obj.mascota_id, "is_confirmed": obj.is_confirmed})
+    for obj in session.dirty:
+        if isinstance(obj, adoptar_mascotas):
+            attrs = inspect(obj).attrs
+            pet, confirmed = attrs.mascota_id.history, attrs.is_confirmed.history
+            if not pet.has_changes() and not confirmed.has_changes():
+                continue
+            removed.append({
+                "mascota_id": pet.deleted[0] if pet.deleted else obj.mascota_id,
+                "is_confirmed": confirmed.deleted[0] if confirmed.deleted else obj.is_confirmed,
+            })
+            added.append({"mascota_id": obj.mascota_id, "is_confirmed": obj.is_confirmed})
+    for obj in session.deleted:
+        if isinstance(obj, adoptar_mascotas):
+            removed.append({"mascota_id": obj.mascota_id, "is_confirmed": obj.is_confirmed})
+    if not added and not removed:
+        return
+    deltas = counts_for_rows(added)
+    for pk, (total, confirmed) in counts_for_rows(removed, sign=-1).items():
+        t, c = deltas.get(pk, (0, 0))
+        deltas[pk] = (t + total, c + confirmed)
+    adjust_counts(session, deltas)
+
+
+def link_pending(conn):
+    """Resuelve `mascota_id` de las solicitudes que solo tienen `pet_name`. Devuelve cuántas enlazó."""
+    names = list(conn.execute(
+        select(_solicitudes.c.pet_name).where(_solicitudes.c.mascota_id.is_(None), _solicitudes.c.pet_name.isnot(None)).distinct()
+    ).scalars())
+    linked = 0
+    for name, pk in resolve_pets(names, conn).items():
+        linked += conn.execute(
+            update(_solicitudes).where(_solicitudes.c.mascota_id.is_(None), _solicitudes.c.pet_name == name).values(mascota_id=pk)
+        ).rowcount
+    return linked
+
+
+def recount(conn):
+    """Recalcula adopcion_conteos desde adoptar_mascotas (migración y `flask adopciones recount`)."""
+    conn.execute(delete(_conteos))
+    confirmed = func.sum(case((_solicitudes.c.is_confirmed, 1), else_=0))
+    conn.execute(_conteos.insert().from_select(
+        ["mascota_id", "total", "confirmadas", "updated_at"],
+        select(_solicitudes.c.mascota_id, func.count(), confirmed, func.now())
+        .where(_solicitudes.c.mascota_id.isnot(None))
+        .group_by(_solicitudes.c.mascota_id),
+    ))
+
+
+# --- consultas de revisión ---
+
+def review_page(is_confirmed=None, mascota_ids=None, cursor=None, limit=50):
+    """Página de solicitudes (más recientes primero) serializadas con su schema."""
+    encoder = row_encoder(adoptar_mascotasSchema)
+    stmt = encoder.select()
+    if is_confirmed is not None:
+        stmt = stmt.where(_solicitudes.c.is_confirmed == is_confirmed)
+    if mascota_ids is not None:
+        stmt = stmt.where(_solicitudes.c.mascota_id.in_(mascota_ids))
+    page = keyset_page(stmt, _solicitudes.c.id, cursor=cursor, limit=limit, scalars=False)
+    return encoder.dump_rows(page.items), page.next_cursor
+
+
+def counts_page(order="pendientes", mascota_ids=None, limit=50):
+    """Conteos por mascota leídos de adopcion_conteos (sin GROUP BY sobre las solicitudes)."""
+    stmt = (
+        select(_conteos.c.mascota_id, Mascota.nombre, Mascota.is_adopted, _conteos.c.total, _conteos.c.confirmadas)
+        .join(Mascota, Mascota.id == _conteos.c.mascota_id)
+        .where(_conteos.c.total > 0)
+        .order_by(ORDERS.get(order, ORDERS["pendientes"]), _conteos.c.mascota_id.desc())
+        .limit(limit)
+    )
+    if mascota_ids is not None:
+        stmt = stmt.where(_conteos.c.mascota_id.in_(mascota_ids))
+    return [
+        {"mascota_id": pk, "nombre": nombre, "is_adopted": bool(adopted), "total": total,
+         "confirmadas": confirmed, "pendientes": total - confirmed}
+        for pk, nombre, adopted, total, confirmed in db.session.execute(stmt)
+    ]
@@ -0,0 +1,351 @@
+"""Cola write-behind para las solicitudes de adopción de /formulario.
+
+Con `ADOPTION_WRITE_BEHIND=1` el request valida el formulario, agrega la
+solicitud a un diario SQLite local (`ADOPTION_QUEUE_PATH`, modo WAL con
+`synchronous=FULL`: está en disco antes de responder) y devuelve 202 sin tocar
+MySQL. Un hilo por worker vacía el diario en lotes de `ADOPTION_FLUSH_BATCH`:
+
+- reserva las filas con un lease (`claimed_until`), así varios workers pueden
+  compartir el archivo sin tomar las mismas;
+- las inserta en `adoptar_mascotas` con un INSERT multi-fila y un solo commit.
+  `submission_id` es único, de modo que si el proceso muere entre el commit y el
+  borrado del diario, el reintento no duplica solicitudes;
+- si el lote falla se reintenta fila por fila (una fila inválida no frena al
+  resto), con espera exponencial; tras `ADOPTION_MAX_ATTEMPTS` la fila queda
+  marcada como muerta para revisión manual;
+- si la BD está caída (`OperationalError`) las filas se posponen con espera
+  exponencial según los cortes seguidos, sin sumar intentos: una caída larga no
+  manda solicitudes válidas a la lista de muertas.
+
+Sin la variable, /formulario escribe en el momento con la misma función
+(`write_submissions`). `stats()` informa profundidad, antigüedad y latencia de
+vaciado (GET /api/admin/adopciones/cola, `flask adopciones stats`).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from Config import model_events
+from Config.adopciones import adjust_counts, counts_for_rows, link_pending, recount, resolve_pets
+from Config.bulk import insert_ids
+from Config.db import PROJECT_ROOT, db
+from Models.adoptar_mascotas import adoptar_mascotas
+from Models.mascotas import Mascota
+from Models.usuario import usuario
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("username", "email", "telefono", "direccion", "ocupacion", "vivienda", "tiene_mascotas", "motivo", "pet_name")
+MAX_BACKOFF = 300  # segundos
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    dead INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+)
+"""
+
+
+def submission_from_form(form, pet=None, session=None, pet_id=None):
+    """Solicitud (dict serializable) a partir del formulario y la sesión."""
+    session = session or {}
+    pet_id = pet_id or form.get("pet_id")
+    return {
+        "username": form.get("nombre") or form.get("username") or None,
+        "email": form.get("email") or None,
+        "telefono": form.get("telefono") or None,
+        "direccion": form.get("direccion") or None,
+        "ocupacion": form.get("ocupacion") or None,
+        "vivienda": form.get("vivienda") or None,
+        "tiene_mascotas": form.get("mascotas") or None,
+        "motivo": form.get("motivo") or None,
+        # el nombre de la mascota puede venir en la URL (?pet=Nombre) o como campo
+        "pet_name": pet or form.get("pet_name") or None,
+        "mascota_id": int(pet_id) if str(pet_id).isdigit() else None,
+        # solo los usuarios normales se enlazan como adopter_id
+        "user_id": session.get("user_id") if not session.get("is_admin") else None,
+        "submission_id": uuid.uuid4().hex,
+        "submitted_at": time.time(),
+    }
+
+
+def write_submissions(records):
+    """Inserta `records` en adoptar_mascotas con un solo commit; ignora los ya escritos."""
+    table = adoptar_mascotas.__table__
+    try:
+        written = set(db.session.execute(
+            select(table.c.submission_id).where(table.c.submission_id.in_([r["submission_id"] for r in records]))
+        ).scalars())
+        fresh = [r for r in records if r["submission_id"] not in written]
+        if fresh:
+            user_ids = {r["user_id"] for r in fresh if r.get("user_id")}
+            known = set(db.session.execute(select(usuario.id).where(usuario.id.in_(user_ids))).scalars()) if user_ids else set()
+            for r in fresh:
+                if r.get("user_id") and r["user_id"] not in known:
+                    logger.warning("adopciones: user_id %s no existe en 'usuarios'; se guarda sin FK", r["user_id"])
+            # mascota: el id explícito si existe, si no el nombre resuelto (una consulta por lote)
+            given = {r["mascota_id"] for r in fresh if r.get("mascota_id")}
+            existing = set(db.session.execute(select(Mascota.id).where(Mascota.id.in_(given))).scalars()) if given else set()
+            by_name = resolve_pets([r.get("pet_name") for r in fresh if r.get("mascota_id") not in existing])
+            rows = [
+                {**{k: r.get(k) for k in FIELDS}, "adopter_id": r.get("user_id") if r.get("user_id") in known else None,
+                 "mascota_id": r["mascota_id"] if r.get("mascota_id") in existing else by_name.get(r.get("pet_name")),
+                 "is_confirmed": False, "submission_id": r["submission_id"]}
+                for r in fresh
+            ]
+            ids = insert_ids(table, rows, ("submission_id",))
+            adjust_counts(db.session, counts_for_rows(rows))
+            model_events.record(db.session, adoptar_mascotas, upserts={pk: {**row, "id": pk} for pk, row in zip(ids, rows)})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(fresh)
+
+
+class AdoptionQueue:
+    def __init__(self):
+        self.enabled = False
+        self.app = None
+        self.path = None
+        self.batch = 200
+        self.interval = 0.5
+        self.lease = 60.0
+        self.max_attempts = 10
+        self._local = threading.local()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)  # segundos entre enqueue y commit, últimas filas
+        self._flushed = 0
+        self._failed = 0
+        self._last_flush = None
+        self._outages = 0  # lotes seguidos con la BD caída (espera del próximo intento)
+
+    def configure(self, app):
+        self.app = app
+        self.enabled = app.config["ADOPTION_WRITE_BEHIND"]
+        self.path = app.config["ADOPTION_QUEUE_PATH"]
+        self.batch = app.config["ADOPTION_FLUSH_BATCH"]
+        self.interval = app.config["ADOPTION_FLUSH_INTERVAL"]
+        self.max_attempts = app.config["ADOPTION_MAX_ATTEMPTS"]
+
+    # --- diario ---
+
+    def _connect(self):
+        # una conexión por hilo y por proceso (las heredadas de fork no se reutilizan)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute(_SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def enqueue(self, record):
+        self._connect().execute(
+            "INSERT INTO journal (payload, enqueued_at) VALUES (?, ?)",
+            (json.dumps(record, ensure_ascii=False), record.get("submitted_at") or time.time()),
+        )
+        self.ensure_started()
+
+    def claim(self, limit):
+        """Reserva hasta `limit` filas listas: `[(id, registro, intentos)]`."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, payload, attempts FROM journal "
+                "WHERE dead = 0 AND next_attempt <= ? AND claimed_until <= ? ORDER BY id LIMIT ?",
+                (now, now, limit),
+            ).fetchall()
+            conn.executemany("UPDATE journal SET claimed_until = ? WHERE id = ?", [(now + self.lease, r[0]) for r in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [(pk, json.loads(payload), attempts) for pk, payload, attempts in rows]
+
+    def _ack(self, ids):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")  # un solo fsync para todo el lote
+        conn.executemany("DELETE FROM journal WHERE id = ?", [(pk,) for pk in ids])
+        conn.execute("COMMIT")
+
+    def _retry(self, pk, attempts, error):
+        attempts += 1
+        dead = attempts >= self.max_attempts
+        self._connect().execute(
+            "UPDATE journal SET attempts = ?, next_attempt = ?, claimed_until = 0, dead = ?, last_error = ? WHERE id = ?",
+            (attempts, time.time() + min(2 ** attempts, MAX_BACKOFF), int(dead), str(error)[:500], pk),
+        )
+        if dead:
+            logger.error("adopciones: la solicitud %s del diario falló %s veces; queda marcada como muerta", pk, attempts)
+
+    def _postpone(self, ids, error):
+        """Reprograma `ids` por una caída de la BD: espera exponencial, sin contar intentos."""
+        self._outages += 1
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "UPDATE journal SET next_attempt = ?, claimed_until = 0, last_error = ? WHERE id = ?",
+            [(time.time() + min(2 ** self._outages, MAX_BACKOFF), str(error)[:500], pk) for pk in ids],
+        )
+        conn.execute("COMMIT")
+
+    # --- vaciado ---
+
+    def flush_once(self):
+        """Escribe un lote en la BD (requiere app context). Devuelve cuántas filas se reservaron."""
+        claimed = self.claim(self.batch)
+        if not claimed:
+            return 0
+        t0 = time.time()
+        try:
+            write_submissions([record for _, record, _ in claimed])
+            done = claimed
+            self._outages = 0
+        except OperationalError as exc:
+            # BD caída o bloqueada: todo el lote espera al siguiente intento (no cuenta para muertas)
+            logger.warning("adopciones: no se pudo escribir el lote de %s solicitudes: %s", len(claimed), exc)
+            self._postpone([pk for pk, _, _ in claimed], exc)
+            done = []
+        except Exception as exc:
+            logger.warning("adopciones: falló el lote de %s solicitudes (%s); se reintenta una a una", len(claimed), exc)
+            done = []
+            for index, item in enumerate(claimed):
+                pk, record, attempts = item
+                try:
+                    write_submissions([record])
+                    done.append(item)
+                    self._outages = 0
+                except OperationalError as row_exc:
+                    # la BD se cayó a mitad del reintento: el resto del lote se pospone
+                    self._postpone([p for p, _, _ in claimed[index:]], row_exc)
+                    break
+                except Exception as row_exc:
+                    self._retry(pk, attempts, row_exc)
+        self._ack([pk for pk, _, _ in done])
+        finished = time.time()
+        with self._stats_lock:
+            self._flushed += len(done)
+            self._failed += len(claimed) - len(done)
+            self._latencies.extend(finished - record["submitted_at"] for _, record, _ in done)
+            self._last_flush = {"at": finished, "rows": len(done), "duration_ms": round((finished - t0) * 1000, 2)}
+        return len(claimed)
+
+    def drain(self):
+        total = 0
+        while True:
+            n = self.flush_once()
+            total += n
+            if n < self.batch or self._outages:  # con la BD caída no tiene caso seguir reservando
+                return total
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with self.app.app_context():
+                    self.drain()
+            except Exception:
+                logger.exception("adopciones: error en el hilo de vaciado")
+
+    def ensure_started(self):
+        """Arranca el hilo de vaciado de este proceso (tras un fork hay que arrancar uno nuevo)."""
+        if not self.enabled or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="adoption-flusher", daemon=True)
+                self._thread.start()
+
+    def stats(self):
+        depth, dead, oldest = self._connect().execute(
+            "SELECT COALESCE(SUM(dead = 0), 0), COALESCE(SUM(dead = 1), 0), MIN(CASE WHEN dead = 0 THEN enqueued_at END) "
+            "FROM journal"
+        ).fetchone()
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            last = dict(self._last_flush) if self._last_flush else None
+            flushed, failed = self._flushed, self._failed
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2) if latencies else None
+
+        return {
+            "enabled": self.enabled,
+            "depth": depth,
+            "dead": dead,
+            "oldest_age_s": round(time.time() - oldest, 3) if oldest else None,
+            # contadores de este proceso (cada worker vacía su parte)
+            "flushed": flushed,
+            "failed_attempts": failed,
+            "flush_latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "max": pct(1.0), "samples": len(latencies)},
+            "last_flush": last,
+        }
+
+
+adoption_queue = AdoptionQueue()
+
+
+def init_app(app):
+    app.config.setdefault("ADOPTION_WRITE_BEHIND", os.getenv("ADOPTION_WRITE_BEHIND", "0") == "1")
+    app.config.setdefault(
+        "ADOPTION_QUEUE_PATH",
+        os.getenv("ADOPTION_QUEUE_PATH", os.path.join(PROJECT_ROOT, "instance", "adoption_queue.sqlite3")),
+    )
+    app.config.setdefault("ADOPTION_FLUSH_BATCH", int(os.getenv("ADOPTION_FLUSH_BATCH", "200")))
+    app.config.setdefault("ADOPTION_FLUSH_INTERVAL", float(os.getenv("ADOPTION_FLUSH_INTERVAL", "0.5")))
+    app.config.setdefault("ADOPTION_MAX_ATTEMPTS", int(os.getenv("ADOPTION_MAX_ATTEMPTS", "10")))
+    adoption_queue.configure(app)
+    if adoption_queue.enabled:
+        # cada worker arranca su hilo al primer request (los hilos no sobreviven al fork)
+        app.before_request(adoption_queue.ensure_started)
+    app.cli.add_command(adopciones_cli)
+
+
+adopciones_cli = AppGroup("adopciones", help="Cola write-behind de solicitudes de adopción.")
+
+
+@adopciones_cli.command("flush")
+def flush_command():
+    """Vacía el diario en la BD ahora (incluye lo que dejó un worker detenido)."""
+    click.echo(f"{adoption_queue.drain()} solicitudes procesadas")
+
+
+@adopciones_cli.command("stats")
+def stats_command():
+    """Profundidad del diario y latencias de vaciado."""
+    click.echo(json.dumps(adoption_queue.stats(), indent=2))
+
+
+@adopciones_cli.command("recount")
+def recount_command():
+    """Enlaza las solicitudes pendientes a su mascota y recalcula adopcion_conteos."""
+    linked = link_pending(db.session)
+    recount(db.session)
+    db.session.commit()
+    click.echo(f"{linked} solicitudes enlazadas; conteos recalculados")
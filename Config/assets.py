@@ -0,0 +1,254 @@
+"""Archivos estáticos con huella de contenido, precomprimidos y con caché inmutable.
+
+`flask --app app assets build` (o `python -m Config.assets`) recorre static/
+(salvo uploads/ y dist/) y deja en static/dist:
+
+- cada archivo como `<sha256[:16]>.<ext>`: archivos con el mismo contenido
+  (p. ej. los PNG repetidos de static/images) quedan en uno solo;
+- CSS con las `url('/static/...')` reescritas a sus nombres con huella;
+- hermanos `.br` (si está instalado `brotli`) y `.gz` para texto;
+- PNG/JPEG recomprimidos y un hermano `.webp` cuando sale más chico (Pillow);
+- `manifest.json` con `ruta lógica -> archivo`.
+
+En tiempo de ejecución `url_for('static', filename='css/Adopcion.css')` apunta
+a `/static/dist/<huella>.css` si el archivo está en el manifiesto, y esa ruta se
+sirve con `Cache-Control: immutable` eligiendo la variante según
+`Accept-Encoding` / `Accept`. Sin manifiesto, o en modo debug, los estáticos se
+sirven como siempre.
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import re
+import sys
+
+import click
+from flask import abort, current_app, request, send_from_directory
+from flask.cli import AppGroup
+
+try:  # brotli es opcional: sin él solo se generan .gz
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+DIST_DIRNAME = "dist"
+MANIFEST_NAME = "manifest.json"
+EXCLUDE_DIRS = {"uploads", DIST_DIRNAME}
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".map", ".html", ".ico"}
+IMAGE_EXTS = {".png", ".jpg"}
+_EXT_ALIASES = {".jpeg": ".jpg"}
+# Sufijo en disco de cada Content-Encoding, en orden de preferencia
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+MAX_AGE = 365 * 24 * 3600
+# Una variante comprimida solo se guarda si ahorra al menos esto
+MIN_SAVING = 0.05
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)/static/([^'")?#]+)\1\s*\)""")
+
+
+# --- Construcción ---
+
+def _compressors():
+    found = {}
+    if brotli is not None:
+        found["br"] = lambda body: brotli.compress(body, quality=11)
+    found["gzip"] = lambda body: gzip.compress(body, compresslevel=9, mtime=0)
+    return found
+
+
+def _optimize_image(data, ext):
+    """`(cuerpo, webp)`: la versión recomprimida si es más chica y un WebP si conviene."""
+    if Image is None:
+        return data, None
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            out = io.BytesIO()
+            if ext == ".png":
+                img.save(out, "PNG", optimize=True)
+            else:
+                img.convert("RGB").save(out, "JPEG", quality=85, optimize=True, progressive=True)
+            body = out.getvalue() if out.tell() < len(data) else data
+
+            webp = io.BytesIO()
+            if ext == ".png":
+                img.save(webp, "WEBP", lossless=True, method=6)
+            else:
+                img.convert("RGB").save(webp, "WEBP", quality=85, method=6)
+    except Exception:
+        return data, None
+    return body, (webp.getvalue() if webp.tell() < len(body) * (1 - MIN_SAVING) else None)
+
+
+def _write(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def _emit(out_dir, name, data, ext):
+    """Escribe el archivo con huella y sus variantes; devuelve su entrada del manifiesto."""
+    info = {"encodings": [], "webp": False}
+    body, webp = _optimize_image(data, ext) if ext in IMAGE_EXTS else (data, None)
+    path = os.path.join(out_dir, name)
+    _write(path, body)
+    info["size"] = len(body)
+    if webp is not None:
+        _write(path + ".webp", webp)
+        info["webp"] = True
+    if ext in COMPRESSIBLE:
+        for encoding, compress in _compressors().items():
+            compressed = compress(body)
+            if len(compressed) <= len(body) * (1 - MIN_SAVING):
+                _write(path + ENCODINGS[encoding], compressed)
+                info["encodings"].append(encoding)
+    return info
+
+
+def _sources(static_dir):
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.samefile(root, static_dir):
+            dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
+        for filename in files:
+            if not filename.startswith("."):
+                yield os.path.relpath(os.path.join(root, filename), static_dir).replace(os.sep, "/")
+
+
+def build(static_dir, static_url_path="/static", clean=False):
+    """Genera static/dist y su manifiesto. Devuelve el manifiesto."""
+    out_dir = os.path.join(static_dir, DIST_DIRNAME)
+    os.makedirs(out_dir, exist_ok=True)
+
+    assets, files = {}, {}
+
+    def rewrite_url(match):
+        quote, rel = match.group(1), match.group(2)
+        if rel not in assets:
+            return match.group(0)
+        return f"url({quote}{static_url_path}/{DIST_DIRNAME}/{assets[rel]}{quote})"
+
+    # el CSS va al final: sus url() apuntan a imágenes que ya deben tener huella
+    for rel in sorted(_sources(static_dir), key=lambda r: (r.lower().endswith(".css"), r)):
+        with open(os.path.join(static_dir, rel), "rb") as fh:
+            data = fh.read()
+        ext = os.path.splitext(rel)[1].lower()
+        ext = _EXT_ALIASES.get(ext, ext)
+        if ext == ".css":
+            data = _CSS_URL.sub(rewrite_url, data.decode("utf-8")).encode("utf-8")
+        name = hashlib.sha256(data).hexdigest()[:16] + ext
+        assets[rel] = name
+        if name not in files:  # contenido idéntico: un solo archivo
+            files[name] = _emit(out_dir, name, data, ext)
+
+    manifest = {"assets": assets, "files": files}
+    _write(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8"))
+
+    if clean:
+        keep = {MANIFEST_NAME}
+        for name, info in files.items():
+            keep.add(name)
+            keep.update(name + ENCODINGS[e] for e in info["encodings"])
+            if info["webp"]:
+                keep.add(name + ".webp")
+        for name in os.listdir(out_dir):
+            if name not in keep:
+                os.remove(os.path.join(out_dir, name))
+    return manifest
+
+
+# --- Ejecución ---
+
+def load_manifest(app):
+    path = os.path.join(app.static_folder, DIST_DIRNAME, MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _static_url_defaults(endpoint, values):
+    if endpoint != "static" or current_app.debug:
+        return
+    manifest = current_app.extensions.get("assets")
+    name = manifest["assets"].get(values.get("filename")) if manifest else None
+    if name:
+        values["filename"] = f"{DIST_DIRNAME}/{name}"
+
+
+def _accepts_webp():
+    # `*/*` no cuenta: solo si el navegador anuncia image/webp explícitamente
+    return any(value == "image/webp" and quality > 0 for value, quality in request.accept_mimetypes)
+
+
+def serve_dist(filename):
+    manifest = current_app.extensions.get("assets")
+    info = manifest["files"].get(filename) if manifest else None
+    if info is None:
+        abort(404)
+
+    variant, mimetype, encoding, vary = filename, mimetypes.guess_type(filename)[0], None, None
+    if info["webp"]:
+        vary = "Accept"
+        if _accepts_webp():
+            variant, mimetype = filename + ".webp", "image/webp"
+    elif info["encodings"]:
+        vary = "Accept-Encoding"
+        encoding = request.accept_encodings.best_match(info["encodings"])
+        if encoding:
+            variant = filename + ENCODINGS[encoding]
+
+    resp = send_from_directory(
+        os.path.join(current_app.static_folder, DIST_DIRNAME), variant,
+        mimetype=mimetype or "application/octet-stream", max_age=MAX_AGE,
+    )
+    resp.headers["Cache-Control"] = f"public, max-age={MAX_AGE}, immutable"
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    if vary:
+        resp.vary.add(vary)
+    return resp
+
+
+def init_app(app):
+    app.config.setdefault("ASSETS_ENABLED", os.getenv("ASSETS_ENABLED", "1") == "1")
+    app.cli.add_command(assets_cli)
+    app.add_url_rule(f"{app.static_url_path}/{DIST_DIRNAME}/<path:filename>", "assets_dist", serve_dist)
+    if app.config["ASSETS_ENABLED"]:
+        app.extensions["assets"] = load_manifest(app)
+        app.url_defaults(_static_url_defaults)
+
+
+assets_cli = AppGroup("assets", help="Estáticos con huella de contenido (static/dist).")
+
+
+@assets_cli.command("build")
+@click.option("--clean", is_flag=True, help="Borrar de static/dist lo que no esté en el nuevo manifiesto.")
+def build_command(clean):
+    app = current_app._get_current_object()
+    manifest = build(app.static_folder, app.static_url_path, clean=clean)
+    app.extensions["assets"] = manifest
+    _report(manifest)
+
+
+def _report(manifest):
+    files = manifest["files"]
+    click.echo(f"{len(manifest['assets'])} archivos -> {len(files)} únicos en static/{DIST_DIRNAME}")
+    click.echo(f"con .br/.gz: {sum(1 for i in files.values() if i['encodings'])}, "
+               f"con .webp: {sum(1 for i in files.values() if i['webp'])}")
+
+
+if __name__ == "__main__":
+    # Para el Dockerfile: construye sin importar app.py (no necesita la BD)
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    _report(build(os.path.join(project_root, "static"), clean="--clean" in sys.argv))
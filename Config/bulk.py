@@ -0,0 +1,290 @@
+"""Altas, ediciones, adopciones y bajas de mascotas en lote.
+
+Cada lote se resuelve con sentencias por conjunto en lugar de una ida y vuelta
+por mascota:
+
+- alta: un INSERT multi-fila que ignora los pares `(nombre, autor)` ya
+  registrados (índice único `uq_mascotas_nombre_autor`: `INSERT IGNORE` en
+  MySQL, `ON CONFLICT DO NOTHING` en SQLite); los 409 salen de las filas que
+  no se insertaron, con la collation de la BD;
+- edición: un SELECT de los ids y un UPDATE por grupo de campos (executemany);
+- adopción: `UPDATE ... WHERE id IN (...)`;
+- baja: `DELETE ... WHERE id IN (...)`;
+
+y un solo commit. El resultado trae un elemento por ítem recibido, en el mismo
+orden: `{"index", "ok", "status", "id"?, "msg"?}`.
+
+Las sentencias de Core no pasan por el flush del ORM, así que aquí mismo se
+avisan los cambios a las cachés e índices (model_events.record) y se ajustan
+los refcount de las imágenes (Config.uploads.adjust_refcounts).
+"""
+
+import os
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, insert, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from Config import model_events
+from Config.db import db
+from Config.listing import parse_bool
+from Config.uploads import adjust_refcounts
+from Models.mascotas import Mascota
+from Models.postular_mascotas import PostularMascotas
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
+UPDATABLE = ("nombre", "descripcion", "imagen", "autor", "is_adopted")
+REQUIRED = ("nombre", "descripcion", "autor")  # NOT NULL: no se pueden vaciar
+
+_mascotas = Mascota.__table__
+_postulares = PostularMascotas.__table__
+
+
+class BulkPayloadError(ValueError):
+    """Cuerpo del lote mal formado (no es lista, vacío o demasiado grande)."""
+
+
+def items_from(data, key):
+    """La lista `data[key]` (o `data` si ya es una lista), validada."""
+    items = data.get(key) if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        raise BulkPayloadError(f"Se espera una lista no vacía en '{key}'")
+    if len(items) > BULK_MAX_ITEMS:
+        raise BulkPayloadError(f"Máximo {BULK_MAX_ITEMS} elementos por lote")
+    return items
+
+
+def summary(results):
+    """Cuerpo de respuesta común a todos los lotes."""
+    ok = sum(1 for r in results if r["ok"])
+    return {"ok": ok == len(results), "total": len(results), "succeeded": ok,
+            "failed": len(results) - ok, "results": results}
+
+
+def _result(index, status, **extra):
+    return {"index": index, "ok": status < 400, "status": status, **extra}
+
+
+def _as_bool(value):
+    return bool(parse_bool(value)) if isinstance(value, str) else bool(value)
+
+
+def insert_ids(table, rows, keys):
+    """Inserta `rows` en una sola sentencia y devuelve sus ids en el mismo orden.
+
+    `keys` son columnas que identifican cada fila dentro del lote (RETURNING no
+    garantiza el orden de las filas devueltas).
+    """
+    stmt = insert(table).values(rows)
+    if db.engine.dialect.insert_returning:
+        returned = db.session.execute(stmt.returning(table.c.id, *(table.c[k] for k in keys))).all()
+        by_key = {tuple(row[1:]): row[0] for row in returned}
+        return [by_key[tuple(row[k] for k in keys)] for row in rows]
+    # MySQL no tiene RETURNING: un INSERT multi-fila ("simple insert" de InnoDB) recibe
+    # ids consecutivos a partir de LAST_INSERT_ID()
+    first = db.session.execute(stmt).lastrowid
+    return list(range(first, first + len(rows)))
+
+
+def insert_new(table, rows, keys):
+    """INSERT multi-fila que omite las filas que chocan con un índice único.
+
+    Devuelve `{valores de keys: id}` solo de las filas insertadas; si dos filas
+    del lote tienen los mismos `keys`, entra la primera.
+    """
+    if db.engine.dialect.name == "mysql":
+        stmt = insert(table).values(rows).prefix_with("IGNORE")
+    else:
+        stmt = sqlite_insert(table).values(rows).on_conflict_do_nothing()
+    key_cols = [table.c[k] for k in keys]
+    if db.engine.dialect.insert_returning:
+        return {tuple(row[1:]): row[0] for row in db.session.execute(stmt.returning(table.c.id, *key_cols))}
+    result = db.session.execute(stmt)
+    if not result.rowcount:
+        return {}
+    # sin RETURNING: LAST_INSERT_ID() es el id de la primera fila insertada y cualquier fila
+    # que nos ganó un par quedó antes (el INSERT espera su bloqueo de clave duplicada)
+    found = db.session.execute(
+        select(table.c.id, *key_cols).where(
+            tuple_(*key_cols).in_([tuple(row[k] for k in keys) for row in rows]), table.c.id >= result.lastrowid
+        )
+    )
+    return {tuple(row[1:]): row[0] for row in found}
+
+
+def _ids_from(items):
+    """`[(index, id)]` válidos y los resultados de error de los que no lo son."""
+    valid, errors, seen = [], {}, set()
+    for index, raw in enumerate(items):
+        pk = raw.get("id") if isinstance(raw, dict) else raw
+        if isinstance(pk, bool) or not isinstance(pk, (int, str)) or not str(pk).isdigit():
+            errors[index] = _result(index, 400, msg="id inválido")
+        elif int(pk) in seen:
+            errors[index] = _result(index, 409, id=int(pk), msg="id repetido en el lote")
+        else:
+            seen.add(int(pk))
+            valid.append((index, int(pk)))
+    return valid, errors
+
+
+def _commit():
+    try:
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def create_mascotas(items, default_autor="Administrador", mirror=False):
+    """Alta en lote. `mirror=True` crea además la postulación espejo (como el alta del admin)."""
+    results = [None] * len(items)
+    candidates = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = _result(index, 400, msg="Ítem inválido")
+            continue
+        values = {
+            "nombre": item.get("nombre"),
+            "descripcion": item.get("descripcion"),
+            "imagen": item.get("imagen") or item.get("imagen_url") or "",
+            "autor": item.get("autor") or item.get("username") or default_autor,
+        }
+        if not values["nombre"] or not values["descripcion"]:
+            results[index] = _result(index, 400, msg="Faltan campos requeridos: nombre y descripcion")
+            continue
+        candidates.append((index, values))
+
+    if candidates:
+        now = datetime.utcnow()
+        inserted = insert_new(
+            _mascotas,
+            [{**values, "is_adopted": False, "created_at": now, "updated_at": now} for _, values in candidates],
+            ("nombre", "autor"),
+        )
+        rows, indexes, ids = [], [], []
+        for index, values in candidates:
+            # cada id se asigna una sola vez: un segundo ítem con el mismo par es un duplicado
+            pk = inserted.pop((values["nombre"], values["autor"]), None)
+            if pk is None:
+                results[index] = _result(index, 409, msg="Mascota ya registrada")
+                continue
+            rows.append({**values, "is_adopted": False, "created_at": now, "updated_at": now})
+            indexes.append(index)
+            ids.append(pk)
+
+        if rows:
+            refs = Counter(row["imagen"] for row in rows)
+            model_events.record(db.session, Mascota, upserts={pk: {**row, "id": pk} for pk, row in zip(ids, rows)})
+            if mirror:
+                mirrors = [
+                    {"username": row["autor"], "nombre": row["nombre"], "descripcion": row["descripcion"],
+                     "imagen": row["imagen"], "created_at": now, "updated_at": now}
+                    for row in rows
+                ]
+                mirror_ids = insert_ids(_postulares, mirrors, ("username", "nombre"))
+                refs.update(row["imagen"] for row in mirrors)
+                model_events.record(db.session, PostularMascotas,
+                                    upserts={pk: {**row, "id": pk} for pk, row in zip(mirror_ids, mirrors)})
+            adjust_refcounts(db.session, refs)
+            _commit()
+            for index, pk in zip(indexes, ids):
+                results[index] = _result(index, 201, id=pk)
+    return results
+
+
+def update_mascotas(items):
+    """Edición en lote: cada ítem es `{"id", <campos de UPDATABLE>...}`."""
+    valid, errors = _ids_from(items)
+    changes = {}
+    for index, pk in valid:
+        item = items[index]
+        fields = {k: item[k] for k in UPDATABLE if isinstance(item, dict) and k in item}
+        if not fields:
+            errors[index] = _result(index, 400, id=pk, msg=f"Sin campos para actualizar ({', '.join(UPDATABLE)})")
+        elif any(not fields[k] for k in REQUIRED if k in fields):
+            errors[index] = _result(index, 400, id=pk, msg="nombre, descripcion y autor no pueden quedar vacíos")
+        else:
+            if "is_adopted" in fields:
+                fields["is_adopted"] = _as_bool(fields["is_adopted"])
+            if "imagen" in fields:
+                fields["imagen"] = fields["imagen"] or ""
+            changes[index] = (pk, fields)
+
+    current = {}
+    if changes:
+        ids = [pk for pk, _ in changes.values()]
+        current = dict(db.session.execute(select(_mascotas.c.id, _mascotas.c.imagen).where(_mascotas.c.id.in_(ids))).all())
+
+    now = datetime.utcnow()
+    groups, refs, upserts = {}, Counter(), {}
+    for index, (pk, fields) in changes.items():
+        if pk not in current:
+            errors[index] = _result(index, 404, id=pk, msg="Mascota no encontrada")
+            continue
+        groups.setdefault(tuple(sorted(fields)), []).append({"b_id": pk, "b_updated_at": now,
+                                                             **{f"b_{k}": v for k, v in fields.items()}})
+        if "imagen" in fields and fields["imagen"] != current[pk]:
+            refs[fields["imagen"]] += 1
+            refs[current[pk]] -= 1
+        upserts[pk] = {**fields, "id": pk, "updated_at": now}
+
+    if upserts:
+        for names, params in groups.items():
+            stmt = (
+                update(_mascotas)
+                .where(_mascotas.c.id == bindparam("b_id"))
+                .values(updated_at=bindparam("b_updated_at"), **{k: bindparam(f"b_{k}") for k in names})
+            )
+            db.session.execute(stmt, params)  # executemany: un UPDATE por forma de cambio
+        adjust_refcounts(db.session, refs)
+        model_events.record(db.session, Mascota, upserts=upserts)
+        _commit()
+    return [errors.get(index) or _result(index, 200, id=changes[index][0]) for index in range(len(items))]
+
+
+def set_adopted(items, is_adopted=True):
+    """Marca (o desmarca) como adoptadas las mascotas de `items` (ids) con un único UPDATE."""
+    is_adopted = _as_bool(is_adopted)
+    valid, errors = _ids_from(items)
+    current = {}
+    if valid:
+        ids = [pk for _, pk in valid]
+        current = dict(db.session.execute(select(_mascotas.c.id, _mascotas.c.is_adopted).where(_mascotas.c.id.in_(ids))).all())
+    changed = [pk for pk, value in current.items() if bool(value) != is_adopted]
+    if changed:
+        now = datetime.utcnow()
+        db.session.execute(update(_mascotas).where(_mascotas.c.id.in_(changed)).values(is_adopted=is_adopted, updated_at=now))
+        model_events.record(db.session, Mascota, upserts={pk: {"is_adopted": is_adopted, "updated_at": now} for pk in changed})
+        _commit()
+    changed, by_index = set(changed), dict(valid)
+    return [
+        errors.get(index)
+        or (_result(index, 200, id=by_index[index], changed=by_index[index] in changed) if by_index[index] in current
+            else _result(index, 404, id=by_index[index], msg="Mascota no encontrada"))
+        for index in range(len(items))
+    ]
+
+
+def delete_mascotas(items):
+    """Baja en lote con un único DELETE."""
+    valid, errors = _ids_from(items)
+    current = {}
+    if valid:
+        ids = [pk for _, pk in valid]
+        current = dict(db.session.execute(select(_mascotas.c.id, _mascotas.c.imagen).where(_mascotas.c.id.in_(ids))).all())
+    if current:
+        db.session.execute(delete(_mascotas).where(_mascotas.c.id.in_(list(current))))
+        refs = Counter()
+        for imagen in current.values():
+            refs[imagen] -= 1
+        adjust_refcounts(db.session, refs)
+        model_events.record(db.session, Mascota, deleted=list(current))
+        _commit()
+    by_index = dict(valid)
+    return [
+        errors.get(index)
+        or (_result(index, 200, id=by_index[index]) if by_index[index] in current
+            else _result(index, 404, id=by_index[index], msg="Mascota no encontrada"))
+        for index in range(len(items))
+    ]
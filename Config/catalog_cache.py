@@ -0,0 +1,195 @@
+"""Versión del catálogo de mascotas y caché de listados ligada a ella.
+
+El listado de adopción se lee mucho y solo cambia cuando se crea, edita,
+adopta o elimina una `Mascota`. Cada commit que toca `mascotas` (detectado con
+los hooks de Config.model_events) incrementa `catalog_version`; el fragmento
+HTML de tarjetas y el JSON de `/mascotas/api` se cachean con la versión en la
+llave, así entre escrituras se sirven desde memoria y nunca quedan obsoletos.
+
+Para que los demás workers también se enteren, cada incremento toca un archivo
+compartido (`CATALOG_VERSION_DIR`) cuyo mtime forma parte de la versión. Los
+ids borrados se anotan además en un log compartido (`<nombre>.deleted`): con él
+y `updated_at` los índices en memoria (búsqueda, facetas) se ponen al día
+leyendo solo lo cambiado (`changed_since`), sin recorrer la tabla.
+
+Con réplica de lectura configurada, un fallo de caché justo después de una
+escritura se resuelve contra el primario (la réplica podría no tener aún el
+cambio y el resultado quedaría cacheado con la versión nueva); pasados
+`REPLICA_LAG_GRACE` segundos desde la última escritura se lee de la réplica.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app, jsonify, render_template, session
+from markupsafe import Markup
+
+from Config import model_events
+from sqlalchemy import func, select
+
+from Config.cache import MISSING, TTLCache
+from Config.db import db, use_replica
+from Config.listing import listar_mascotas_page, mascotas_params_from_args
+from Config.serializers import row_encoder
+from Models.mascotas import Mascota, MascotaSchema
+from Models.postular_mascotas import PostularMascotas
+
+CATALOG_VERSION_DIR = os.getenv(
+    "CATALOG_VERSION_DIR", os.path.join(tempfile.gettempdir(), "adoptme_catalog")
+)
+LISTING_CACHE_SIZE = int(os.getenv("LISTING_CACHE_SIZE", "512"))
+LISTING_CACHE_TTL = int(os.getenv("LISTING_CACHE_TTL", "600"))
+REPLICA_LAG_GRACE = float(os.getenv("REPLICA_LAG_GRACE", "5"))
+# al releer por `updated_at` se retrocede este margen: commits lentos cuyo updated_at
+# (puesto en el flush) quedó antes de filas ya vistas de otro commit
+SYNC_OVERLAP = timedelta(seconds=float(os.getenv("SYNC_OVERLAP", "5")))
+
+
+class CatalogVersion:
+    """Contador local + marca compartida entre procesos (mtime de un archivo)."""
+
+    def __init__(self, name, directory=CATALOG_VERSION_DIR):
+        self.path = os.path.join(directory, f"{name}.version")
+        self.deleted_path = os.path.join(directory, f"{name}.deleted")
+        self._local = 0
+        self._lock = threading.Lock()
+        self._bumps = threading.local()  # (marca antes, marca después) del último bump de este hilo
+
+    def bump(self, upserts=None, deleted=()):
+        with self._lock:
+            self._local += 1
+        self._bumps.marks = None
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if deleted:
+                # una sola escritura en modo append por commit: las líneas no se mezclan
+                with open(self.deleted_path, "a", encoding="ascii") as fh:
+                    fh.write(" ".join(str(pk) for pk in deleted) + "\n")
+            before = self.shared()
+            with open(self.path, "a"):
+                pass
+            now = time.time_ns()
+            os.utime(self.path, ns=(now, now))
+            self._bumps.marks = (before, self.shared())
+        except OSError:
+            pass
+
+    def advance(self, synced):
+        """Marca que puede guardar un índice tras aplicar un commit propio.
+
+        Solo la nueva si `synced` era la marca justo antes del bump de este hilo;
+        si no, en medio hubo commits de otros workers y se devuelve `synced` para
+        que el índice los incorpore.
+        """
+        marks = getattr(self._bumps, "marks", None)
+        if marks is not None and marks[0] == synced:
+            return marks[1]
+        return synced
+
+    def deleted_offset(self):
+        """Posición actual del log de borrados (para empezar a leerlo tras una carga completa)."""
+        try:
+            return os.stat(self.deleted_path).st_size
+        except OSError:
+            return 0
+
+    def deleted_since(self, offset):
+        """Ids borrados por cualquier proceso desde `offset`: `(ids, nuevo offset)`."""
+        try:
+            with open(self.deleted_path, "rb") as fh:
+                if os.fstat(fh.fileno()).st_size < offset:
+                    offset = 0  # el log se recreó: releerlo es inofensivo
+                fh.seek(offset)
+                data = fh.read()
+        except OSError:
+            return set(), offset
+        end = data.rfind(b"\n") + 1  # solo líneas completas
+        return {int(pk) for pk in data[:end].split()}, offset + end
+
+    def shared(self):
+        """Marca compartida: cambia con cualquier escritura de cualquier proceso."""
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def current(self):
+        return f"{self._local}.{self.shared()}"
+
+    def age(self):
+        """Segundos desde la última escritura conocida (infinito si nunca hubo)."""
+        try:
+            return time.time() - os.stat(self.path).st_mtime
+        except OSError:
+            return float("inf")
+
+
+def sync_floor(watermark):
+    """Desde dónde releer: la marca truncada al segundo (DATETIME de MySQL) menos `SYNC_OVERLAP`."""
+    return watermark.replace(microsecond=0) - SYNC_OVERLAP
+
+
+def changed_since(model, columns, watermark):
+    """Filas de `model` con `updated_at` desde `sync_floor(watermark)` (todas si no hay marca).
+
+    Devuelve `(filas, nueva marca)`; la marca es el mayor `updated_at` de la
+    tabla y se lee antes que las filas, así nada confirmado entre medio queda
+    fuera de la próxima lectura. Lee del primario.
+    """
+    with use_replica(False):
+        latest = db.session.execute(select(func.max(model.updated_at))).scalar()
+        stmt = select(*columns)
+        if watermark is not None:
+            stmt = stmt.where(model.updated_at >= sync_floor(watermark))
+        rows = db.session.execute(stmt).mappings().all()
+    return rows, latest or watermark
+
+
+catalog_version = CatalogVersion("mascotas")
+model_events.on_commit(Mascota, catalog_version.bump)
+# Postulaciones: no afectan al listado, pero sí a los índices en memoria (búsqueda)
+postulaciones_version = CatalogVersion("postulaciones")
+model_events.on_commit(PostularMascotas, postulaciones_version.bump)
+
+_listings = TTLCache(maxsize=LISTING_CACHE_SIZE, ttl=LISTING_CACHE_TTL)
+
+
+def _cached(kind, params, build):
+    key = (kind, catalog_version.current(), tuple(sorted(params.items())))
+    value = _listings.get(key)
+    if value is MISSING:
+        with use_replica(catalog_version.age() > REPLICA_LAG_GRACE):
+            value = build()
+        _listings.set(key, value)
+    return value
+
+
+def mascotas_cards(args, is_adopted=None):
+    """`(html_tarjetas, next_cursor)` de una página del listado, cacheado por versión.
+
+    Las tarjetas muestran botones distintos con o sin sesión, por eso la
+    variante de autenticación también va en la llave.
+    """
+    params = mascotas_params_from_args(args, is_adopted)
+
+    def build():
+        page = listar_mascotas_page(**params)
+        html = render_template("components/mascotas_cards.html", mascotas=page.items)
+        return Markup(html), page.next_cursor
+
+    return _cached("cards", dict(params, auth="user_id" in session), build)
+
+
+def mascotas_json(args, is_adopted=None):
+    """Cuerpo JSON de `/mascotas/api` ya serializado, cacheado por versión."""
+    params = mascotas_params_from_args(args, is_adopted)
+
+    def build():
+        page = listar_mascotas_page(**params)
+        data = row_encoder(MascotaSchema).dump_rows(page.items)
+        return jsonify({"ok": True, "mascotas": data, "next_cursor": page.next_cursor}).get_data()
+
+    return current_app.response_class(_cached("json", params, build), mimetype="application/json")
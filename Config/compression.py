@@ -0,0 +1,148 @@
+"""Compresión gzip/brotli de respuestas HTML, JSON y texto (también en streaming).
+
+Un `after_request` elige la codificación con `Accept-Encoding` entre
+`COMPRESS_ALGORITHMS` (`br` solo si está instalado `brotli`, igual que en
+Config/assets.py) y:
+
+- respuestas con cuerpo en memoria: se comprimen de una vez si miden al menos
+  `COMPRESS_MIN_SIZE` bytes y el resultado es más chico;
+- respuestas en streaming (generadores, p. ej. las exportaciones NDJSON/CSV):
+  cada bloque pasa por un compresor incremental con flush, así el cliente
+  sigue recibiendo datos a medida que se generan.
+
+No se tocan: tipos fuera de `COMPRESS_MIMETYPES` (imágenes, `application/gzip`
+de la exportación con `?gzip=1`), respuestas que ya traen `Content-Encoding`
+(los `.br`/`.gz` de static/dist), archivos servidos con `send_file`, rangos,
+204/304 y `Cache-Control: no-transform`. Siempre se agrega
+`Vary: Accept-Encoding` y un ETag fuerte pasa a débil (el cuerpo cambia pero
+la caché de páginas sigue respondiendo 304 con la comparación débil).
+
+Niveles: `COMPRESS_GZIP_LEVEL` (1-9, 6) y `COMPRESS_BR_QUALITY` (0-11, 4; los
+niveles altos de brotli son para estáticos precomprimidos, no por request).
+"""
+
+import os
+import zlib
+
+try:  # brotli es opcional: sin él solo se ofrece gzip
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+from flask import current_app, request
+
+COMPRESS_MIMETYPES = (
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+    "text/xml",
+    "text/javascript",
+    "application/javascript",
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def br_compressor(quality):
+    compressor = brotli.Compressor(quality=quality)
+    return compressor.process, compressor.flush, compressor.finish
+
+
+def compressors(config):
+    """`{codificación: fábrica de (compress, flush, finish)}` en orden de preferencia."""
+    # niveles leídos ahora: en streaming la fábrica corre fuera del contexto de la app
+    quality, level = config["COMPRESS_BR_QUALITY"], config["COMPRESS_GZIP_LEVEL"]
+    available = {
+        "br": (lambda: br_compressor(quality)) if brotli is not None else None,
+        "gzip": lambda: gzip_compressor(level),
+    }
+    return {name: available[name] for name in config["COMPRESS_ALGORITHMS"] if available.get(name)}
+
+
+def compress(data, factory):
+    compress_chunk, _, finish = factory()
+    return compress_chunk(data) + finish()
+
+
+def compress_stream(chunks, factory):
+    """Comprime el cuerpo de la vista bloque a bloque; al terminar (o abortar) lo cierra."""
+    compress_chunk, flush, finish = factory()
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                out = compress_chunk(chunk) + flush()
+                if out:
+                    yield out
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _eligible(response, config):
+    if response.mimetype not in config["COMPRESS_MIMETYPES"]:
+        return False
+    response.vary.add("Accept-Encoding")  # también en los 304 y los cuerpos chicos
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if "Content-Encoding" in response.headers or "Content-Range" in response.headers:
+        return False
+    if response.direct_passthrough:  # send_file / wsgi.file_wrapper
+        return False
+    return "no-transform" not in (response.headers.get("Cache-Control") or "")
+
+
+def compress_response(response):
+    config = current_app.config
+    if not _eligible(response, config):
+        return response
+    available = compressors(config)
+    encoding = request.accept_encodings.best_match(list(available))
+    if encoding is None or request.method == "HEAD":
+        return response
+
+    if response.is_streamed:
+        length = response.content_length
+        if length is not None and length < config["COMPRESS_MIN_SIZE"]:
+            return response
+        response.response = compress_stream(response.response, available[encoding])
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        body = compress(data, available[encoding])
+        if len(body) >= len(data):
+            return response
+        response.set_data(body)  # también actualiza Content-Length
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    app.config.setdefault("COMPRESS_ENABLED", os.getenv("COMPRESS_ENABLED", "1") == "1")
+    app.config.setdefault("COMPRESS_MIN_SIZE", int(os.getenv("COMPRESS_MIN_SIZE", "500")))
+    app.config.setdefault("COMPRESS_GZIP_LEVEL", int(os.getenv("COMPRESS_GZIP_LEVEL", "6")))
+    app.config.setdefault("COMPRESS_BR_QUALITY", int(os.getenv("COMPRESS_BR_QUALITY", "4")))
+    app.config.setdefault(
+        "COMPRESS_ALGORITHMS",
+        tuple(a.strip() for a in os.getenv("COMPRESS_ALGORITHMS", "br,gzip").split(",") if a.strip()),
+    )
+    app.config.setdefault("COMPRESS_MIMETYPES", COMPRESS_MIMETYPES)
+    if app.config["COMPRESS_ENABLED"]:
+        app.after_request(compress_response)
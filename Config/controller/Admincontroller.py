@@ -1,30 +1,57 @@
 from flask import Blueprint, request, jsonify
-from Config.db import db
+from Config.db import db, read_only
 from Models.admins import admin, adminSchema
 from Models.usuario import usuario, usuarioSchema
 from Models.mascotas import Mascota, MascotaSchema
 from Models.postular_mascotas import PostularMascotas, PostularMascotasSchema
-from werkzeug.security import generate_password_hash
 import os
-from flask import current_app, redirect, request, jsonify, url_for
-from werkzeug.utils import secure_filename
-import uuid
+from flask import Response, redirect, request, jsonify, send_file, url_for
+from Config.listing import (
+    ADMIN_MAX_PAGE_SIZE, ADMIN_PAGE_SIZE, approximate_count, parse_bool, parse_cursor, parse_fields, parse_page_size, projected_page,
+)
+from Config.adoption_queue import adoption_queue
+from Config.bulk import (
+    BulkPayloadError, create_mascotas, delete_mascotas, items_from, set_adopted, summary, update_mascotas,
+)
+from Config.export import TABLES as EXPORT_TABLES, export_stream
+from Config.controller.adoptar_mascontroller import admin_required
+from Config.facets import facet_index, fetch_rows, filters_from_args
+from Config.profiling import request_profiler
+from Config.serializers import row_encoder
+from Config.sql_profiler import query_budget
+from Config.user_cache import invalidate_user
+from Config.uploads import save_upload
+from sqlalchemy.exc import IntegrityError
 
 # Blueprint del admin (url_prefix organizado)
 Routes_adminC = Blueprint("routes_adminC", __name__, url_prefix="/api/admin")
 
-# Schemas
+# Schemas (los listados usan el codificador columnar de Config.serializers)
 admin_schema = adminSchema()
-admins_schema = adminSchema(many=True)
-
 usuario_schema = usuarioSchema()
-usuarios_schema = usuarioSchema(many=True)
-
 mascota_schema = MascotaSchema()
-mascotas_schema = MascotaSchema(many=True)
-
 postular_schema = PostularMascotasSchema()
-postulares_schema = PostularMascotasSchema(many=True)
+
+
+def paged_list_response(model, schema_cls):
+    """Respuesta de listado: lista JSON (mismo formato de siempre) de una sola página.
+
+    Query string: `?limit=&cursor=&fields=a,b`. La paginación viaja en cabeceras
+    para no romper a los clientes que esperan un arreglo: `X-Next-Cursor`, `Link`
+    (rel="next") y `X-Total-Count` (aproximado y cacheado).
+    """
+    data, next_cursor = projected_page(model, schema_cls, request.args)
+    return _with_page_headers(jsonify(data), next_cursor, approximate_count(model))
+
+
+def _with_page_headers(resp, next_cursor, total):
+    resp.headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        resp.headers["X-Next-Cursor"] = next_cursor
+        args = request.args.to_dict()
+        args["cursor"] = next_cursor
+        resp.headers["Link"] = f'<{url_for(request.endpoint, **args)}>; rel="next"'
+    return resp, 200
 
 
 @Routes_adminC.route("/init-db", methods=["POST"])
@@ -33,13 +60,52 @@ def admin_init_db():
     return jsonify({"ok": True, "msg": "Tablas creadas/aseguradas"}), 201
 
 
+# Estado de la cola write-behind de /formulario: profundidad y latencia de vaciado
+@Routes_adminC.route("/adopciones/cola", methods=["GET"])
+@admin_required
+def admin_adoption_queue_stats():
+    return jsonify({"ok": True, **adoption_queue.stats()}), 200
+
+
+# Exportación completa en streaming: /api/admin/export/mascotas.csv?gzip=1
+@Routes_adminC.route("/export/<tabla>.<any(ndjson, csv):fmt>", methods=["GET"])
+@admin_required
+def admin_export(tabla, fmt):
+    if tabla not in EXPORT_TABLES:
+        return jsonify({"ok": False, "msg": f"tabla debe ser una de: {', '.join(EXPORT_TABLES)}"}), 404
+    body, mimetype, filename = export_stream(tabla, fmt, gzip=bool(parse_bool(request.args.get("gzip"))))
+    return Response(body, mimetype=mimetype, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+        "X-Accel-Buffering": "no",  # que nginx no acumule la respuesta
+    })
+
+
+# Perfiles por muestreo (Config/profiling.py): X-Profile: 1 o ?_profile=1 siendo admin
+@Routes_adminC.route("/profiles", methods=["GET"])
+@admin_required
+def admin_list_profiles():
+    return jsonify({"ok": True, "items": request_profiler.list()}), 200
+
+
+@Routes_adminC.route("/profiles/<profile_id>", methods=["GET"])
+@admin_required
+def admin_get_profile(profile_id):
+    # stacks plegados: flamegraph.pl, speedscope o inferno-flamegraph
+    path = request_profiler.path_for(profile_id)
+    if path is None:
+        return jsonify({"ok": False, "msg": "Perfil no encontrado"}), 404
+    return send_file(path, mimetype="text/plain", as_attachment=True, download_name=f"{profile_id}.folded")
+
+
 # Admins CRUD
 @Routes_adminC.route("/admins", methods=["GET"])
+@read_only
 def admin_list_admins():
-    items = admin.query.order_by(admin.id.desc()).all()
-    return jsonify(admins_schema.dump(items)), 200
+    return paged_list_response(admin, adminSchema)
 
 @Routes_adminC.route("/admins/<int:aid>", methods=["GET"])
+@read_only
 def admin_get_admin(aid):
     a = admin.query.get_or_404(aid)
     return jsonify(admin_schema.dump(a)), 200
@@ -50,11 +116,14 @@ def admin_create_admin():
     username = data.get("username"); email = data.get("email"); password = data.get("password")
     if not all([username, email, password]):
         return jsonify({"ok": False, "msg": "Faltan campos"}), 400
-    if admin.query.filter((admin.username == username) | (admin.email == email)).first():
-        return jsonify({"ok": False, "msg": "Admin ya existe"}), 409
     a = admin(username=username, email=email, role=data.get("role","admin"))
     a.set_password(password)
-    db.session.add(a); db.session.commit()
+    db.session.add(a)
+    try:
+        db.session.commit()
+    except IntegrityError:  # username/email repetido (índice login_keys)
+        db.session.rollback()
+        return jsonify({"ok": False, "msg": "Admin ya existe"}), 409
     return jsonify(admin_schema.dump(a)), 201
 
 @Routes_adminC.route("/admins/<int:aid>", methods=["PUT"])
@@ -79,11 +148,12 @@ def admin_delete_admin(aid):
 
 # Usuarios CRUD (admin)
 @Routes_adminC.route("/users", methods=["GET"])
+@read_only
 def admin_list_users():
-    items = usuario.query.order_by(usuario.id.desc()).all()
-    return jsonify(usuarios_schema.dump(items)), 200
+    return paged_list_response(usuario, usuarioSchema)
 
 @Routes_adminC.route("/users/<int:uid>", methods=["GET"])
+@read_only
 def admin_get_user(uid):
     u = usuario.query.get_or_404(uid)
     return jsonify(usuario_schema.dump(u)), 200
@@ -97,27 +167,31 @@ def admin_update_user(uid):
     if data.get("password"):
         u.set_password(data["password"])
     db.session.commit()
+    invalidate_user(uid)
     return jsonify(usuario_schema.dump(u)), 200
 
 @Routes_adminC.route("/users/<int:uid>", methods=["DELETE"])
 def admin_delete_user(uid):
     u = usuario.query.get_or_404(uid)
     db.session.delete(u); db.session.commit()
+    invalidate_user(uid)
     return jsonify({"ok": True}), 204
 
 
 # Mascotas CRUD (admin)
 @Routes_adminC.route("/mascotas", methods=["GET"])
+@read_only
 def admin_list_mascotas():
-    items = Mascota.query.order_by(Mascota.id.desc()).all()
-    return jsonify(mascotas_schema.dump(items)), 200
+    return paged_list_response(Mascota, MascotaSchema)
 
 @Routes_adminC.route("/mascotas/<int:mid>", methods=["GET"])
+@read_only
 def admin_get_mascota(mid):
     m = Mascota.query.get_or_404(mid)
     return jsonify(mascota_schema.dump(m)), 200
 
 @Routes_adminC.route("/mascotas", methods=["POST"])
+@query_budget(5)  # duplicado + 2 INSERT (mascota y espejo) + refcount
 def admin_create_mascota():
     """
     Acepta JSON (API) o multipart/form-data (form del admin).
@@ -141,12 +215,7 @@ def admin_create_mascota():
         descripcion = request.form.get("descripcion")
         autor = request.form.get("autor") or "Administrador"
         file = request.files.get("imagen")
-        if file and file.filename:
-            uploads_dir = os.path.join(current_app.static_folder, "uploads")
-            os.makedirs(uploads_dir, exist_ok=True)
-            safe_name = secure_filename(file.filename)
-            imagen_filename = f"{uuid.uuid4().hex}_{safe_name}"
-            file.save(os.path.join(uploads_dir, imagen_filename))
+        imagen_filename = save_upload(file)
 
     if not nombre or not descripcion:
         # responder JSON o redirigir con error simple
@@ -167,6 +236,11 @@ def admin_create_mascota():
     db.session.add(p)
     try:
         db.session.commit()
+    except IntegrityError:  # mismo par (nombre, autor) creado en paralelo
+        db.session.rollback()
+        if data:
+            return jsonify({"ok": False, "msg": "Mascota ya registrada"}), 409
+        return redirect(request.referrer or "/postularADM")
     except Exception as e:
         db.session.rollback()
         if data:
@@ -179,6 +253,43 @@ def admin_create_mascota():
     # petición desde formulario: redirigir de vuelta a la página de postularADM
     return redirect(request.referrer or "/postularADM")
 
+# Mascotas en lote: un commit por lote y un resultado por ítem (ver Config/bulk.py)
+def _bulk_response(key, operation, **kwargs):
+    try:
+        items = items_from(request.get_json(silent=True), key)
+    except BulkPayloadError as e:
+        return jsonify({"ok": False, "msg": str(e)}), 400
+    try:
+        results = operation(items, **kwargs)
+    except Exception as e:
+        return jsonify({"ok": False, "msg": "Error al guardar en la BD", "error": str(e)}), 500
+    return jsonify(summary(results)), 200
+
+@Routes_adminC.route("/mascotas/bulk", methods=["POST"])
+@admin_required
+def admin_bulk_create_mascotas():
+    # {"items": [{nombre, descripcion, imagen?, autor?}, ...]} (crea también la postulación espejo)
+    return _bulk_response("items", create_mascotas, mirror=True)
+
+@Routes_adminC.route("/mascotas/bulk", methods=["PUT"])
+@admin_required
+def admin_bulk_update_mascotas():
+    # {"items": [{id, nombre?, descripcion?, imagen?, autor?, is_adopted?}, ...]}
+    return _bulk_response("items", update_mascotas)
+
+@Routes_adminC.route("/mascotas/bulk/adopt", methods=["POST"])
+@admin_required
+def admin_bulk_adopt_mascotas():
+    # {"ids": [1, 2, 3], "is_adopted": true|false} -> UPDATE ... WHERE id IN (...)
+    data = request.get_json(silent=True) or {}
+    return _bulk_response("ids", set_adopted, is_adopted=data.get("is_adopted", True))
+
+@Routes_adminC.route("/mascotas/bulk", methods=["DELETE"])
+@admin_required
+def admin_bulk_delete_mascotas():
+    # {"ids": [1, 2, 3]} -> DELETE ... WHERE id IN (...)
+    return _bulk_response("ids", delete_mascotas)
+
 @Routes_adminC.route("/mascotas/<int:mid>", methods=["PUT"])
 def admin_update_mascota(mid):
     m = Mascota.query.get_or_404(mid)
@@ -200,11 +311,24 @@ def admin_delete_mascota(mid):
 
 # Postulaciones CRUD (admin)
 @Routes_adminC.route("/postulares", methods=["GET"])
+@read_only
 def admin_list_postulares():
-    items = PostularMascotas.query.order_by(PostularMascotas.id.desc()).all()
-    return jsonify(postulares_schema.dump(items)), 200
+    # Con filtros por faceta (?especie=&sexo=&tamanio=&edad=&ubicacion= o ?q=) los ids salen
+    # de los mapas de bits en memoria y el total es exacto
+    filters = filters_from_args(request.args)
+    if not filters:
+        return paged_list_response(PostularMascotas, PostularMascotasSchema)
+    result = facet_index.query(
+        filters,
+        cursor=parse_cursor(request.args.get("cursor")),
+        limit=parse_page_size(request.args.get("limit"), ADMIN_PAGE_SIZE, ADMIN_MAX_PAGE_SIZE),
+        with_counts=False,
+    )
+    encoder = row_encoder(PostularMascotasSchema, parse_fields(request.args.get("fields"), PostularMascotasSchema))
+    return _with_page_headers(jsonify(fetch_rows(encoder, result["ids"])), result["next_cursor"], result["total"])
 
 @Routes_adminC.route("/postulares/<int:pid>", methods=["GET"])
+@read_only
 def admin_get_postular(pid):
     p = PostularMascotas.query.get_or_404(pid)
     return jsonify(postular_schema.dump(p)), 200
@@ -269,13 +393,7 @@ def admin_create_mascota_form():
         descripcion = request.form.get('descripcion')
         autor = request.form.get('autor') or 'Administrador'
         file = request.files.get('imagen')
-        imagen_filename = ""
-        if file and file.filename:
-            uploads_dir = os.path.join(current_app.static_folder, "uploads")
-            os.makedirs(uploads_dir, exist_ok=True)
-            safe_name = secure_filename(file.filename)
-            imagen_filename = f"{uuid.uuid4().hex}_{safe_name}"
-            file.save(os.path.join(uploads_dir, imagen_filename))
+        imagen_filename = save_upload(file)
 
     if not nombre or not descripcion:
         if is_xhr:
@@ -295,6 +413,11 @@ def admin_create_mascota_form():
     db.session.add(p)
     try:
         db.session.commit()
+    except IntegrityError:  # mismo par (nombre, autor) creado en paralelo
+        db.session.rollback()
+        if is_xhr:
+            return jsonify({"ok": False, "msg": "Mascota ya registrada"}), 409
+        return redirect('/postularADM')
     except Exception as e:
         db.session.rollback()
         if is_xhr:
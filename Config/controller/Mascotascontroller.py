@@ -1,27 +1,60 @@
 from flask import Blueprint, request, jsonify, render_template
-from Config.db import db
+from Config.db import db, read_only
+from sqlalchemy.exc import IntegrityError
 from Models.mascotas import Mascota, MascotaSchema
+from Config.catalog_cache import mascotas_cards, mascotas_json
+from Config.listing import parse_bool, parse_page_size
+from Config.search import SOURCES, search
+from Config.bulk import BulkPayloadError, create_mascotas, items_from, summary
+from Config.controller.adoptar_mascontroller import login_required
+from Config.sql_profiler import query_budget
 
 routes_MascotasC = Blueprint("routes_MascotasC", __name__, url_prefix="/mascotas")
 
 # Schemas
 mascota_schema = MascotaSchema()
-mascotas_schema = MascotaSchema(many=True)
 
 
 @routes_MascotasC.route("/", methods=["GET"])
+@read_only
 def pagina_mascotas():
-    mascotas = Mascota.query.order_by(Mascota.id.desc()).all()
-    return render_template("main/Pagina1_Adopcion.html", mascotas=mascotas)
+    mascotas_html, next_cursor = mascotas_cards(request.args)
+    return render_template(
+        "main/Pagina1_Adopcion.html",
+        mascotas_html=mascotas_html,
+        next_cursor=next_cursor,
+        cursor=request.args.get("cursor"),
+    )
 
 
 @routes_MascotasC.route("/api", methods=["GET"])
+@read_only
 def listar_mascotas():
-    items = Mascota.query.order_by(Mascota.id.desc()).all()
-    return jsonify({"ok": True, "mascotas": mascotas_schema.dump(items)}), 200
+    # ?cursor=<id>&limit=<n>&is_adopted=0|1&autor=<nombre>
+    # Cuerpo cacheado por versión del catálogo (se invalida en cada commit sobre mascotas)
+    return mascotas_json(request.args), 200
+
+
+@routes_MascotasC.route("/search", methods=["GET"])
+def buscar():
+    # ?q=<texto>&tipo=mascota|postulacion&limit=<n>&adoptadas=0|1
+    # Índice invertido en memoria (Config/search.py): no consulta la BD salvo para sincronizarse
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify({"ok": False, "msg": "Falta el parámetro q"}), 400
+    tipo = request.args.get("tipo")
+    if tipo and tipo not in SOURCES:
+        return jsonify({"ok": False, "msg": f"tipo debe ser uno de: {', '.join(SOURCES)}"}), 400
+    return jsonify(search(
+        q,
+        kinds={tipo} if tipo else None,
+        limit=parse_page_size(request.args.get("limit"), default=20),
+        include_adopted=bool(parse_bool(request.args.get("adoptadas"))),
+    )), 200
 
 
 @routes_MascotasC.route("/api", methods=["POST"])
+@query_budget(4)  # duplicado + INSERT + refcount de la imagen
 def crear_mascota():
     # Intentar JSON; si no viene (form fallback) leer request.form
     data = request.get_json(silent=True)
@@ -44,6 +77,9 @@ def crear_mascota():
     db.session.add(m)
     try:
         db.session.commit()
+    except IntegrityError:  # otro request creó el mismo par (índice único nombre, autor)
+        db.session.rollback()
+        return jsonify({"ok": False, "msg": "Mascota ya registrada"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"ok": False, "msg": "Error al guardar en la base", "error": str(e)}), 500
@@ -51,6 +87,22 @@ def crear_mascota():
     return jsonify({"ok": True, "msg": "Mascota creada", "mascota": mascota_schema.dump(m)}), 201
 
 
+@routes_MascotasC.route("/api/bulk", methods=["POST"])
+@login_required
+def crear_mascotas_lote():
+    # {"items": [{nombre, descripcion, imagen?, autor?}, ...]} -> un INSERT multi-fila que ignora
+    # los pares (nombre, autor) ya registrados y un commit; resultado por ítem (201 / 400 / 409)
+    try:
+        items = items_from(request.get_json(silent=True), "items")
+    except BulkPayloadError as e:
+        return jsonify({"ok": False, "msg": str(e)}), 400
+    try:
+        results = create_mascotas(items)
+    except Exception as e:
+        return jsonify({"ok": False, "msg": "Error al guardar en la base", "error": str(e)}), 500
+    return jsonify(summary(results)), 200
+
+
 @routes_MascotasC.route("/api/<int:mid>", methods=["PUT"])
 def actualizar_mascota(mid):
     m = Mascota.query.get_or_404(mid)
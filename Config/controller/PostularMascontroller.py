@@ -1,13 +1,16 @@
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash
-from Config.db import db
+from Config.db import db, read_only
+from sqlalchemy.exc import IntegrityError
+from Config.serializers import row_encoder
+from Config.facets import facet_index, fetch_rows, filters_from_args
+from Config.listing import parse_cursor, parse_page_size
 from Models.postular_mascotas import PostularMascotas, PostularMascotasSchema
 
 routes_PostularC = Blueprint("routes_PostularC", __name__, url_prefix="/postular")
 
 # Schemas
 postular_schema = PostularMascotasSchema()
-postulares_schema = PostularMascotasSchema(many=True)
+postulares_encoder = row_encoder(PostularMascotasSchema)
 
 @routes_PostularC.route("/init-db", methods=["POST"])
 def init_db():
@@ -15,11 +18,48 @@ def init_db():
     return jsonify({"ok": True, "msg": "Tablas creadas/aseguradas"}), 201
 
 @routes_PostularC.route("/", methods=["GET"])
+@read_only
 def list_postulaciones():
-    items = PostularMascotas.query.order_by(PostularMascotas.id.desc()).all()
-    return jsonify(postulares_schema.dump(items)), 200
+    # ?especie=&sexo=&tamanio=&edad=&ubicacion= (valores separados por coma) o ?q=texto libre
+    # filtrado: una página (?limit=&cursor=), la siguiente en X-Next-Cursor
+    filters = filters_from_args(request.args)
+    if filters:
+        result = facet_index.query(
+            filters,
+            cursor=parse_cursor(request.args.get("cursor")),
+            limit=parse_page_size(request.args.get("limit")),
+            with_counts=False,
+        )
+        resp = jsonify(fetch_rows(postulares_encoder, result["ids"]))
+        resp.headers["X-Total-Count"] = str(result["total"])
+        if result["next_cursor"]:
+            resp.headers["X-Next-Cursor"] = result["next_cursor"]
+        return resp, 200
+    rows = db.session.execute(postulares_encoder.select().order_by(PostularMascotas.id.desc())).all()
+    return jsonify(postulares_encoder.dump_rows(rows)), 200
+
+@routes_PostularC.route("/facetas", methods=["GET"])
+@read_only
+def facetas_postulaciones():
+    # Página filtrada + conteos por faceta, resueltos en memoria (Config/facets.py)
+    # p. ej. /postular/facetas?q=perros pequeños en Bogotá  o  ?especie=perro&tamanio=pequeño
+    filters = filters_from_args(request.args)
+    result = facet_index.query(
+        filters,
+        cursor=parse_cursor(request.args.get("cursor")),
+        limit=parse_page_size(request.args.get("limit")),
+    )
+    return jsonify({
+        "ok": True,
+        "total": result["total"],
+        "filters": {facet: sorted(keys) for facet, keys in filters.items()},
+        "facets": result["facets"],
+        "items": fetch_rows(postulares_encoder, result["ids"]),
+        "next_cursor": result["next_cursor"],
+    }), 200
 
 @routes_PostularC.route("/<int:item_id>", methods=["GET"])
+@read_only
 def get_postulacion(item_id):
     item = PostularMascotas.query.get_or_404(item_id)
     return jsonify(postular_schema.dump(item)), 200
@@ -34,15 +74,14 @@ def create_postulacion():
     if not all([username, email, password]):
         return jsonify({"ok": False, "msg": "Faltan campos requeridos"}), 400
 
-    if PostularMascotas.query.filter(
-        (PostularMascotas.username == username) | (PostularMascotas.email == email)
-    ).first():
-        return jsonify({"ok": False, "msg": "Usuario o email ya existe"}), 409
-
     obj = PostularMascotas(username=username, email=email)
-    obj.password_hash = generate_password_hash(password)
+    obj.set_password(password)
     db.session.add(obj)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:  # username/email repetido (índice login_keys)
+        db.session.rollback()
+        return jsonify({"ok": False, "msg": "Usuario o email ya existe"}), 409
     return jsonify(postular_schema.dump(obj)), 201
 
 @routes_PostularC.route("/<int:item_id>", methods=["PUT"])
@@ -52,7 +91,7 @@ def update_postulacion(item_id):
     item.username = data.get("username", item.username)
     item.email = data.get("email", item.email)
     if "password" in data and data["password"]:
-        item.password_hash = generate_password_hash(data["password"])
+        item.set_password(data["password"])
     db.session.commit()
     return jsonify(postular_schema.dump(item)), 200
 
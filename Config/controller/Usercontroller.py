@@ -1,23 +1,22 @@
 from flask import Blueprint, request, jsonify, session
-from Config.db import db
+from Config.db import db, read_only
+from Config.serializers import row_encoder
+from Config.user_cache import invalidate_user
 from Models.usuario import usuario, usuarioSchema
 from Models.admins import admin as AdminModel
-from werkzeug.security import generate_password_hash, check_password_hash
+from Config.identity import authenticate, find_identity
+from Config.sql_profiler import query_budget
+from sqlalchemy.exc import IntegrityError
 
 routes_UserC = Blueprint("routes_UserC", __name__, url_prefix="/api/users")
 
 usuario_schema = usuarioSchema()
-usuarios_schema = usuarioSchema(many=True)
+usuarios_encoder = row_encoder(usuarioSchema)
 
 
 def find_user(identifier):
-    # intentar buscar en admins primero (permitir login de admin desde la misma pantalla)
-    a = AdminModel.query.filter((AdminModel.username == identifier) | (AdminModel.email == identifier)).first()
-    if a:
-        return a
-    return usuario.query.filter(
-        (usuario.username == identifier) | (usuario.email == identifier)
-    ).first()
+    # admins primero (permitir login de admin desde la misma pantalla); una sola consulta a login_keys
+    return find_identity(identifier)
 
 
 @routes_UserC.route("/init-db", methods=["POST"])
@@ -27,12 +26,14 @@ def init_db():
 
 
 @routes_UserC.route("/", methods=["GET"])
+@read_only
 def list_users():
-    users = usuario.query.order_by(usuario.id.desc()).all()
-    return jsonify(usuarios_schema.dump(users)), 200
+    rows = db.session.execute(usuarios_encoder.select().order_by(usuario.id.desc())).all()
+    return jsonify(usuarios_encoder.dump_rows(rows)), 200
 
 
 @routes_UserC.route("/<int:user_id>", methods=["GET"])
+@read_only
 def get_user(user_id):
     u = usuario.query.get_or_404(user_id)
     return jsonify(usuario_schema.dump(u)), 200
@@ -48,17 +49,20 @@ def register():
     if not all([username, email, password]):
         return jsonify({"ok": False, "msg": "Faltan campos"}), 400
 
-    if usuario.query.filter((usuario.username == username) | (usuario.email == email)).first():
-        return jsonify({"ok": False, "msg": "Usuario o email ya existe"}), 409
-
+    # la unicidad la garantiza el índice login_keys: sin SELECT previo
     u = usuario(username=username, email=email)
     u.set_password(password)
     db.session.add(u)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"ok": False, "msg": "Usuario o email ya existe"}), 409
     return jsonify(usuario_schema.dump(u)), 201
 
 
 @routes_UserC.route("/login", methods=["POST"])
+@query_budget(3)  # login_keys + cuenta (+ UPDATE si se rehashea la contraseña)
 def login():
     data = request.get_json() or {}
     identifier = data.get("identifier") or data.get("username") or data.get("email")
@@ -66,8 +70,8 @@ def login():
     if not all([identifier, password]):
         return jsonify({"ok": False, "msg": "Faltan credenciales"}), 400
 
-    u = find_user(identifier)
-    if not u or not u.check_password(password):
+    u = authenticate(identifier, password)
+    if not u:
         return jsonify({"ok": False, "msg": "Credenciales inválidas"}), 401
 
     session.clear()
@@ -101,6 +105,7 @@ def update_user(user_id):
     if data.get("password"):
         u.set_password(data["password"])
     db.session.commit()
+    invalidate_user(user_id)
     return jsonify(usuario_schema.dump(u)), 200
 
 
@@ -109,4 +114,5 @@ def delete_user(user_id):
     u = usuario.query.get_or_404(user_id)
     db.session.delete(u)
     db.session.commit()
+    invalidate_user(user_id)
     return jsonify({"ok": True}), 204
\ No newline at end of file
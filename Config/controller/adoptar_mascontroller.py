@@ -3,13 +3,113 @@
 IMPORTANTE: No manejar el formulario HTML en este blueprint para evitar colisiones
 con la ruta '/formulario' de `app.py` que incluye autenticación y lógica de flashes.
 
-Este blueprint queda solo para endpoints futuros tipo API (/adopciones/*).
+Aquí vive la API de revisión de solicitudes (/adopciones/*), solo para admins:
+listado por keyset con filtros, detalle, confirmación/baja y conteos por mascota
+(Config/adopciones.py).
 """
 
-from flask import Blueprint, jsonify
+from functools import wraps
+
+from flask import Blueprint, jsonify, request, session
+
+from Config.adopciones import counts_page, pet_ids, review_page
+from Config.db import db, read_only
+from Config.listing import ADMIN_MAX_PAGE_SIZE, ADMIN_PAGE_SIZE, parse_bool, parse_cursor, parse_page_size
+from Models.adoptar_mascotas import adoptar_mascotas, adoptar_mascotasSchema
+from Models.mascotas import Mascota
 
 Routes_adoptarC = Blueprint("Routes_adoptarC", __name__, url_prefix="/adopciones")
 
+adoptar_schema = adoptar_mascotasSchema()
+
+
+def login_required(f):
+    """Variante JSON (401) del `login_required` de app.py, para las APIs."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if "user_id" not in session:
+            return jsonify({"ok": False, "msg": "Debes iniciar sesión"}), 401
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if "user_id" not in session:
+            return jsonify({"ok": False, "msg": "Debes iniciar sesión"}), 401
+        if not session.get("is_admin"):
+            return jsonify({"ok": False, "msg": "Solo administradores"}), 403
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
 @Routes_adoptarC.route("/ping")
 def ping_adopciones():
-    return jsonify({"ok": True, "service": "adopciones", "status": "ready"})
\ No newline at end of file
+    return jsonify({"ok": True, "service": "adopciones", "status": "ready"})
+
+
+@Routes_adoptarC.route("/", methods=["GET"])
+@admin_required
+@read_only
+def listar_solicitudes():
+    # ?cursor=<id>&limit=<n>&is_confirmed=0|1&pet=<id o nombre>
+    items, next_cursor = review_page(
+        is_confirmed=parse_bool(request.args.get("is_confirmed")),
+        mascota_ids=pet_ids(request.args.get("pet")),
+        cursor=parse_cursor(request.args.get("cursor")),
+        limit=parse_page_size(request.args.get("limit"), ADMIN_PAGE_SIZE, ADMIN_MAX_PAGE_SIZE),
+    )
+    return jsonify({"ok": True, "items": items, "next_cursor": next_cursor}), 200
+
+
+@Routes_adoptarC.route("/conteos", methods=["GET"])
+@admin_required
+@read_only
+def conteos_por_mascota():
+    # ?orden=pendientes|total|confirmadas&pet=<id o nombre>&limit=<n> (tabla adopcion_conteos)
+    return jsonify({
+        "ok": True,
+        "items": counts_page(
+            order=request.args.get("orden", "pendientes"),
+            mascota_ids=pet_ids(request.args.get("pet")),
+            limit=parse_page_size(request.args.get("limit"), ADMIN_PAGE_SIZE, ADMIN_MAX_PAGE_SIZE),
+        ),
+    }), 200
+
+
+@Routes_adoptarC.route("/<int:sid>", methods=["GET"])
+@admin_required
+@read_only
+def ver_solicitud(sid):
+    return jsonify(adoptar_schema.dump(adoptar_mascotas.query.get_or_404(sid))), 200
+
+
+@Routes_adoptarC.route("/<int:sid>", methods=["PATCH"])
+@admin_required
+def revisar_solicitud(sid):
+    # {"is_confirmed": true|false, "mascota_id": <id>|null}; los conteos se ajustan en el flush
+    s = adoptar_mascotas.query.get_or_404(sid)
+    data = request.get_json(silent=True) or {}
+    if "is_confirmed" in data:
+        value = data["is_confirmed"]
+        s.is_confirmed = bool(parse_bool(value)) if isinstance(value, str) else bool(value)
+    if "mascota_id" in data:
+        if data["mascota_id"] is not None and (
+            not isinstance(data["mascota_id"], int) or not db.session.get(Mascota, data["mascota_id"])
+        ):
+            return jsonify({"ok": False, "msg": "Mascota no encontrada"}), 404
+        s.mascota_id = data["mascota_id"]
+    db.session.commit()
+    return jsonify(adoptar_schema.dump(s)), 200
+
+
+@Routes_adoptarC.route("/<int:sid>", methods=["DELETE"])
+@admin_required
+def eliminar_solicitud(sid):
+    s = adoptar_mascotas.query.get_or_404(sid)
+    db.session.delete(s)
+    db.session.commit()
+    return jsonify({"ok": True}), 204
@@ -1,6 +1,10 @@
 import os
+from contextlib import contextmanager
+from functools import wraps
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
 from flask_marshmallow import Marshmallow
 
 # Configure absolute paths
@@ -28,15 +32,101 @@ DB_NAME = os.getenv("DB_NAME", "mysql1")
 DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
 DB_PORT = os.getenv("DB_PORT", "3307")
 
-app.config["SQLALCHEMY_DATABASE_URI"] = (
+# DATABASE_URL permite apuntar a otra base completa (p. ej. SQLite en benchmarks)
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL") or (
     f"mysql+pymysql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
 )
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_pre_ping": True,
-    "pool_recycle": 280,
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "280")),
 }
 
-db = SQLAlchemy(app)
+# Pool por proceso: cada worker de gunicorn tiene su propio pool, así que por defecto se
+# dimensiona con los hilos del worker (GUNICORN_THREADS) para que ningún hilo espere conexión.
+# Total de conexiones a MySQL ~= workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].update({
+        "pool_size": int(os.getenv("DB_POOL_SIZE", os.getenv("GUNICORN_THREADS", "5"))),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "2")),
+        # segundos que un hilo espera una conexión libre antes de fallar (en vez de colgarse)
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "connect_args": {
+            "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5")),
+            # tope duro de espera por respuesta de MySQL en cualquier sentencia
+            "read_timeout": int(os.getenv("DB_READ_TIMEOUT", "30")),
+            "write_timeout": int(os.getenv("DB_WRITE_TIMEOUT", "30")),
+        },
+    })
+
+# Límite por sentencia en milisegundos (MySQL MAX_EXECUTION_TIME, aplica a SELECT); 0 = sin límite
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# Réplica de solo lectura opcional: DB_REPLICA_URL completa o DB_REPLICA_HOST con las mismas credenciales
+DB_REPLICA_URL = os.getenv("DB_REPLICA_URL") or (
+    f"mysql+pymysql://{DB_USER}:{DB_PASS}@{os.environ['DB_REPLICA_HOST']}:"
+    f"{os.getenv('DB_REPLICA_PORT', DB_PORT)}/{DB_NAME}?charset=utf8mb4"
+    if os.getenv("DB_REPLICA_HOST") else None
+)
+if DB_REPLICA_URL:
+    app.config["SQLALCHEMY_BINDS"] = {"replica": DB_REPLICA_URL}
+
+
+class RoutingSession(Session):
+    """Sesión que envía las lecturas marcadas con `use_replica()` a la réplica.
+
+    Escrituras (flush, INSERT/UPDATE/DELETE de Core) siempre van al primario, y
+    sin réplica configurada todo va al primario. Las lecturas en réplica pueden
+    llegar con algo de retraso respecto a la última escritura.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.info.get("use_replica")
+            and not self._flushing
+            and not (clause is not None and getattr(clause, "is_dml", False))
+        ):
+            engine = self._db.engines.get("replica")
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+db = SQLAlchemy(app, session_options={"class_": RoutingSession})
 ma = Marshmallow(app)
-# ...existing code...
\ No newline at end of file
+
+
+def _set_statement_timeout(dbapi_conn, _record):
+    cursor = dbapi_conn.cursor()
+    cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {DB_STATEMENT_TIMEOUT_MS}")
+    cursor.close()
+
+
+if DB_STATEMENT_TIMEOUT_MS:
+    with app.app_context():
+        for _engine in db.engines.values():
+            if _engine.dialect.name == "mysql":
+                event.listen(_engine, "connect", _set_statement_timeout)
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Dentro del bloque las consultas de solo lectura van a la réplica (si hay)."""
+    session = db.session()
+    previous = session.info.get("use_replica", False)
+    session.info["use_replica"] = enabled
+    try:
+        yield
+    finally:
+        session.info["use_replica"] = previous
+
+
+def read_only(view):
+    """Decorador para vistas de solo lectura (listados, GET de admin)."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with use_replica():
+            return view(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,160 @@
+"""Exportación masiva en streaming (NDJSON y CSV).
+
+El cuerpo nunca se arma completo en memoria:
+
+- la consulta se ejecuta con cursor del lado del servidor (`stream_results`,
+  `SSCursor` en pymysql) y se lee en bloques de `EXPORT_CHUNK_SIZE` filas
+  (`yield_per`), así el driver tampoco trae la tabla entera;
+- cada bloque se serializa con el codificador columnar de Config.serializers
+  (mismos campos que los schemas: nunca sale `password_hash`) y se entrega al
+  cliente como un trozo de la respuesta;
+- con gzip el bloque pasa por un `zlib.compressobj` incremental.
+
+La memoria depende del tamaño del bloque, no de la tabla. Las lecturas van a
+la réplica si hay una configurada.
+
+Uso: `GET /api/admin/export/<tabla>.<ndjson|csv>[?gzip=1]` o
+`flask export <tabla> --format csv --gzip -o archivo.csv.gz`.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import zlib
+
+import click
+from flask.cli import with_appcontext
+
+from Config.db import DB_STATEMENT_TIMEOUT_MS, db
+from Config.serializers import row_encoder
+from Models.adoptar_mascotas import adoptar_mascotasSchema
+from Models.mascotas import MascotaSchema
+from Models.postular_mascotas import PostularMascotasSchema
+from Models.usuario import usuarioSchema
+
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+# MySQL corta la conexión si el cliente tarda más que esto en aceptar datos de un cursor abierto
+EXPORT_NET_WRITE_TIMEOUT = int(os.getenv("EXPORT_NET_WRITE_TIMEOUT", "600"))
+
+TABLES = {
+    "mascotas": MascotaSchema,
+    "usuarios": usuarioSchema,
+    "postular_mascotas": PostularMascotasSchema,
+    "adoptar_mascotas": adoptar_mascotasSchema,
+}
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def export_engine():
+    """Motor para exportar: la réplica si existe (lecturas largas fuera del primario)."""
+    return db.engines.get("replica") or db.engine
+
+
+def iter_chunks(table, engine, chunk_size=EXPORT_CHUNK_SIZE):
+    """Bloques de filas serializadas (`[dict, ...]`) en orden de `id`."""
+    encoder = row_encoder(TABLES[table])
+    stmt = encoder.select().order_by(encoder.model.id)
+    mysql = engine.dialect.name == "mysql"
+    conn = engine.connect()
+    finished = False
+    try:
+        if mysql:
+            # la exportación puede durar más que el tope por sentencia de las páginas
+            conn.exec_driver_sql(f"SET SESSION net_write_timeout = {EXPORT_NET_WRITE_TIMEOUT}")
+            conn.exec_driver_sql("SET SESSION MAX_EXECUTION_TIME = 0")
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+        for rows in result.partitions():
+            yield encoder.dump_rows(rows)
+        finished = True
+    finally:
+        if not finished:
+            # cliente desconectado o error a mitad: cerrar el cursor obligaría a leer
+            # (y descartar) el resto de la tabla; se descarta la conexión.
+            conn.invalidate()
+        elif mysql:
+            conn.exec_driver_sql("SET SESSION net_write_timeout = DEFAULT")
+            conn.exec_driver_sql(f"SET SESSION MAX_EXECUTION_TIME = {DB_STATEMENT_TIMEOUT_MS}")
+        conn.close()
+
+
+def ndjson_lines(chunks):
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for rows in chunks:
+        if rows:
+            yield "".join([encode(row) + "\n" for row in rows]).encode("utf-8")
+
+
+def csv_lines(keys, chunks):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(keys)
+    for rows in chunks:
+        writer.writerows([row[k] for k in keys] for row in rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")  # tabla vacía: solo la cabecera
+
+
+def gzip_stream(parts, level=EXPORT_GZIP_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+    for part in parts:
+        out = compressor.compress(part)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def export_stream(table, fmt, gzip=False, chunk_size=EXPORT_CHUNK_SIZE, engine=None):
+    """`(iterador de bytes, mimetype, nombre de archivo)` para `table` en `fmt`.
+
+    El motor se resuelve aquí (dentro del contexto de la app), así el generador
+    puede consumirse después de que termine el request.
+    """
+    if table not in TABLES:
+        raise KeyError(table)
+    chunks = iter_chunks(table, engine or export_engine(), chunk_size)
+    if fmt == "csv":
+        body = csv_lines(row_encoder(TABLES[table]).keys, chunks)
+    else:
+        body = ndjson_lines(chunks)
+    filename = f"{table}.{fmt}"
+    if gzip:
+        return gzip_stream(body), "application/gzip", filename + ".gz"
+    return body, FORMATS[fmt], filename
+
+
+def init_app(app):
+    app.cli.add_command(export_command)
+
+
+@click.command("export")
+@click.argument("table", type=click.Choice(list(TABLES)))
+@click.option("--format", "fmt", type=click.Choice(list(FORMATS)), default="ndjson", show_default=True)
+@click.option("--gzip", is_flag=True, help="Comprimir la salida con gzip.")
+@click.option("-o", "--output", type=click.Path(dir_okay=False), help="Archivo de salida (por defecto stdout).")
+@click.option("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, show_default=True, help="Filas por bloque.")
+@with_appcontext
+def export_command(table, fmt, gzip, output, chunk_size):
+    """Exporta una tabla completa en streaming (NDJSON o CSV)."""
+    body, _, _ = export_stream(table, fmt, gzip=gzip, chunk_size=chunk_size, engine=export_engine())
+    written = 0
+    out = open(output, "wb") if output else sys.stdout.buffer
+    try:
+        for part in body:
+            out.write(part)
+            written += len(part)
+    finally:
+        if output:
+            out.close()
+        else:
+            out.flush()
+    if output:
+        click.echo(f"{output}: {written} bytes", err=True)
@@ -0,0 +1,191 @@
+"""Índice unificado de identidades para login y registro.
+
+Antes cada login hacía `email == x OR username == x` contra `admins` y luego
+contra `usuarios`, y cada registro un SELECT previo para detectar duplicados.
+Ahora:
+
+- La tabla `login_keys` guarda cada email/username normalizado (minúsculas,
+  sin espacios) con el tipo de cuenta y su id, con índice único
+  `(login_key, kind)`.
+- `find_identities()` resuelve admin y usuario en una sola consulta (búsqueda
+  por igualdad en el índice + LEFT JOIN a cada tabla).
+- Los registros insertan directamente: si la clave ya existe, el flush falla
+  con `IntegrityError` y la vista responde 409. En el registro web el
+  username es el nombre para mostrar, que puede repetirse: `create_usuario()`
+  solo rechaza emails repetidos y deriva un username único si el nombre choca.
+
+Las filas se mantienen con eventos del mapper dentro del mismo flush, así que
+un registro y su clave se confirman o revierten juntos.
+"""
+
+import logging
+import secrets
+
+from sqlalchemy import and_, case, delete, event, inspect, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from Config.db import db
+from Config.passwords import hash_password, needs_rehash, verify_password
+from Models.admins import admin as AdminModel
+from Models.login_keys import LoginKey
+from Models.postular_mascotas import PostularMascotas
+from Models.usuario import usuario
+
+logger = logging.getLogger(__name__)
+
+KIND_ADMIN = "admin"
+KIND_USUARIO = "usuario"
+KIND_POSTULANTE = "postulante"
+
+_KINDS = {AdminModel: KIND_ADMIN, usuario: KIND_USUARIO, PostularMascotas: KIND_POSTULANTE}
+_keys = LoginKey.__table__
+
+
+def normalize_login(value):
+    return (value or "").strip().lower()
+
+
+def login_keys_for(obj):
+    """Claves distintas de una cuenta. Las postulaciones solo cuentan si tienen contraseña."""
+    if isinstance(obj, PostularMascotas) and not obj.password_hash:
+        return set()
+    return {key for key in (normalize_login(obj.username), normalize_login(obj.email)) if key}
+
+
+def _insert_keys(connection, kind, ref_id, keys):
+    if keys:
+        connection.execute(insert(_keys), [{"login_key": k, "kind": kind, "ref_id": ref_id} for k in sorted(keys)])
+
+
+def _after_insert(mapper, connection, target):
+    _insert_keys(connection, _KINDS[mapper.class_], target.id, login_keys_for(target))
+
+
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[attr].history.has_changes() for attr in ("username", "email", "password_hash")):
+        return
+    kind = _KINDS[mapper.class_]
+    connection.execute(delete(_keys).where(_keys.c.kind == kind, _keys.c.ref_id == target.id))
+    _insert_keys(connection, kind, target.id, login_keys_for(target))
+
+
+def _after_delete(mapper, connection, target):
+    kind = _KINDS[mapper.class_]
+    connection.execute(delete(_keys).where(_keys.c.kind == kind, _keys.c.ref_id == target.id))
+
+
+for _model in _KINDS:
+    event.listen(_model, "after_insert", _after_insert)
+    event.listen(_model, "after_update", _after_update)
+    event.listen(_model, "after_delete", _after_delete)
+
+
+def find_identities(identifier):
+    """Cuentas (admin primero, luego usuario) cuyo email o username es `identifier`.
+
+    Una sola consulta: igualdad sobre el índice único de `login_keys` y LEFT
+    JOIN a `admins` y `usuarios`.
+    """
+    key = normalize_login(identifier)
+    if not key:
+        return []
+    stmt = (
+        select(AdminModel, usuario)
+        .select_from(LoginKey)
+        .outerjoin(AdminModel, and_(LoginKey.kind == KIND_ADMIN, AdminModel.id == LoginKey.ref_id))
+        .outerjoin(usuario, and_(LoginKey.kind == KIND_USUARIO, usuario.id == LoginKey.ref_id))
+        .where(LoginKey.login_key == key, LoginKey.kind.in_((KIND_ADMIN, KIND_USUARIO)))
+        .order_by(case((LoginKey.kind == KIND_ADMIN, 0), else_=1))
+    )
+    return [a or u for a, u in db.session.execute(stmt) if (a or u) is not None]
+
+
+def find_identity(identifier):
+    """Primera cuenta que coincide (admin tiene prioridad), o `None`."""
+    found = find_identities(identifier)
+    return found[0] if found else None
+
+
+def authenticate(identifier, password):
+    """Cuenta cuya contraseña coincide; si un admin y un usuario comparten clave se prueba en ese orden.
+
+    Sin cuentas se verifica igual contra un hash señuelo (mismo tiempo de
+    respuesta). Si el hash guardado usa parámetros viejos se regenera con los
+    actuales aprovechando que la contraseña en claro ya está verificada.
+    """
+    accounts = find_identities(identifier)
+    if not accounts:
+        verify_password(None, password)
+        return None
+    for account in accounts:
+        if account.check_password(password):
+            if needs_rehash(account.password_hash):
+                _rehash(account, password)
+            return account
+    return None
+
+
+def email_taken(email, kind=KIND_USUARIO):
+    """Si `email` ya es clave de login de una cuenta de tipo `kind`."""
+    key = normalize_login(email)
+    return db.session.execute(
+        select(LoginKey.ref_id).where(LoginKey.login_key == key, LoginKey.kind == kind)
+    ).first() is not None
+
+
+def create_usuario(nombre, email, password):
+    """Registra un usuario con `nombre` como username; `None` si el email ya está registrado.
+
+    El nombre puede repetirse entre personas ("María"): si el username choca se
+    prueba con el del email ("María (maria.g)") y luego con un sufijo al azar.
+    """
+    local = email.split("@")[0]
+    base = nombre[:50]
+    candidates = [nombre, f"{base} ({local[:20]})", *(f"{base} ({local[:20]}-{secrets.token_hex(3)})" for _ in range(3))]
+    password_hash = hash_password(password)  # un solo hash para todos los intentos
+    for attempt, username in enumerate(candidates, 1):
+        u = usuario(username=username[:80], email=email, password_hash=password_hash)
+        db.session.add(u)
+        try:
+            db.session.commit()
+            return u
+        except IntegrityError:
+            db.session.rollback()
+            if email_taken(email) or attempt == len(candidates):
+                return None
+
+
+def _rehash(account, password):
+    try:
+        account.set_password(password)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.warning("identity: no se pudo actualizar el hash de %r", account, exc_info=True)
+
+
+def backfill(conn):
+    """Reconstruye `login_keys` desde las tablas de cuentas (usado por la migración).
+
+    Si dos cuentas del mismo tipo comparten clave, se queda la de menor id y
+    devuelve la lista de `(kind, ref_id, clave)` omitidas.
+    """
+    conn.execute(delete(_keys))
+    seen, skipped, rows = set(), [], []
+    for model, kind in _KINDS.items():
+        cols = [model.id, model.username, model.email]
+        if model is PostularMascotas:
+            stmt = select(*cols).where(model.password_hash.isnot(None))
+        else:
+            stmt = select(*cols)
+        for ref_id, username, email in conn.execute(stmt.order_by(model.id)):
+            for key in {normalize_login(username), normalize_login(email)} - {""}:
+                if (key, kind) in seen:
+                    skipped.append((kind, ref_id, key))
+                    continue
+                seen.add((key, kind))
+                rows.append({"login_key": key, "kind": kind, "ref_id": ref_id})
+    if rows:
+        conn.execute(insert(_keys), rows)
+    return skipped
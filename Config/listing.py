@@ -0,0 +1,194 @@
+"""Capa de listado compartida con paginación por cursor (keyset sobre `id`).
+
+En lugar de `OFFSET` (que recorre y descarta filas) cada página continúa desde
+el último `id` entregado: `WHERE id < :cursor ORDER BY id DESC LIMIT n`. Con el
+índice compuesto `(is_adopted, id)` de `mascotas` la primera página cuesta lo
+mismo con cincuenta mascotas que con cientos de miles.
+"""
+
+import threading
+import time
+from functools import lru_cache
+from typing import Any, List, NamedTuple, Optional
+
+from sqlalchemy import func, select, text
+
+from Config.db import db
+from Config.serializers import row_encoder
+from Models.mascotas import Mascota, MascotaSchema
+
+# Tamaño de página por defecto y tope máximo aceptado desde el query string
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# APIs de administración: páginas más grandes, pero igualmente acotadas
+ADMIN_PAGE_SIZE = 50
+ADMIN_MAX_PAGE_SIZE = 500
+
+# Segundos que se reutiliza el conteo aproximado de filas de una tabla
+COUNT_CACHE_TTL = 30
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Convierte `?limit=` a entero acotado a [1, maximum]."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def parse_cursor(value):
+    """El cursor es el último `id` entregado; valores inválidos equivalen a la primera página."""
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor > 0 else None
+
+
+def parse_bool(value):
+    """Interpreta filtros booleanos del query string (`1/0`, `true/false`, `si/no`)."""
+    if value is None or value == "":
+        return None
+    value = str(value).strip().lower()
+    if value in ("1", "true", "t", "yes", "si", "sí", "on"):
+        return True
+    if value in ("0", "false", "f", "no", "off"):
+        return False
+    return None
+
+
+def keyset_page(stmt, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE, scalars=True):
+    """Ejecuta `stmt` paginando por `id_column` descendente.
+
+    `stmt` puede seleccionar entidades ORM (`scalars=True`) o columnas sueltas
+    (`scalars=False`, devuelve `Row`). Se pide una fila extra para saber si hay
+    página siguiente sin necesidad de un `COUNT(*)`.
+    """
+    if cursor:
+        stmt = stmt.where(id_column < cursor)
+    stmt = stmt.order_by(id_column.desc()).limit(limit + 1)
+    result = db.session.execute(stmt)
+    rows = result.scalars().all() if scalars else result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = str(getattr(rows[-1], id_column.key))
+    return Page(rows, next_cursor)
+
+
+def listar_mascotas_page(cursor=None, limit=DEFAULT_PAGE_SIZE, is_adopted=None, autor=None):
+    """Página de mascotas (más recientes primero) con filtros opcionales.
+
+    Devuelve filas `Row` (acceso por atributo, válidas en plantillas) listas
+    para `row_encoder(MascotaSchema).dump_rows()` en los endpoints JSON.
+    """
+    stmt = row_encoder(MascotaSchema).select()
+    if is_adopted is not None:
+        stmt = stmt.where(Mascota.is_adopted == is_adopted)
+    if autor:
+        stmt = stmt.where(Mascota.autor == autor)
+    return keyset_page(stmt, Mascota.id, cursor=cursor, limit=limit, scalars=False)
+
+
+def mascotas_params_from_args(args, is_adopted=None):
+    """Lee `cursor`, `limit`, `is_adopted` y `autor` de `request.args` ya normalizados.
+
+    Un `is_adopted` distinto de `None` lo fija la vista (p. ej. /adopcion solo
+    muestra las no adoptadas) y la URL no lo cambia; con `None` se toma de
+    `?is_adopted=` (listados de API/administración).
+    """
+    return {
+        "cursor": parse_cursor(args.get("cursor")),
+        "limit": parse_page_size(args.get("limit")),
+        "is_adopted": parse_bool(args.get("is_adopted")) if is_adopted is None else is_adopted,
+        "autor": (args.get("autor") or "").strip() or None,
+    }
+
+
+def mascotas_page_from_args(args, is_adopted=None):
+    """Atajo para las vistas: página de mascotas según el query string."""
+    return listar_mascotas_page(**mascotas_params_from_args(args, is_adopted))
+
+
+# --- Listados de administración: proyección de columnas + conteo aproximado ---
+
+@lru_cache(maxsize=None)
+def _schema_fields(schema_cls):
+    """Campos que expone el schema (ya sin los `exclude`, p. ej. `password_hash`)."""
+    return tuple(schema_cls().fields.keys())
+
+
+def parse_fields(value, schema_cls):
+    """Convierte `?fields=a,b` en la tupla de columnas a seleccionar.
+
+    Solo se aceptan campos que el schema ya publica; `id` se incluye siempre
+    porque es la llave del cursor. Sin `fields` se devuelven todas las columnas.
+    """
+    allowed = _schema_fields(schema_cls)
+    if not value:
+        return allowed
+    requested = {f.strip() for f in str(value).split(",") if f.strip()}
+    fields = tuple(f for f in allowed if f in requested or f == "id")
+    return fields or allowed
+
+
+_count_cache = {}
+_count_lock = threading.Lock()
+
+
+def approximate_count(model):
+    """Número aproximado de filas de la tabla de `model`, cacheado `COUNT_CACHE_TTL` segundos.
+
+    En MySQL se lee `information_schema.tables.TABLE_ROWS` (estadística de InnoDB,
+    no recorre la tabla); en otros motores se usa `COUNT(*)`.
+    """
+    table = model.__tablename__
+    now = time.monotonic()
+    with _count_lock:
+        cached = _count_cache.get(table)
+        if cached and now - cached[1] < COUNT_CACHE_TTL:
+            return cached[0]
+
+    total = None
+    if db.engine.dialect.name == "mysql":
+        total = db.session.execute(text(
+            """
+            SELECT TABLE_ROWS
+            FROM information_schema.tables
+            WHERE table_schema = DATABASE()
+              AND table_name = :t
+            """
+        ), {"t": table}).scalar()
+    if total is None:
+        total = db.session.execute(select(func.count()).select_from(model)).scalar()
+    total = int(total or 0)
+
+    with _count_lock:
+        _count_cache[table] = (total, now)
+    return total
+
+
+def projected_page(model, schema_cls, args):
+    """Página de `model` con solo las columnas pedidas en `?fields=`.
+
+    Devuelve `(datos_serializados, next_cursor)`; el codificador columnar se
+    deriva del mismo schema (restringido con `only=`) y conserva el formato actual.
+    """
+    fields = parse_fields(args.get("fields"), schema_cls)
+    encoder = row_encoder(schema_cls, fields)
+    page = keyset_page(
+        encoder.select(),
+        model.id,
+        cursor=parse_cursor(args.get("cursor")),
+        limit=parse_page_size(args.get("limit"), ADMIN_PAGE_SIZE, ADMIN_MAX_PAGE_SIZE),
+        scalars=False,
+    )
+    return encoder.dump_rows(page.items), page.next_cursor
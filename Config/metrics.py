@@ -0,0 +1,403 @@
+"""Métricas por request en formato de texto de Prometheus (`GET /metrics`).
+
+Se mide en un middleware WSGI (así entran también las respuestas en streaming,
+que terminan después de `after_request`), etiquetado por `endpoint` y
+`blueprint`:
+
+- `http_requests_total` y `http_request_duration_seconds` (histograma);
+- `http_response_size_bytes` (histograma, bytes realmente enviados);
+- `db_statements_total` / `db_time_seconds_total` y el histograma
+  `http_request_db_statements`, con los eventos `before/after_cursor_execute`
+  de SQLAlchemy (lo que corre fuera de un request, p. ej. la cola de
+  adopciones, se cuenta como `endpoint="(background)"`);
+- `template_render_seconds` por plantilla (señales de Flask).
+
+Cada proceso acumula en memoria (con lock) y un hilo vuelca una instantánea a
+`METRICS_DIR/<pid>.json` cada `METRICS_FLUSH_INTERVAL` segundos. `/metrics`
+suma las instantáneas de todos los workers; gunicorn limpia el directorio al
+arrancar y, cuando un worker termina, funde su archivo en `archive.json` para
+que los contadores no retrocedan (ver gunicorn.conf.py).
+
+`METRICS_ENABLED=0` lo desactiva. El endpoint está cerrado por defecto (404):
+se abre con `METRICS_TOKEN` (exige `Authorization: Bearer <token>`, 401 si
+falta) y/o con `METRICS_ALLOWED_IPS`, direcciones o redes separadas por comas
+(p. ej. `127.0.0.1,10.0.0.0/8`) desde las que el scraper entra sin token. Se
+compara `request.remote_addr`: detrás de un proxy, la IP del proxy.
+"""
+
+import glob
+import ipaddress
+import json
+import os
+import tempfile
+import threading
+import time
+
+from flask import Response, current_app, request, request_started
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "adoptme_metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "2"))
+ARCHIVE = "archive.json"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# nombre -> (tipo, ayuda, buckets)
+METRICS = {
+    "http_requests_total": ("counter", "Requests HTTP atendidos.", None),
+    "http_request_duration_seconds": ("histogram", "Duración del request hasta enviar el último byte.", LATENCY_BUCKETS),
+    "http_response_size_bytes": ("histogram", "Bytes del cuerpo de la respuesta.", SIZE_BUCKETS),
+    "http_request_db_statements": ("histogram", "Sentencias SQL por request.", STATEMENT_BUCKETS),
+    "db_statements_total": ("counter", "Sentencias SQL ejecutadas.", None),
+    "db_time_seconds_total": ("counter", "Tiempo total en sentencias SQL.", None),
+    "template_render_seconds": ("histogram", "Tiempo de render de plantillas Jinja.", LATENCY_BUCKETS),
+}
+
+
+class Registry:
+    """Contadores e histogramas del proceso: `{(nombre, etiquetas): valor}`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}  # clave -> [conteos por bucket..., +Inf], suma
+        self.version = 0
+
+    def inc(self, name, labels, value=1.0):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+            self.version += 1
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, labels)
+        with self._lock:
+            entry = self._histograms.get(key)
+            if entry is None:
+                entry = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+            counts = entry[0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            entry[1] += value
+            self.version += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), list(counts), total] for (name, labels), (counts, total) in self._histograms.items()],
+            }
+
+
+registry = Registry()
+
+
+# --- agregación entre procesos ---
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def merge(snapshots):
+    counters, histograms = {}, {}
+    for snap in snapshots:
+        if not snap:
+            continue
+        for name, labels, value in snap.get("counters", ()):
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0.0) + value
+        for name, labels, counts, total in snap.get("histograms", ()):
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                prev = histograms[key]
+                histograms[key] = ([a + b for a, b in zip(prev[0], counts)], prev[1] + total)
+            else:
+                histograms[key] = (list(counts), total)
+    return {
+        "counters": [[name, [list(l) for l in labels], value] for (name, labels), value in counters.items()],
+        "histograms": [[name, [list(l) for l in labels], counts, total] for (name, labels), (counts, total) in histograms.items()],
+    }
+
+
+def flush(directory=None):
+    """Vuelca la instantánea de este proceso a `<dir>/<pid>.json`."""
+    directory = directory or METRICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    _write_json(os.path.join(directory, f"{os.getpid()}.json"), registry.snapshot())
+
+
+def archive(pid, directory=None):
+    """Funde el archivo de un worker terminado en `archive.json` (hook `child_exit` de gunicorn)."""
+    directory = directory or METRICS_DIR
+    path = os.path.join(directory, f"{pid}.json")
+    snap = _read_json(path)
+    if snap is None:
+        return
+    archive_path = os.path.join(directory, ARCHIVE)
+    _write_json(archive_path, merge([_read_json(archive_path), snap]))
+    os.remove(path)
+
+
+def reset(directory=None):
+    """Borra las instantáneas (al arrancar el servidor: los pids de otra ejecución no cuentan)."""
+    directory = directory or METRICS_DIR
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def collect(directory=None):
+    directory = directory or METRICS_DIR
+    flush(directory)
+    return merge(_read_json(path) for path in glob.glob(os.path.join(directory, "*.json")))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render(snapshot):
+    """Formato de exposición de texto de Prometheus (0.0.4)."""
+    by_name = {}
+    for name, labels, value in snapshot["counters"]:
+        by_name.setdefault(name, []).append(("c", labels, value))
+    for name, labels, counts, total in snapshot["histograms"]:
+        by_name.setdefault(name, []).append(("h", labels, (counts, total)))
+    lines = []
+    for name in sorted(by_name):
+        kind, help_text, buckets = METRICS.get(name, ("untyped", "", None))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for typ, labels, value in sorted(by_name[name], key=lambda item: item[1]):
+            labels = [tuple(pair) for pair in labels]
+            if typ == "c":
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip([*buckets, "+Inf"], counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels([*labels, ('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+# --- medición ---
+
+_current = threading.local()  # estadísticas del request que atiende este hilo
+
+
+class RequestStats:
+    __slots__ = ("start", "status", "size", "statements", "db_time", "endpoint", "blueprint")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.status = "500"
+        self.size = 0
+        self.statements = 0
+        self.db_time = 0.0
+        self.endpoint = "(unmatched)"
+        self.blueprint = ""
+
+
+def _labels_for(stats):
+    return (("endpoint", stats.endpoint), ("blueprint", stats.blueprint))
+
+
+def _finish(stats, method):
+    labels = _labels_for(stats)
+    registry.inc("http_requests_total", (("method", method), *labels, ("status", stats.status)))
+    registry.observe("http_request_duration_seconds", labels, time.perf_counter() - stats.start)
+    registry.observe("http_response_size_bytes", labels, stats.size)
+    registry.observe("http_request_db_statements", labels, stats.statements)
+    if _current.__dict__.get("stats") is stats:
+        _current.stats = None
+
+
+class _ClosingIterator:
+    """Cuenta los bytes de la respuesta y cierra la medición cuando el servidor llama `close()`."""
+
+    def __init__(self, iterable, stats, method):
+        self._iterable = iterable
+        self._stats = stats
+        self._method = method
+
+    def __iter__(self):
+        _current.stats = self._stats  # la generación en streaming corre en el hilo que itera
+        self._stats.size = 0
+        for chunk in self._iterable:
+            self._stats.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self._iterable, "close"):
+                self._iterable.close()
+        finally:
+            _finish(self._stats, self._method)
+
+
+class MetricsMiddleware:
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        stats = RequestStats()
+        _current.stats = stats
+        environ["adoptme.metrics"] = stats
+        method = environ.get("REQUEST_METHOD", "GET")
+
+        def _start_response(status, headers, exc_info=None):
+            stats.status = status.split(" ", 1)[0]
+            stats.size = next((int(v) for k, v in headers if k.lower() == "content-length" and v.isdigit()), 0)
+            return start_response(status, headers, exc_info)
+
+        try:
+            result = self.wsgi_app(environ, _start_response)
+        except BaseException:
+            _finish(stats, method)
+            raise
+        file_wrapper = environ.get("wsgi.file_wrapper")
+        if isinstance(file_wrapper, type) and isinstance(result, file_wrapper):
+            # sendfile del servidor: no envolver; el tamaño queda el de Content-Length
+            _finish(stats, method)
+            return result
+        return _ClosingIterator(result, stats, method)
+
+
+def _on_request_started(sender, **extra):
+    stats = request.environ.get("adoptme.metrics")
+    if stats is not None:
+        stats.endpoint = request.endpoint or "(unmatched)"
+        stats.blueprint = request.blueprint or ""
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = getattr(_current, "stats", None)
+    if stats is not None:
+        stats.statements += 1
+        stats.db_time += elapsed
+        labels = _labels_for(stats)
+    else:
+        labels = (("endpoint", "(background)"), ("blueprint", ""))
+    registry.inc("db_statements_total", labels)
+    registry.inc("db_time_seconds_total", labels, elapsed)
+
+
+def _on_before_render(sender, template, context, **extra):
+    _current.__dict__.setdefault("templates", []).append(time.perf_counter())
+
+
+def _on_rendered(sender, template, context, **extra):
+    starts = _current.__dict__.get("templates")
+    if starts:
+        registry.observe("template_render_seconds", (("template", template.name or "(string)"),), time.perf_counter() - starts.pop())
+
+
+# --- volcado periódico ---
+
+_flusher = None
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _run_flusher():
+    written = -1
+    while True:
+        time.sleep(METRICS_FLUSH_INTERVAL)
+        if registry.version != written:
+            written = registry.version
+            try:
+                flush()
+            except OSError:
+                pass
+
+
+def ensure_flusher():
+    """Un hilo de volcado por proceso (tras el fork de gunicorn cada worker arranca el suyo)."""
+    global _flusher, _flusher_pid
+    if _flusher is not None and _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher is None or _flusher_pid != os.getpid():
+            _flusher_pid = os.getpid()
+            _flusher = threading.Thread(target=_run_flusher, name="metrics-flusher", daemon=True)
+            _flusher.start()
+
+
+def parse_networks(value):
+    """`"127.0.0.1,10.0.0.0/8"` -> tupla de redes (una IP suelta es una red /32 o /128)."""
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in (value or "").split(",") if item.strip())
+
+
+def _allowed_address(networks):
+    try:
+        address = ipaddress.ip_address(request.remote_addr or "")
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def metrics_view():
+    token = current_app.config["METRICS_TOKEN"]
+    authorized = bool(token) and request.headers.get("Authorization") == f"Bearer {token}"
+    if not authorized and not _allowed_address(current_app.config["METRICS_ALLOWED_IPS"]):
+        if token:
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+        return Response("not found\n", status=404, mimetype="text/plain")  # cerrado por defecto
+    return Response(render(collect()), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+
+def init_app(app):
+    app.config.setdefault("METRICS_ENABLED", os.getenv("METRICS_ENABLED", "1") == "1")
+    app.config.setdefault("METRICS_TOKEN", os.getenv("METRICS_TOKEN"))
+    app.config.setdefault("METRICS_ALLOWED_IPS", parse_networks(os.getenv("METRICS_ALLOWED_IPS")))
+    if not app.config["METRICS_ENABLED"]:
+        return
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app)
+    request_started.connect(_on_request_started, app)
+    before_render_template.connect(_on_before_render, app)
+    template_rendered.connect(_on_rendered, app)
+    app.before_request(ensure_flusher)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
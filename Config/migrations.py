@@ -0,0 +1,164 @@
+"""Migraciones de esquema versionadas.
+
+Los scripts viven en `migrations/NNNN_descripcion.py` (raíz del repo) y cada uno
+define `upgrade(conn)`. Se aplican en orden, cada uno en su propia transacción,
+y quedan registrados en la tabla `schema_version`.
+
+Aplicarlas (una sola vez por despliegue, no en cada worker):
+
+    flask --app app migrate upgrade
+    flask --app app migrate status
+
+Al arrancar, la app solo lee la versión actual (`check_schema`) y avisa en el
+log si hay migraciones pendientes; ya no ejecuta `db.create_all()` ni consultas
+a `information_schema` en cada proceso.
+"""
+
+import importlib.util
+import logging
+import os
+import re
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+
+from Config.db import PROJECT_ROOT, db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(PROJECT_ROOT, "migrations")
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def discover():
+    """Lista ordenada de `(version, nombre, ruta)` de los scripts de migración."""
+    found = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = _FILENAME.match(filename)
+        if match:
+            found.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(found)
+
+
+def latest_version():
+    migrations = discover()
+    return migrations[-1][0] if migrations else 0
+
+
+def current_version(conn):
+    """Versión aplicada en la BD (0 si nunca se migró)."""
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def _load(version, name, path):
+    spec = importlib.util.spec_from_file_location(f"migration_{version:04d}_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def upgrade(target=None):
+    """Aplica las migraciones pendientes hasta `target` (todas por defecto).
+
+    Devuelve la lista de `(version, nombre)` aplicadas.
+    """
+    engine = db.engine
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+
+    applied = []
+    for version, name, path in discover():
+        if target is not None and version > target:
+            break
+        with engine.begin() as conn:
+            if version <= current_version(conn):
+                continue
+            logger.info("migrate: aplicando %04d_%s", version, name)
+            _load(version, name, path).upgrade(conn)
+            conn.execute(schema_version.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+        applied.append((version, name))
+    return applied
+
+
+def check_schema(app):
+    """Lectura única de la versión al arrancar; no ejecuta DDL."""
+    try:
+        with app.app_context(), db.engine.connect() as conn:
+            current = current_version(conn)
+    except Exception as exc:
+        app.logger.warning("No se pudo leer schema_version: %s", exc)
+        return None
+    latest = latest_version()
+    if current < latest:
+        app.logger.warning(
+            "Esquema en versión %s, última disponible %s: ejecutar `flask --app app migrate upgrade`",
+            current, latest,
+        )
+    return current
+
+
+# --- Ayudantes idempotentes para los scripts de migración ---
+
+def has_table(conn, table):
+    return inspect(conn).has_table(table)
+
+
+def has_column(conn, table, column):
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def has_index(conn, table, index):
+    return index in {i["name"] for i in inspect(conn).get_indexes(table)}
+
+
+def add_column(conn, table, column, ddl):
+    """`ALTER TABLE ... ADD COLUMN` solo si la columna no existe."""
+    if not has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def create_index(conn, table, index, columns, unique=False):
+    """`CREATE INDEX` solo si no existe un índice con ese nombre."""
+    if not has_index(conn, table, index):
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        conn.execute(text(f"CREATE {kind} {index} ON {table}({', '.join(columns)})"))
+
+
+def create_tables(conn, *tables):
+    """Crea las tablas de los modelos indicados si aún no existen."""
+    db.metadata.create_all(bind=conn, tables=[t.__table__ if hasattr(t, "__table__") else t for t in tables])
+
+
+# Grupo de comandos `flask migrate ...` (AppGroup ejecuta cada comando dentro del app context)
+migrate_cli = AppGroup("migrate", help="Migraciones de esquema versionadas.")
+
+
+@migrate_cli.command("upgrade")
+@click.option("--target", type=int, default=None, help="Versión máxima a aplicar.")
+def upgrade_command(target):
+    applied = upgrade(target)
+    for version, name in applied:
+        click.echo(f"aplicada {version:04d}_{name}")
+    with db.engine.connect() as conn:
+        click.echo(f"esquema en versión {current_version(conn)}")
+
+
+@migrate_cli.command("status")
+def status_command():
+    with db.engine.connect() as conn:
+        current = current_version(conn)
+    for version, name, _path in discover():
+        mark = "x" if version <= current else " "
+        click.echo(f"[{mark}] {version:04d}_{name}")
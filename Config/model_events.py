@@ -0,0 +1,92 @@
+"""Notificaciones de cambios confirmados (commit) por modelo.
+
+Las cachés e índices en memoria (versión del catálogo, búsqueda, facetas...)
+necesitan enterarse de lo que cambió, pero solo cuando el commit se confirma.
+Aquí se escuchan los eventos de sesión de SQLAlchemy:
+
+- `after_flush`: se toma una instantánea de las filas nuevas/modificadas/eliminadas
+  de los modelos registrados (sin consultar la BD: solo lo ya cargado en memoria).
+- `after_commit`: se entregan los cambios acumulados a cada callback.
+- `after_rollback`: se descartan.
+
+Los callbacks reciben `(upserts, deleted)`: `upserts` es `{id: {columna: valor}}`
+(parcial en actualizaciones: solo columnas cargadas) y `deleted` un `set` de ids.
+Las sentencias masivas de Core no pasan por el flush; quien las ejecute debe
+llamar a `record()` antes del commit.
+"""
+
+import logging
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_callbacks = {}  # modelo -> [callback, ...]
+_INFO_KEY = "model_events.changes"
+
+
+def on_commit(model, callback):
+    """Registra `callback(upserts, deleted)` para los commits que tocan `model`."""
+    _callbacks.setdefault(model, []).append(callback)
+
+
+def _changes(session, model):
+    pending = session.info.setdefault(_INFO_KEY, {})
+    return pending.setdefault(model, ({}, set()))
+
+
+def record(session, model, upserts=None, deleted=()):
+    """Anota cambios hechos con sentencias masivas (INSERT/UPDATE/DELETE de Core)."""
+    if model not in _callbacks:
+        return
+    ups, dels = _changes(session, model)
+    for pk, values in (upserts or {}).items():
+        ups.setdefault(pk, {}).update(values)
+        dels.discard(pk)
+    for pk in deleted:
+        ups.pop(pk, None)
+        dels.add(pk)
+
+
+def _snapshot(obj):
+    state = inspect(obj)
+    loaded = state.dict
+    return {attr.key: loaded[attr.key] for attr in state.mapper.column_attrs if attr.key in loaded}
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    if not _callbacks:
+        return
+    for obj in list(session.new) + list(session.dirty):
+        if type(obj) in _callbacks:
+            values = _snapshot(obj)
+            if values.get("id") is not None:
+                record(session, type(obj), upserts={values["id"]: values})
+    for obj in session.deleted:
+        if type(obj) in _callbacks:
+            pk = inspect(obj).identity
+            if pk:
+                record(session, type(obj), deleted=[pk[0]])
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    pending = session.info.pop(_INFO_KEY, None)
+    if not pending:
+        return
+    for model, (upserts, deleted) in pending.items():
+        if not upserts and not deleted:
+            continue
+        for callback in _callbacks.get(model, ()):
+            try:
+                callback(upserts, deleted)
+            except Exception:
+                # una caché que falla no debe tumbar el request que ya hizo commit
+                logger.exception("model_events: callback %r falló", callback)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_INFO_KEY, None)
@@ -0,0 +1,159 @@
+"""Caché de páginas completas para rutas de contenido estático.
+
+Las páginas informativas (`/`, `/michi`, `/rocky`, `/cachorro`, `/fundaciones`,
+`/funcuan`) solo cambian según si hay sesión iniciada o no. La respuesta
+renderizada se guarda por ruta + variante de autenticación y se sirve con un
+ETag fuerte; si el navegador envía `If-None-Match` con ese ETag se responde 304
+sin cuerpo.
+
+Backends:
+- `memory` (por defecto): LRU en memoria del proceso.
+- `file`: archivos en `PAGE_CACHE_DIR`, compartidos entre workers de la misma máquina.
+- `none`: desactiva la caché.
+
+En modo debug la llave incluye la última modificación de las plantillas, así
+un cambio en Config/Templates se ve en el siguiente request.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from functools import wraps
+
+from flask import make_response, request, session
+
+from Config.cache import MISSING, TTLCache
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=256, ttl=300):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        value = self._cache.get(key)
+        return None if value is MISSING else value
+
+    def set(self, key, entry):
+        self._cache.set(key, entry)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class FileBackend:
+    """Un archivo por llave: una línea JSON con metadatos seguida del cuerpo."""
+
+    def __init__(self, directory, ttl=300):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if self.ttl and time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "rb") as fh:
+                meta = json.loads(fh.readline())
+                body = fh.read()
+        except (OSError, ValueError):
+            return None
+        return {"body": body, "etag": meta["etag"], "mimetype": meta["mimetype"]}
+
+    def set(self, key, entry):
+        meta = json.dumps({"etag": entry["etag"], "mimetype": entry["mimetype"]}).encode("utf-8")
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(meta + b"\n" + entry["body"])
+        os.replace(tmp, self._path(key))
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class PageCache:
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PAGE_CACHE_BACKEND", os.getenv("PAGE_CACHE_BACKEND", "memory"))
+        app.config.setdefault("PAGE_CACHE_TTL", int(os.getenv("PAGE_CACHE_TTL", "300")))
+        app.config.setdefault("PAGE_CACHE_SIZE", int(os.getenv("PAGE_CACHE_SIZE", "256")))
+        app.config.setdefault(
+            "PAGE_CACHE_DIR",
+            os.getenv("PAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "adoptme_page_cache")),
+        )
+
+        kind = app.config["PAGE_CACHE_BACKEND"]
+        if kind == "file":
+            self.backend = FileBackend(app.config["PAGE_CACHE_DIR"], ttl=app.config["PAGE_CACHE_TTL"])
+        elif kind == "memory":
+            self.backend = MemoryBackend(maxsize=app.config["PAGE_CACHE_SIZE"], ttl=app.config["PAGE_CACHE_TTL"])
+        else:
+            self.backend = None
+        self.app = app
+
+    def _templates_version(self):
+        """Marca de la última modificación de plantillas (solo se calcula en debug)."""
+        app = self.app
+        if not (app.debug or app.config.get("TEMPLATES_AUTO_RELOAD")):
+            return ""
+        latest = 0
+        for root, _dirs, files in os.walk(app.template_folder):
+            for name in files:
+                try:
+                    latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+                except OSError:
+                    pass
+        return str(latest)
+
+    def _key(self):
+        variant = "auth" if session.get("user_id") else "anon"
+        return f"{request.endpoint}|{request.path}|{variant}|{self._templates_version()}"
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def cached(self, view):
+        """Decorador para vistas GET cuyo HTML solo depende de la variante de sesión."""
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if self.backend is None or request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+
+            key = self._key()
+            entry = self.backend.get(key)
+            if entry is None:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200 or resp.direct_passthrough:
+                    return resp
+                body = resp.get_data()
+                entry = {
+                    "body": body,
+                    "etag": hashlib.sha256(body).hexdigest()[:32],
+                    "mimetype": resp.mimetype,
+                }
+                self.backend.set(key, entry)
+
+            resp = self.app.response_class(entry["body"], mimetype=entry["mimetype"])
+            resp.set_etag(entry["etag"])
+            # La página varía con la cookie de sesión: solo cachés privadas y siempre revalidando
+            resp.headers["Cache-Control"] = "private, no-cache"
+            resp.vary.add("Cookie")
+            return resp.make_conditional(request)
+
+        return wrapper
@@ -0,0 +1,84 @@
+"""Servicio de hashing de contraseñas.
+
+- El KDF (scrypt/pbkdf2 de werkzeug) corre en un pool de hilos acotado
+  (`PASSWORD_HASH_WORKERS`, por defecto un hilo por CPU). Así una ráfaga de
+  logins o registros no pone a todos los hilos del worker a calcular hashes a
+  la vez: el resto de requests sigue atendiéndose y, si la cola
+  (`PASSWORD_HASH_QUEUE`) está llena más de `PASSWORD_HASH_TIMEOUT` segundos,
+  se responde 503 en vez de acumular espera.
+- `PASSWORD_HASH_METHOD` define algoritmo y costo (formato de werkzeug, p. ej.
+  `scrypt:32768:8:1` o `pbkdf2:sha256:600000`).
+- `verify_password(None, ...)` compara contra un hash señuelo con los mismos
+  parámetros: un usuario inexistente tarda lo mismo que una contraseña errónea.
+- `needs_rehash()` detecta hashes guardados con otros parámetros; el login
+  (Config.identity.authenticate) los regenera tras una verificación correcta.
+
+`PASSWORD_HASH_WORKERS=0` ejecuta el KDF en el hilo del request (como antes).
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", "16"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", str(max(PASSWORD_HASH_WORKERS, 1) * 8)))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE)
+_dummy_hash = None
+
+
+class HashingBusy(ServiceUnavailable):
+    description = "Demasiadas solicitudes de inicio de sesión; intenta de nuevo en unos segundos."
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="kdf")
+        return _executor
+
+
+def _run(fn, *args):
+    if PASSWORD_HASH_WORKERS <= 0:
+        return fn(*args)
+    if not _slots.acquire(timeout=PASSWORD_HASH_TIMEOUT):
+        raise HashingBusy(retry_after=5)
+    try:
+        return _get_executor().submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH)
+
+
+def _dummy():
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = generate_password_hash(os.urandom(16).hex(), PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH)
+    return _dummy_hash
+
+
+def verify_password(stored_hash, password):
+    """Compara en tiempo constante; sin hash guardado verifica contra el señuelo y devuelve False."""
+    if not stored_hash:
+        _run(check_password_hash, _dummy(), password or "")
+        return False
+    return _run(check_password_hash, stored_hash, password or "")
+
+
+def needs_rehash(stored_hash):
+    """True si el hash se generó con otro algoritmo/costo que `PASSWORD_HASH_METHOD`."""
+    if not stored_hash or "$" not in stored_hash:
+        return False
+    return stored_hash.split("$", 1)[0] != _dummy().split("$", 1)[0]
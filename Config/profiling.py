@@ -0,0 +1,211 @@
+"""Perfilado por muestreo de requests en vivo, en formato flamegraph (stacks plegados).
+
+Un request se perfila si:
+
+- un admin lo pide con la cabecera `X-Profile: 1` o con `?_profile=1`, o
+- cae en la muestra aleatoria `PROFILE_SAMPLE_RATE` (0.0 a 1.0; 0 por defecto).
+
+Mientras dura, un único hilo muestreador por proceso toma cada
+`PROFILE_INTERVAL_MS` la pila del hilo que atiende el request
+(`sys._current_frames()`), desde `Flask.wsgi_app` hacia adentro: vista,
+render de Jinja (las plantillas aparecen como `template:<nombre>:<bloque>`) y
+SQLAlchemy/driver. Al terminar se escribe `PROFILE_DIR/<id>.folded`, una línea
+`marco;marco;... <muestras>` por pila, que abren `flamegraph.pl`, speedscope o
+`inferno-flamegraph`. El directorio es un buffer circular: se conservan los
+últimos `PROFILE_MAX_FILES` archivos. La respuesta lleva `X-Profile-Id`.
+
+Sin disparo el costo por request es leer una cabecera y un argumento;
+`PROFILER_ENABLED=0` no registra ningún hook.
+"""
+
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from flask import current_app, g, request, request_started, session
+
+_SAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+_ROOT_FUNCTION = "wsgi_app"  # Flask.wsgi_app: lo de más arriba es el servidor
+
+
+def _label(frame):
+    module = frame.f_globals.get("__name__")
+    if module is None and "environment" in frame.f_globals:
+        # código compilado por Jinja: `name` es la plantilla, co_name es root/block_*/macro
+        return f"template:{frame.f_globals.get('name') or '<string>'}:{frame.f_code.co_name}"
+    return f"{module or '?'}:{frame.f_code.co_name}"
+
+
+def fold(frame):
+    """Pila de `frame` (de afuera hacia adentro) como `a;b;c`, recortada en `Flask.wsgi_app`."""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame))
+        if frame.f_code.co_name == _ROOT_FUNCTION and frame.f_globals.get("__name__") == "flask.app":
+            break
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class Sampler:
+    """Un hilo por proceso que muestrea las pilas de los hilos registrados."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._targets = {}  # thread id -> Counter de pilas plegadas
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self, thread_id):
+        stacks = Counter()
+        with self._lock:
+            self._targets[thread_id] = stacks
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return stacks
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._targets.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._wake.clear()
+                targets = dict(self._targets)
+            if not targets:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in targets.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[fold(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+class RequestProfiler:
+    def __init__(self, app=None):
+        self.sampler = None
+        self.directory = None
+        self.max_files = 200
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PROFILER_ENABLED", os.getenv("PROFILER_ENABLED", "1") == "1")
+        app.config.setdefault("PROFILE_SAMPLE_RATE", float(os.getenv("PROFILE_SAMPLE_RATE", "0")))
+        app.config.setdefault("PROFILE_INTERVAL_MS", float(os.getenv("PROFILE_INTERVAL_MS", "5")))
+        app.config.setdefault("PROFILE_MAX_FILES", int(os.getenv("PROFILE_MAX_FILES", "200")))
+        app.config.setdefault(
+            "PROFILE_DIR", os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "adoptme_profiles"))
+        )
+        app.extensions["request_profiler"] = self
+        if not app.config["PROFILER_ENABLED"]:
+            return
+        self.directory = app.config["PROFILE_DIR"]
+        self.max_files = app.config["PROFILE_MAX_FILES"]
+        self.sampler = Sampler(app.config["PROFILE_INTERVAL_MS"] / 1000)
+        request_started.connect(self._start, app)
+        app.after_request(self._add_header)
+        app.teardown_request(self._finish)
+
+    # --- disparo ---
+
+    def _wanted(self, app):
+        asked = request.headers.get("X-Profile") == "1" or request.args.get("_profile") == "1"
+        if asked and session.get("is_admin"):
+            return "admin"
+        rate = app.config["PROFILE_SAMPLE_RATE"]
+        if rate and random.random() < rate:
+            return "sample"
+        return None
+
+    def _start(self, sender, **extra):
+        reason = self._wanted(sender)
+        if reason is None:
+            return
+        endpoint = request.endpoint or "unmatched"
+        g.profile = {
+            "id": f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{os.getpid()}-{_SAFE.sub('_', endpoint)}-{reason}",
+            "thread": threading.get_ident(),
+            "start": time.perf_counter(),
+            "stacks": self.sampler.start(threading.get_ident()),
+        }
+
+    def _add_header(self, response):
+        profile = g.get("profile")
+        if profile is not None:
+            response.headers["X-Profile-Id"] = profile["id"]
+        return response
+
+    def _finish(self, exc):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return
+        stacks = self.sampler.stop(profile["thread"])
+        elapsed_ms = (time.perf_counter() - profile["start"]) * 1000
+        try:
+            self.write(profile["id"], stacks)
+        except OSError:
+            current_app.logger.warning("profiling: no se pudo escribir %s", profile["id"], exc_info=True)
+            return
+        current_app.logger.info("profiling: %s (%.1f ms, %s muestras)", profile["id"], elapsed_ms, sum(stacks.values()))
+
+    # --- buffer circular en disco ---
+
+    def write(self, profile_id, stacks):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{profile_id}.folded")
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            for stack, count in stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+        self.trim()
+        return path
+
+    def trim(self):
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".folded"))
+        for name in names[: max(0, len(names) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def list(self):
+        """Perfiles guardados, del más reciente al más antiguo."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        items = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith(".folded"):
+                st = os.stat(os.path.join(self.directory, name))
+                items.append({"id": name[: -len(".folded")], "size": st.st_size, "mtime": int(st.st_mtime)})
+        return items
+
+    def path_for(self, profile_id):
+        if not self.directory or _SAFE.sub("_", profile_id) != profile_id:
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.folded")
+        return path if os.path.isfile(path) else None
+
+
+request_profiler = RequestProfiler()
+
+
+def init_app(app):
+    request_profiler.init_app(app)
@@ -0,0 +1,287 @@
+"""Búsqueda de texto completo en memoria sobre mascotas y postulaciones.
+
+Índice invertido por proceso con:
+
+- tokenización en español sin acentos (`Ñandú` -> `nandu`) y sin palabras vacías;
+- coincidencia por prefijo (`cach` encuentra `cachorro`), con algo menos de peso
+  que la coincidencia exacta;
+- ranking BM25 con peso por campo (el nombre pesa más que la descripción).
+
+Campos indexados: `Mascota.nombre/descripcion/autor` y
+`PostularMascotas.especie/raza/color/ubicacion`.
+
+El índice se carga completo en la primera búsqueda y después se mantiene con
+los hooks de commit (Config.model_events): cada alta/edición/baja confirmada
+actualiza solo los documentos afectados. Los commits de otros workers se
+detectan por la marca compartida de `catalog_version`/`postulaciones_version`
+y se incorporan como delta: bajas desde el log compartido de borrados y filas
+con `updated_at` reciente (`changed_since`), sin recorrer ni reconstruir nada.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from functools import partial
+from typing import NamedTuple
+
+from sqlalchemy import select
+
+from Config import model_events
+from Config.catalog_cache import catalog_version, changed_since, postulaciones_version
+from Config.db import db, use_replica
+from Models.mascotas import Mascota
+from Models.postular_mascotas import PostularMascotas
+
+# Parámetros BM25
+K1 = 1.2
+B = 0.75
+PREFIX_WEIGHT = 0.8  # una coincidencia por prefijo vale algo menos que la exacta
+MAX_PREFIX_EXPANSIONS = 64
+MIN_PREFIX_LENGTH = 2
+
+STOPWORDS = frozenset(
+    "a al con de del el en es esta este la las le lo los mas muy no o para pero por que se si sin "
+    "su sus un una uno unos unas y ya".split()
+)
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class Source(NamedTuple):
+    model: type
+    weights: dict  # campo -> peso
+    display: tuple  # campos devueltos en los resultados
+    version: object  # CatalogVersion con la marca compartida entre workers
+
+
+SOURCES = {
+    "mascota": Source(
+        Mascota,
+        {"nombre": 3.0, "autor": 1.5, "descripcion": 1.0},
+        ("nombre", "descripcion", "autor", "imagen", "is_adopted"),
+        catalog_version,
+    ),
+    "postulacion": Source(
+        PostularMascotas,
+        {"especie": 2.0, "raza": 2.0, "color": 1.0, "ubicacion": 1.0},
+        ("nombre", "especie", "raza", "color", "ubicacion", "imagen"),
+        postulaciones_version,
+    ),
+}
+
+
+def normalize(text):
+    """Minúsculas y sin diacríticos."""
+    decomposed = unicodedata.normalize("NFKD", str(text).lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [tok for tok in _TOKEN.findall(normalize(text)) if tok not in STOPWORDS]
+
+
+class SearchIndex:
+    def __init__(self, sources=SOURCES):
+        self.sources = sources
+        self._lock = threading.RLock()
+        self._postings = {}  # término -> {doc: tf ponderada}
+        self._vocab = []  # términos ordenados, para buscar por prefijo
+        self._docs = {}  # doc -> (largo, {término: tf})
+        self._fields = {}  # doc -> {campo: valor} (indexados + display + updated_at)
+        self._total_length = 0.0
+        self._stale = set()  # docs con cambios parciales por completar desde la BD
+        self._synced = {}  # tipo -> marca compartida ya incorporada
+        self._watermark = {}  # tipo -> mayor updated_at leído de la BD
+        self._deleted_at = {}  # tipo -> posición en el log compartido de borrados
+        self._loaded = False
+
+    # --- mantenimiento ---
+
+    def _columns(self, kind):
+        source = self.sources[kind]
+        names = ["id", "updated_at", *source.weights, *source.display]
+        return [getattr(source.model, name) for name in dict.fromkeys(names)]
+
+    def _index_doc(self, doc, fields):
+        weights = self.sources[doc[0]].weights
+        terms = Counter()
+        for field, weight in weights.items():
+            for token in tokenize(fields.get(field)):
+                terms[token] += weight
+        self._remove_doc(doc)
+        length = sum(terms.values())
+        self._docs[doc] = (length, terms)
+        self._fields[doc] = fields
+        self._total_length += length
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._vocab, term)
+            postings[doc] = tf
+
+    def _remove_doc(self, doc):
+        entry = self._docs.pop(doc, None)
+        self._fields.pop(doc, None)
+        if entry is None:
+            return
+        length, terms = entry
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc, None)
+            if not postings:
+                del self._postings[term]
+                del self._vocab[bisect.bisect_left(self._vocab, term)]
+
+    def _load(self, kind, ids):
+        """Indexa las filas `ids` de `kind` leyendo del primario."""
+        stmt = select(*self._columns(kind)).where(self.sources[kind].model.id.in_(ids))
+        with use_replica(False):
+            rows = db.session.execute(stmt).mappings().all()
+        for row in rows:
+            self._index_doc((kind, row["id"]), dict(row))
+        return {row["id"] for row in rows}
+
+    def apply(self, kind, upserts, deleted):
+        """Callback de commit: aplica los cambios confirmados de un modelo."""
+        needed = set(self.sources[kind].weights) | set(self.sources[kind].display)
+        with self._lock:
+            if self._loaded:
+                for pk in deleted:
+                    self._remove_doc((kind, pk))
+                    self._stale.discard((kind, pk))
+                for pk, values in upserts.items():
+                    doc = (kind, pk)
+                    fields = {**self._fields.get(doc, {}), **values}
+                    if needed <= fields.keys():
+                        self._index_doc(doc, {k: fields[k] for k in needed | {"id", "updated_at"} if k in fields})
+                        self._stale.discard(doc)
+                    else:
+                        self._stale.add(doc)  # edición parcial de un doc sin campos en memoria
+            # el bump de la versión corre antes que este callback; la marca solo avanza
+            # si no quedaron commits ajenos anteriores sin incorporar
+            self._synced[kind] = self.sources[kind].version.advance(self._synced.get(kind))
+
+    def _catch_up(self, kind):
+        """Incorpora lo que otros workers confirmaron: bajas del log y filas con `updated_at` reciente."""
+        source = self.sources[kind]
+        marker = source.version.shared()
+        deleted, self._deleted_at[kind] = source.version.deleted_since(self._deleted_at.get(kind, 0))
+        for pk in deleted:
+            self._remove_doc((kind, pk))
+            self._stale.discard((kind, pk))
+        rows, self._watermark[kind] = changed_since(source.model, self._columns(kind), self._watermark.get(kind))
+        for row in rows:
+            self._index_doc((kind, row["id"]), dict(row))
+        self._synced[kind] = marker
+
+    def ensure_fresh(self):
+        with self._lock:
+            if not self._loaded:
+                for kind, source in self.sources.items():
+                    # carga completa: sin marca de updated_at y con el log de borrados desde su final
+                    self._deleted_at[kind] = source.version.deleted_offset()
+                    self._watermark.pop(kind, None)
+                    self._catch_up(kind)
+                self._loaded = True
+                return
+            for kind, source in self.sources.items():
+                if source.version.shared() != self._synced.get(kind):
+                    self._catch_up(kind)
+            if self._stale:
+                by_kind = {}
+                for kind, pk in self._stale:
+                    by_kind.setdefault(kind, []).append(pk)
+                for kind, ids in by_kind.items():
+                    found = self._load(kind, ids)
+                    for pk in set(ids) - found:
+                        self._remove_doc((kind, pk))
+                self._stale.clear()
+
+    # --- consulta ---
+
+    def _expand(self, token):
+        """Términos del vocabulario que coinciden con `token`: `(término, factor)`."""
+        matches = []
+        if token in self._postings:
+            matches.append((token, 1.0))
+        if len(token) >= MIN_PREFIX_LENGTH:
+            i = bisect.bisect_right(self._vocab, token)
+            while i < len(self._vocab) and self._vocab[i].startswith(token) and len(matches) < MAX_PREFIX_EXPANSIONS:
+                matches.append((self._vocab[i], PREFIX_WEIGHT))
+                i += 1
+        return matches
+
+    def search(self, query, kinds=None, limit=20, include_adopted=False):
+        """`(total, [(score, tipo, id, campos), ...])` ordenado por relevancia BM25."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return 0, []
+        self.ensure_fresh()
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return 0, []
+            avg_length = self._total_length / n_docs or 1.0
+            # BM25: tf·(k1+1) / (tf + k1·(1 - b + b·largo/promedio)), con las constantes fuera del bucle
+            k_const, k_len = K1 * (1 - B), K1 * B / avg_length
+            docs = self._docs
+            scores = {}
+            for token in tokens:
+                best = {}
+                for term, factor in self._expand(token):
+                    postings = self._postings[term]
+                    weight = factor * (K1 + 1) * math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc, tf in postings.items():
+                        score = weight * tf / (tf + k_const + k_len * docs[doc][0])
+                        if score > best.get(doc, 0.0):
+                            best[doc] = score
+                for doc, score in best.items():
+                    scores[doc] = scores.get(doc, 0.0) + score
+
+            def visible(doc):
+                if kinds and doc[0] not in kinds:
+                    return False
+                return include_adopted or not self._fields[doc].get("is_adopted")
+
+            candidates = [(score, doc) for doc, score in scores.items() if visible(doc)]
+            top = heapq.nlargest(limit, candidates, key=lambda item: (item[0], -item[1][1]))
+            display = {kind: source.display for kind, source in self.sources.items()}
+            results = [
+                (score, kind, pk, {f: self._fields[(kind, pk)].get(f) for f in display[kind]})
+                for score, (kind, pk) in top
+            ]
+            return len(candidates), results
+
+    def __len__(self):
+        return len(self._docs)
+
+
+search_index = SearchIndex()
+for _kind, _source in SOURCES.items():
+    model_events.on_commit(_source.model, partial(search_index.apply, _kind))
+
+
+def search(query, kinds=None, limit=20, include_adopted=False):
+    """Búsqueda sobre el índice del proceso; devuelve el cuerpo listo para JSON."""
+    t0 = time.perf_counter()
+    total, results = search_index.search(query, kinds=kinds, limit=limit, include_adopted=include_adopted)
+    items = []
+    for score, kind, pk, fields in results:
+        if fields.get("descripcion") and len(fields["descripcion"]) > 200:
+            fields["descripcion"] = fields["descripcion"][:200] + "…"
+        items.append({"tipo": kind, "id": pk, "score": round(score, 4), **fields})
+    return {
+        "ok": True,
+        "q": query,
+        "total": total,
+        "results": items,
+        "took_ms": round((time.perf_counter() - t0) * 1000, 3),
+    }
@@ -0,0 +1,260 @@
+"""Perfilador de SQL opcional (`SQL_PROFILER=1`): consultas lentas, N+1 y presupuestos.
+
+Con el perfilador activo se escuchan `before/after_cursor_execute` de todos los
+engines y, por cada request:
+
+- las sentencias que tardan más de `SQL_SLOW_MS` se registran (logger
+  `Config.sql_profiler`) con la ruta que las originó, la forma de los
+  parámetros (tipos, nunca los valores) y el plan de `EXPLAIN` (MySQL; en
+  SQLite `EXPLAIN QUERY PLAN`), capturado una vez por plantilla de sentencia;
+- si una misma plantilla se repite más de `SQL_NPLUSONE_THRESHOLD` veces se
+  avisa como posible N+1;
+- si la vista declaró un presupuesto (`@query_budget(n)` o `SQL_QUERY_BUDGETS`,
+  p. ej. `routes_UserC.login=2,Pagina_Principal=1`) y lo supera, se avisa; con
+  `SQL_QUERY_BUDGET_STRICT=1` (o `app.testing`) se lanza `QueryBudgetExceeded`,
+  que hace fallar el request en las pruebas.
+
+`assert_max_queries(n)` aplica lo mismo a un bloque de código fuera de un request.
+
+Apagado (por defecto) no registra listeners: `query_budget` solo anota la vista.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from flask import current_app, request, request_started
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PLAN_CACHE_SIZE = 256
+# Listas de placeholders de un IN expandido: "(%(id_1_1)s, %(id_1_2)s)" -> "(…)"
+_PLACEHOLDER = r"(?:%\(\w+\)s|%s|\?|:\w+)"
+_IN_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_SPACES = re.compile(r"\s+")
+_EXPLAIN = {"mysql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Un request (o bloque) ejecutó más sentencias SQL que su presupuesto."""
+
+
+def query_budget(limit):
+    """Declara el máximo de sentencias SQL de una vista (va debajo de `@route`)."""
+
+    def decorator(view):
+        view.query_budget = limit
+        return view
+
+    return decorator
+
+
+def template_of(statement):
+    """Plantilla de la sentencia: espacios normalizados y listas IN colapsadas."""
+    return _IN_LIST.sub("(…)", _SPACES.sub(" ", statement).strip())
+
+
+def _type_name(value):
+    return "null" if value is None else type(value).__name__
+
+
+def param_shape(parameters, executemany=False):
+    """Tipos de los parámetros ligados, sin sus valores (no se registran datos personales)."""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)}x {param_shape(rows[0]) if rows else '()'}"
+    if isinstance(parameters, dict):
+        types = [_type_name(v) for v in parameters.values()]
+    else:
+        types = [_type_name(v) for v in parameters or ()]
+    if len(types) > 8:
+        return "{" + ", ".join(f"{name}: {count}" for name, count in Counter(types).most_common()) + "}"
+    return "(" + ", ".join(types) + ")"
+
+
+class Profile:
+    """Sentencias de un request o de un bloque `assert_max_queries`."""
+
+    __slots__ = ("route", "budget", "statements", "db_time", "templates")
+
+    def __init__(self, route, budget=None):
+        self.route = route
+        self.budget = budget
+        self.statements = 0
+        self.db_time = 0.0
+        self.templates = Counter()
+
+    def repeated(self, threshold):
+        return [(tpl, n) for tpl, n in self.templates.most_common() if n > threshold]
+
+    def check_budget(self, strict):
+        if self.budget is None or self.statements <= self.budget:
+            return
+        top = "; ".join(f"{n}x {tpl[:120]}" for tpl, n in self.templates.most_common(3))
+        msg = f"{self.route}: {self.statements} sentencias SQL, presupuesto {self.budget} ({top})"
+        if strict:
+            raise QueryBudgetExceeded(msg)
+        logger.warning("sql: presupuesto superado en %s", msg)
+
+
+_local = threading.local()  # perfiles activos del hilo (request y bloques anidados)
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+_installed = False
+_install_lock = threading.Lock()
+_settings = {"slow_ms": 100.0, "explain": True, "nplusone": 10}
+
+
+def _active():
+    stack = _local.__dict__.get("profiles")
+    if stack is None:
+        stack = _local.profiles = []
+    return stack
+
+
+def _explain(conn, cursor, statement, parameters, context, template):
+    prefix = _EXPLAIN.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip()[:6].upper() == "SELECT":
+        return None
+    if context is not None and context.execution_options.get("stream_results"):
+        return None  # el cursor del streaming sigue abierto en la misma conexión
+    with _plans_lock:
+        if template in _plans:
+            _plans.move_to_end(template)
+            return _plans[template]
+    try:
+        explain_cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            names = [d[0] for d in explain_cursor.description or ()]
+            plan = [dict(zip(names, row)) for row in explain_cursor.fetchall()]
+        finally:
+            explain_cursor.close()
+    except Exception as exc:  # el EXPLAIN nunca debe romper la consulta original
+        plan = f"EXPLAIN falló: {exc}"
+    with _plans_lock:
+        _plans[template] = plan
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("profiler_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("profiler_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    profiles = _active()
+    template = template_of(statement)
+    for profile in profiles:
+        profile.statements += 1
+        profile.db_time += elapsed
+        profile.templates[template] += 1
+    if elapsed * 1000 < _settings["slow_ms"]:
+        return
+    plan = _explain(conn, cursor, statement, parameters, context, template) if _settings["explain"] and not executemany else None
+    logger.warning(
+        "sql lenta %.1f ms [%s] %s params=%s plan=%s",
+        elapsed * 1000,
+        profiles[0].route if profiles else "(background)",
+        template,
+        param_shape(parameters, executemany),
+        json.dumps(plan, default=str) if plan is not None else "-",
+    )
+
+
+def install():
+    """Registra los listeners de SQLAlchemy (una vez por proceso)."""
+    global _installed
+    with _install_lock:
+        if not _installed:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            _installed = True
+
+
+@contextmanager
+def assert_max_queries(limit, label="bloque"):
+    """Falla con `QueryBudgetExceeded` si el bloque ejecuta más de `limit` sentencias."""
+    install()
+    profile = Profile(label, budget=limit)
+    stack = _active()
+    stack.append(profile)
+    try:
+        yield profile
+    finally:
+        stack.remove(profile)
+    profile.check_budget(strict=True)
+
+
+def parse_budgets(value):
+    """`"endpoint=N,otro=M"` -> `{"endpoint": N, "otro": M}`."""
+    budgets = {}
+    for part in (value or "").split(","):
+        name, _, limit = part.strip().partition("=")
+        if name and limit.strip().isdigit():
+            budgets[name.strip()] = int(limit)
+    return budgets
+
+
+def _budget_for(app, endpoint):
+    if endpoint in app.config["SQL_QUERY_BUDGETS"]:
+        return app.config["SQL_QUERY_BUDGETS"][endpoint]
+    return getattr(app.view_functions.get(endpoint), "query_budget", None)
+
+
+def _start_profile(sender, **extra):
+    # señal request_started: corre antes que los before_request, que también cuentan
+    endpoint = request.endpoint or "(unmatched)"
+    profile = Profile(f"{request.method} {endpoint}", budget=_budget_for(current_app, endpoint))
+    _local.request_profile = profile
+    _active().append(profile)
+
+
+def _check_budget(response):
+    profile = _local.__dict__.get("request_profile")
+    if profile is not None:
+        profile.check_budget(strict=current_app.config["SQL_QUERY_BUDGET_STRICT"] or current_app.testing)
+    return response
+
+
+def _end_profile(exc):
+    profile = _local.__dict__.pop("request_profile", None)
+    if profile is None:
+        return
+    stack = _active()
+    if profile in stack:
+        stack.remove(profile)
+    for tpl, count in profile.repeated(_settings["nplusone"]):
+        logger.warning("sql: posible N+1 en %s: %s veces %s", profile.route, count, tpl)
+
+
+def init_app(app):
+    app.config.setdefault("SQL_PROFILER", os.getenv("SQL_PROFILER", "0") == "1")
+    app.config.setdefault("SQL_SLOW_MS", float(os.getenv("SQL_SLOW_MS", "100")))
+    app.config.setdefault("SQL_EXPLAIN", os.getenv("SQL_EXPLAIN", "1") == "1")
+    app.config.setdefault("SQL_NPLUSONE_THRESHOLD", int(os.getenv("SQL_NPLUSONE_THRESHOLD", "10")))
+    app.config.setdefault("SQL_QUERY_BUDGETS", parse_budgets(os.getenv("SQL_QUERY_BUDGETS")))
+    app.config.setdefault("SQL_QUERY_BUDGET_STRICT", os.getenv("SQL_QUERY_BUDGET_STRICT", "0") == "1")
+    if not app.config["SQL_PROFILER"]:
+        return
+    _settings.update(
+        slow_ms=app.config["SQL_SLOW_MS"],
+        explain=app.config["SQL_EXPLAIN"],
+        nplusone=app.config["SQL_NPLUSONE_THRESHOLD"],
+    )
+    install()
+    request_started.connect(_start_profile, app)
+    app.after_request(_check_budget)
+    app.teardown_request(_end_profile)
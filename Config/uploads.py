@@ -0,0 +1,500 @@
+"""Subida de imágenes: almacén por contenido, tope de tamaño y miniaturas en segundo plano.
+
+`save_upload()` copia el archivo recibido a static/uploads en bloques de
+`CHUNK_SIZE`, calculando su SHA-256 mientras escribe y abortando con 413 si
+supera `MAX_UPLOAD_BYTES`. El archivo queda como `<sha256>.<ext>`: subir dos
+veces la misma foto reutiliza el archivo existente. Cada archivo tiene una
+fila en `upload_blobs` con su conteo de referencias (filas de mascotas y
+postular_mascotas que lo usan), que se ajusta en cada flush.
+
+Las miniaturas se encolan en un pool de hilos acotado. El worker genera variantes WebP y
+JPEG en los anchos de `THUMB_WIDTHS` dentro de static/uploads/thumbs y las
+registra en un manifiesto `<nombre>.json` junto a ellas.
+
+En las plantillas, `upload_variants(imagen)` devuelve los `srcset` para que el
+navegador descargue la variante más chica que le sirva; si todavía no hay
+variantes (o Pillow no está instalado) se usa el original.
+
+Mantenimiento:
+
+    flask --app app uploads dedupe       # renombra por contenido los archivos antiguos
+    flask --app app uploads gc --dry-run # archivos que ya no usa ninguna fila
+    flask --app app uploads thumbnails   # variantes que falten
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app, url_for
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, func, inspect, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+from Config.cache import MISSING, TTLCache
+from Config.db import db
+from Models.mascotas import Mascota
+from Models.postular_mascotas import PostularMascotas
+from Models.upload_blobs import UploadBlob
+
+try:  # Pillow es opcional: sin él solo se guardan los originales
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(5 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+THUMB_WIDTHS = tuple(int(w) for w in os.getenv("THUMB_WIDTHS", "320,640").split(","))
+THUMB_QUALITY = int(os.getenv("THUMB_QUALITY", "80"))
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+UPLOAD_QUEUE_SIZE = int(os.getenv("UPLOAD_QUEUE_SIZE", "32"))
+# `uploads gc` no borra archivos más nuevos que esto (subidas cuyo commit aún no llegó)
+GC_GRACE_SECONDS = int(os.getenv("UPLOAD_GC_GRACE", str(24 * 3600)))
+
+# Modelos cuya columna `imagen` apunta a un archivo de static/uploads
+REFERENCING_MODELS = (Mascota, PostularMascotas)
+_EXT_ALIASES = {".jpeg": ".jpg", ".jpe": ".jpg"}
+_HASHED_NAME = re.compile(r"^[0-9a-f]{64}\.\w+$")
+_blobs = UploadBlob.__table__
+
+# Ancho de las tarjetas del listado: una columna bajo 900px, si no ~340-450px (ver Adopcion.css)
+CARD_SIZES = "(max-width: 900px) 100vw, 420px"
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(UPLOAD_QUEUE_SIZE)
+_variants_cache = TTLCache(maxsize=4096, ttl=3600)
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    description = f"La imagen supera el máximo permitido ({MAX_UPLOAD_BYTES // (1024 * 1024)} MB)."
+
+
+def uploads_dir(app=None):
+    app = app or current_app
+    path = os.path.join(app.static_folder, "uploads")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def thumbs_dir(app=None):
+    path = os.path.join(uploads_dir(app), "thumbs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _get_executor():
+    # se crea en el primer uso (después del fork de gunicorn, no en el master)
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="thumbs")
+        return _executor
+
+
+def stream_to_disk(file_storage, directory):
+    """Copia el archivo por bloques a un temporal en `directory`.
+
+    Devuelve `(ruta_temporal, sha256_hex, tamaño)`. Aborta con `UploadTooLarge`
+    (413) en cuanto se pasa de `MAX_UPLOAD_BYTES`.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = file_storage.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), written
+
+
+def blob_filename(sha256, original_name):
+    """Nombre en disco: hash del contenido + extensión normalizada del original."""
+    ext = os.path.splitext(secure_filename(original_name or ""))[1].lower()
+    return sha256 + _EXT_ALIASES.get(ext, ext)
+
+
+def register_blob(filename, sha256, size):
+    """Crea la fila de `upload_blobs` (refcount 0) si no existe.
+
+    Va en su propia transacción para no mezclarse con la del request: si el
+    request falla, el archivo queda sin referencias y lo limpia `uploads gc`.
+    """
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(insert(_blobs).values(filename=filename, sha256=sha256, size=size, refcount=0))
+    except IntegrityError:
+        pass  # mismo contenido ya registrado
+    except Exception:
+        logger.warning("uploads: no se pudo registrar %s", filename, exc_info=True)
+
+
+def save_upload(file_storage):
+    """Guarda la imagen subida en static/uploads y encola sus miniaturas.
+
+    Devuelve el nombre de archivo (lo que se guarda en `Mascota.imagen`) o ""
+    si no vino archivo. Si ya existe un archivo con el mismo contenido se
+    reutiliza y se descarta la copia recibida.
+    """
+    if not file_storage or not file_storage.filename:
+        return ""
+    directory = uploads_dir()
+    tmp_path, sha256, size = stream_to_disk(file_storage, directory)
+    filename = blob_filename(sha256, file_storage.filename)
+    target = os.path.join(directory, filename)
+    if os.path.exists(target):
+        os.remove(tmp_path)
+        # reutilizado: mtime al día para que `uploads gc` (período de gracia) no lo borre
+        # antes de que la fila que lo va a usar haga commit
+        os.utime(target)
+    else:
+        os.replace(tmp_path, target)
+    register_blob(filename, sha256, size)
+    if not os.path.exists(_manifest_path(directory, filename)):
+        schedule_thumbnails(filename)
+    return filename
+
+
+def _manifest_path(directory, filename):
+    return os.path.join(directory, "thumbs", f"{os.path.splitext(filename)[0]}.json")
+
+
+# --- Conteo de referencias ---
+
+@event.listens_for(Session, "before_flush")
+def _track_references(session, flush_context, instances):
+    """Ajusta `upload_blobs.refcount` según las filas que ganan o pierden una imagen."""
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, REFERENCING_MODELS) and obj.imagen:
+            deltas[obj.imagen] += 1
+    for obj in session.dirty:
+        if isinstance(obj, REFERENCING_MODELS):
+            history = inspect(obj).attrs.imagen.history
+            for value in history.added:
+                deltas[value] += 1
+            for value in history.deleted:
+                deltas[value] -= 1
+    for obj in session.deleted:
+        if isinstance(obj, REFERENCING_MODELS) and obj.imagen:
+            deltas[obj.imagen] -= 1
+
+    adjust_refcounts(session, deltas)
+
+
+def adjust_refcounts(session, deltas):
+    """Aplica `{archivo: +/-n}` a `upload_blobs.refcount`.
+
+    El flush del ORM lo hace solo; las sentencias masivas de Core (Config.bulk)
+    deben llamarlo con lo que agregaron o quitaron.
+    """
+    # archivos sin fila en upload_blobs (URLs, nombres antiguos) no actualizan nada
+    for filename, delta in deltas.items():
+        if filename and delta:
+            session.execute(
+                update(_blobs).where(_blobs.c.filename == filename).values(refcount=_blobs.c.refcount + delta)
+            )
+
+
+def reference_counts():
+    """`Counter` de nombre de archivo -> filas que lo referencian, leído de las tablas."""
+    counts = Counter()
+    for model in REFERENCING_MODELS:
+        rows = db.session.execute(
+            select(model.imagen, func.count()).where(model.imagen.isnot(None), model.imagen != "").group_by(model.imagen)
+        )
+        for filename, n in rows:
+            counts[filename] += n
+    return counts
+
+
+def reconcile_refcounts(counts=None):
+    """Corrige los refcount que se desviaron (sentencias masivas, ediciones manuales). Devuelve cuántos."""
+    counts = reference_counts() if counts is None else counts
+    fixed = 0
+    for filename, refcount in db.session.execute(select(_blobs.c.filename, _blobs.c.refcount)).all():
+        expected = counts.get(filename, 0)
+        if refcount != expected:
+            db.session.execute(update(_blobs).where(_blobs.c.filename == filename).values(refcount=expected))
+            fixed += 1
+    db.session.commit()
+    return fixed
+
+
+def _remove_variants(directory, filename):
+    thumbs = os.path.join(directory, "thumbs")
+    stem = os.path.splitext(filename)[0]
+    try:
+        names = os.listdir(thumbs)
+    except OSError:
+        return
+    for name in names:
+        suffix = name[len(stem) + 1:].split(".")[0]
+        if name == f"{stem}.json" or (name.startswith(stem + "-") and suffix.isdigit()):
+            os.remove(os.path.join(thumbs, name))
+    _variants_cache.pop(filename)
+
+
+def _release_orphan(filename):
+    """Borra la fila de `filename` si de verdad nadie lo usa. True si se puede borrar el archivo.
+
+    La fila de `upload_blobs` se bloquea (`FOR UPDATE`) y las referencias se
+    vuelven a contar en ese momento: un flush que suma una referencia actualiza
+    esa misma fila, así que o ya hizo commit y se cuenta, o espera al borrado.
+    """
+    with db.engine.begin() as conn:
+        row = conn.execute(select(_blobs.c.refcount).where(_blobs.c.filename == filename).with_for_update()).first()
+        refs = sum(
+            conn.execute(select(func.count()).select_from(model).where(model.imagen == filename)).scalar()
+            for model in REFERENCING_MODELS
+        )
+        if refs:
+            if row is not None and row.refcount != refs:
+                conn.execute(update(_blobs).where(_blobs.c.filename == filename).values(refcount=refs))
+            return False
+        if row is not None:
+            conn.execute(delete(_blobs).where(_blobs.c.filename == filename))
+    return True
+
+
+def collect_garbage(app, grace=GC_GRACE_SECONDS, dry_run=False):
+    """Borra de static/uploads los archivos que ninguna fila referencia.
+
+    Solo considera archivos con más de `grace` segundos; justo antes de borrar
+    cada uno se re-chequean sus referencias en la BD (`_release_orphan`).
+    Devuelve `(archivos, bytes)` borrados (o que se borrarían con `dry_run`).
+    """
+    directory = uploads_dir(app)
+    counts = reference_counts()
+    if not dry_run:
+        reconcile_refcounts(counts)
+
+    now = time.time()
+    removed, freed = [], 0
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path) or counts.get(name):
+            continue
+        stat = os.stat(path)
+        if now - stat.st_mtime < grace:
+            continue
+        if not dry_run:
+            if not _release_orphan(name):
+                continue  # ganó una referencia después de la lectura de `counts`
+            os.remove(path)
+            _remove_variants(directory, name)
+        removed.append(name)
+        freed += stat.st_size
+    return removed, freed
+
+
+def _hash_file(path):
+    with open(path, "rb") as fh:
+        digest = hashlib.file_digest(fh, "sha256")
+    return digest.hexdigest()
+
+
+def dedupe(app):
+    """Pasa los archivos con nombre antiguo (prefijo uuid) al almacén por contenido.
+
+    Para cada uno: crea `<sha256>.<ext>` (enlace duro o copia), apunta las
+    referencias al nuevo nombre, confirma, y recién entonces borra el original.
+    Devuelve `(archivos_migrados, bytes_liberados)`.
+    """
+    directory = uploads_dir(app)
+    migrated, freed = 0, 0
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path) or name.endswith(".part"):
+            continue
+        size = os.path.getsize(path)
+        if _HASHED_NAME.match(name):
+            register_blob(name, os.path.splitext(name)[0], size)
+            continue
+
+        sha256 = _hash_file(path)
+        filename = blob_filename(sha256, name)
+        target = os.path.join(directory, filename)
+        if os.path.exists(target):
+            freed += size
+        else:
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copy2(path, target)
+        register_blob(filename, sha256, size)
+
+        for model in REFERENCING_MODELS:
+            db.session.execute(update(model.__table__).where(model.imagen == name).values(imagen=filename))
+        db.session.commit()
+
+        os.remove(path)
+        _remove_variants(directory, name)
+        migrated += 1
+
+    reconcile_refcounts()
+    if migrated:
+        from Config.catalog_cache import catalog_version
+
+        catalog_version.bump()
+    return migrated, freed
+
+
+def schedule_thumbnails(filename, app=None):
+    """Encola la generación de variantes; si la cola está llena se omite (queda el original)."""
+    if Image is None:
+        return None
+    if not _slots.acquire(blocking=False):
+        logger.warning("uploads: cola de miniaturas llena, se omite %s", filename)
+        return None
+    app = app or current_app._get_current_object()
+    future = _get_executor().submit(_thumbnail_job, app, filename)
+    future.add_done_callback(lambda _f: _slots.release())
+    return future
+
+
+def _thumbnail_job(app, filename):
+    try:
+        make_thumbnails(app, filename)
+    except Exception:
+        logger.exception("uploads: no se pudieron generar miniaturas de %s", filename)
+        return
+    # las tarjetas cacheadas deben volver a renderizarse para usar las variantes nuevas
+    from Config.catalog_cache import catalog_version
+
+    catalog_version.bump()
+
+
+def make_thumbnails(app, filename):
+    """Genera las variantes WebP/JPEG y escribe el manifiesto. Devuelve el manifiesto."""
+    source = os.path.join(uploads_dir(app), filename)
+    target_dir = thumbs_dir(app)
+    stem = os.path.splitext(filename)[0]
+
+    variants = []
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        for width in sorted(set(THUMB_WIDTHS)):
+            if width >= img.width and variants:
+                break  # no agrandar: el original ya es más chico que esta variante
+            height = max(1, round(img.height * min(width, img.width) / img.width))
+            resized = img.resize((min(width, img.width), height), Image.LANCZOS)
+            for fmt, ext in (("WEBP", "webp"), ("JPEG", "jpg")):
+                name = f"{stem}-{width}.{ext}"
+                out = resized.convert("RGB") if fmt == "JPEG" else resized
+                out.save(os.path.join(target_dir, name), fmt, quality=THUMB_QUALITY, optimize=True)
+                variants.append({"width": resized.width, "format": ext, "file": f"thumbs/{name}"})
+
+    manifest = {"source": filename, "variants": variants}
+    tmp = os.path.join(target_dir, f".{stem}.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp, os.path.join(target_dir, f"{stem}.json"))
+    _variants_cache.pop(filename)
+    return manifest
+
+
+def upload_variants(filename):
+    """`srcset` por formato para una imagen de static/uploads, o `None` si no hay variantes.
+
+    Resultado: `{"webp": "...320w, ...640w", "jpg": "...", "src": url_más_chica, "sizes": ...}`.
+    """
+    if not filename:
+        return None
+    cached = _variants_cache.get(filename)
+    if cached is not MISSING:
+        return cached
+
+    path = _manifest_path(os.path.join(current_app.static_folder, "uploads"), filename)
+    result = None
+    try:
+        with open(path, encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        manifest = None
+    if manifest and manifest.get("variants"):
+        srcsets = {}
+        for v in manifest["variants"]:
+            url = url_for("static", filename=f"uploads/{v['file']}")
+            srcsets.setdefault(v["format"], []).append((v["width"], url))
+        result = {fmt: ", ".join(f"{u} {w}w" for w, u in items) for fmt, items in srcsets.items()}
+        result["src"] = srcsets.get("jpg", next(iter(srcsets.values())))[0][1]
+        result["sizes"] = CARD_SIZES
+    # sin manifiesto se reintenta pronto: las miniaturas se generan en segundo plano
+    _variants_cache.set(filename, result, ttl=None if result else 30)
+    return result
+
+
+def init_app(app):
+    # rechazar cuerpos gigantes antes de parsear el formulario (archivo + campos de texto)
+    app.config.setdefault("MAX_CONTENT_LENGTH", MAX_UPLOAD_BYTES + 1024 * 1024)
+    app.jinja_env.globals["upload_variants"] = upload_variants
+    app.cli.add_command(uploads_cli)
+
+
+uploads_cli = AppGroup("uploads", help="Mantenimiento de static/uploads.")
+
+
+@uploads_cli.command("dedupe")
+def dedupe_command():
+    """Renombra por contenido los archivos antiguos y unifica duplicados."""
+    migrated, freed = dedupe(current_app._get_current_object())
+    click.echo(f"{migrated} archivos migrados, {freed} bytes liberados")
+
+
+@uploads_cli.command("gc")
+@click.option("--dry-run", is_flag=True, help="Solo listar lo que se borraría.")
+@click.option("--grace", type=int, default=GC_GRACE_SECONDS, show_default=True,
+              help="Ignorar archivos más nuevos que estos segundos.")
+def gc_command(dry_run, grace):
+    """Borra los archivos que ya no referencia ninguna mascota ni postulación."""
+    removed, freed = collect_garbage(current_app._get_current_object(), grace=grace, dry_run=dry_run)
+    for name in removed:
+        click.echo(("se borraría " if dry_run else "borrado ") + name)
+    click.echo(f"{len(removed)} archivos, {freed} bytes")
+
+
+@uploads_cli.command("thumbnails")
+def thumbnails_command():
+    """Genera las variantes que falten para las imágenes ya subidas."""
+    if Image is None:
+        raise click.ClickException("Pillow no está instalado")
+    app = current_app._get_current_object()
+    directory = uploads_dir(app)
+    done = 0
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path) or name.endswith(".part") or os.path.exists(_manifest_path(directory, name)):
+            continue
+        try:
+            make_thumbnails(app, name)
+            done += 1
+        except Exception as exc:
+            click.echo(f"omitida {name}: {exc}")
+    click.echo(f"{done} imágenes procesadas")
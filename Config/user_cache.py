@@ -0,0 +1,39 @@
+"""Resolución cacheada del usuario de la sesión.
+
+`inject_auth` se ejecuta en cada render; sin caché cada página vista por un
+usuario autenticado costaba un `SELECT` a `usuarios`. Aquí se guarda un dict
+liviano (`id`, `email`, `nombre`) por `user_id` con TTL y tope LRU. Los
+endpoints que modifican o eliminan usuarios llaman a `invalidate_user()`.
+"""
+
+import os
+
+from sqlalchemy import select
+
+from Config.cache import MISSING, TTLCache
+from Config.db import db, use_replica
+from Models.usuario import usuario
+
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "2048"))
+
+_users = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def load_user(user_id):
+    """Dict ligero del usuario `user_id` o `None` si no existe (también se cachea)."""
+    cached = _users.get(user_id)
+    if cached is not MISSING:
+        return cached
+
+    with use_replica():
+        row = db.session.execute(
+            select(usuario.id, usuario.email, usuario.username).where(usuario.id == user_id)
+        ).first()
+    data = {"id": row.id, "email": row.email, "nombre": row.username} if row else None
+    _users.set(user_id, data)
+    return data
+
+
+def invalidate_user(user_id):
+    _users.pop(user_id)
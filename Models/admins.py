@@ -1,6 +1,6 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
-from Config.db import ma, db, app
+from Config.passwords import hash_password, verify_password
+from Config.db import ma, db
 
 class admin(db.Model):
     __tablename__ = "admins"
@@ -18,10 +18,10 @@ class admin(db.Model):
         return f"<admin {self.id} {self.username}>"
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def to_dict(self):
         return {
@@ -40,7 +40,3 @@ class adminSchema(ma.SQLAlchemyAutoSchema):
         load_instance = True
         exclude = ("password_hash",)
         dump_only = ("id", "created_at", "updated_at")
-
-#  crear tablas en desarrollo 
-    with app.app_context():
-        db.create_all()
\ No newline at end of file
@@ -0,0 +1,21 @@
+from datetime import datetime
+from Config.db import db
+
+
+class AdopcionConteo(db.Model):
+    """Solicitudes de adopción por mascota, contadas de forma incremental.
+
+    Config.adopciones suma y resta en la misma transacción que inserta, confirma
+    o borra una solicitud, así el panel no necesita un GROUP BY sobre
+    adoptar_mascotas; `flask adopciones recount` las recalcula desde la tabla.
+    """
+
+    __tablename__ = "adopcion_conteos"
+
+    mascota_id = db.Column(db.Integer, db.ForeignKey("mascotas.id", ondelete="CASCADE"), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    confirmadas = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AdopcionConteo {self.mascota_id} {self.confirmadas}/{self.total}>"
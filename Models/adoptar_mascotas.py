@@ -1,7 +1,14 @@
-from Config.db import db
+from Config.db import db, ma
 
 class adoptar_mascotas(db.Model):
     __tablename__ = "adoptar_mascotas"
+    __table_args__ = (
+        # idempotencia de la cola write-behind (Config/adoption_queue.py): reintentar no duplica
+        db.Index("ux_adoptar_submission_id", "submission_id", unique=True),
+        # revisión por mascota y por estado, paginada por id (API /adopciones)
+        db.Index("ix_adoptar_mascota_id_id", "mascota_id", "id"),
+        db.Index("ix_adoptar_is_confirmed_id", "is_confirmed", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(100), nullable=False)
@@ -13,9 +20,12 @@ class adoptar_mascotas(db.Model):
     tiene_mascotas = db.Column(db.String(50), nullable=True)
     motivo = db.Column(db.Text, nullable=True)
     pet_name = db.Column(db.String(100), nullable=True)
+    # mascota resuelta a partir de pet_name (o ?pet_id=) al guardar la solicitud
+    mascota_id = db.Column(db.Integer, db.ForeignKey("mascotas.id", ondelete="SET NULL"), nullable=True)
     # FK correcta hacia la tabla 'usuarios'
     adopter_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)
     is_confirmed = db.Column(db.Boolean, default=False)
+    submission_id = db.Column(db.String(32), nullable=True)
 
     def __init__(self, username, email, telefono, direccion, ocupacion, vivienda, tiene_mascotas, motivo, pet_name, adopter_id=None):
         self.username = username
@@ -28,3 +38,11 @@ class adoptar_mascotas(db.Model):
         self.motivo = motivo
         self.pet_name = pet_name
         self.adopter_id = adopter_id
+
+
+class adoptar_mascotasSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = adoptar_mascotas
+        load_instance = True
+        include_fk = True
+        dump_only = ("id",)
@@ -0,0 +1,25 @@
+from Config.db import db
+
+
+class LoginKey(db.Model):
+    """Índice de identidades: cada email/username en minúsculas -> cuenta que lo usa.
+
+    Una cuenta (admin, usuario o postulante) tiene una fila por clave distinta.
+    La restricción única (login_key, kind) es la que garantiza que no haya dos
+    cuentas del mismo tipo con el mismo email o nombre de usuario. Las filas
+    las mantiene Config.identity con eventos del mapper.
+    """
+
+    __tablename__ = "login_keys"
+    __table_args__ = (
+        db.UniqueConstraint("login_key", "kind", name="uq_login_keys_key_kind"),
+        db.Index("ix_login_keys_kind_ref", "kind", "ref_id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    login_key = db.Column(db.String(120), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # admin | usuario | postulante
+    ref_id = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<LoginKey {self.kind}:{self.ref_id} {self.login_key}>"
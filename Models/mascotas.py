@@ -1,9 +1,15 @@
 
 from datetime import datetime
-from Config.db import ma, db, app
+from Config.db import ma, db
 
 class Mascota(db.Model):
     __tablename__ = "mascotas"
+    # Índice compuesto para el listado paginado por cursor (filtro is_adopted + orden por id)
+    __table_args__ = (
+        db.Index("ix_mascotas_is_adopted_id", "is_adopted", "id"),
+        # altas en lote: INSERT que ignora los pares ya registrados (Config/bulk.py)
+        db.Index("uq_mascotas_nombre_autor", "nombre", "autor", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(140), nullable=False, index=True)
@@ -12,7 +18,7 @@ class Mascota(db.Model):
     autor = db.Column(db.String(120), nullable=False)   # nombre de usuario o fundación
     is_adopted = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
     def __repr__(self):
         return f"<Mascota {self.id} {self.nombre}>"
@@ -34,7 +40,3 @@ class MascotaSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Mascota
         load_instance = True
-
-# Crear tablas automáticamente al importar el modelo
-with app.app_context():
-    db.create_all()
\ No newline at end of file
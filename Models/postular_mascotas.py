@@ -1,6 +1,6 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
-from Config.db import ma, db, app
+from Config.passwords import hash_password, verify_password
+from Config.db import ma, db
 
 
 class PostularMascotas(db.Model):
@@ -11,7 +11,7 @@ class PostularMascotas(db.Model):
     # Campos legacy (opcional, para compatibilidad con API existente)
     username = db.Column(db.String(80), unique=False, nullable=True)
     email = db.Column(db.String(120), unique=False, nullable=True)
-    password_hash = db.Column(db.String(128), nullable=True)
+    password_hash = db.Column(db.String(256), nullable=True)
 
     # Campos del formulario de postular mascota
     nombre = db.Column(db.String(140), nullable=True, index=True)
@@ -26,18 +26,16 @@ class PostularMascotas(db.Model):
     imagen = db.Column(db.String(300), nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
 
     def __repr__(self):
         return f"<PostularMascotas {self.id} {self.nombre or self.username}>"
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        if not self.password_hash:
-            return False
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def to_dict(self):
         return {
@@ -64,8 +62,3 @@ class PostularMascotasSchema(ma.SQLAlchemyAutoSchema):
         model = PostularMascotas
         load_instance = True
         exclude = ("password_hash",)  # evita exponer el hash en las respuestas
-
-
-# Crear tablas automáticamente al importar el modelo (dev)
-with app.app_context():
-    db.create_all()
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from Config.db import db, app
+from Config.db import db
 
 
 class SolicitudAdopcion(db.Model):
@@ -21,8 +21,3 @@ class SolicitudAdopcion(db.Model):
 
     def __repr__(self):
         return f"<SolicitudAdopcion id={self.id} username={self.username!r}>"
-
-
-# Garantizar la creación de la tabla cuando se importe el módulo (siguiendo el patrón del proyecto)
-with app.app_context():
-    db.create_all()
@@ -0,0 +1,22 @@
+from datetime import datetime
+from Config.db import db
+
+
+class UploadBlob(db.Model):
+    """Archivo único en static/uploads, nombrado por el SHA-256 de su contenido.
+
+    `refcount` cuenta las filas de mascotas / postular_mascotas cuyo `imagen`
+    apunta a este archivo; lo mantiene Config.uploads en cada flush y
+    `flask uploads gc` lo recalcula desde las tablas.
+    """
+
+    __tablename__ = "upload_blobs"
+
+    filename = db.Column(db.String(80), primary_key=True)  # "<sha256>.<ext>"
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.Integer, nullable=False)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<UploadBlob {self.filename} refs={self.refcount}>"
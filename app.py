@@ -7,9 +7,10 @@ from flask import (
     url_for, # Para construir URLs
     session, # Manejo de sesiones
     flash, # Para mensajes flash (notificaciones)
+    g, # Memo por request
 )
-from Config.db import app, db
-from sqlalchemy import inspect, text
+from Config.db import app, db, read_only
+from Config.migrations import check_schema, migrate_cli, upgrade as upgrade_schema
 
 # importar blueprints de controllers
 from Config.controller.Mascotascontroller import routes_MascotasC
@@ -30,182 +31,64 @@ app.register_blueprint(Routes_adminC)
 mascotas = []
 from functools import wraps
 import hashlib
+import os
 from Models.mascotas import Mascota
 from Models.postular_mascotas import PostularMascotas
 from Models.admins import admin as AdminModel
 from Models.adoptar_mascotas import adoptar_mascotas  # Usaremos esta tabla migrada para las solicitudes
+from Config.catalog_cache import mascotas_cards
+from Config.user_cache import load_user
+from Config.page_cache import PageCache
+from Config.uploads import init_app as init_uploads, save_upload
+from Config.assets import init_app as init_assets
+from Config.export import init_app as init_export
+from Config.adoption_queue import adoption_queue, init_app as init_adoption_queue, submission_from_form, write_submissions
+from Config.identity import authenticate, create_usuario
+from Config.metrics import init_app as init_metrics, reset as reset_metrics
+from Config.sql_profiler import init_app as init_sql_profiler
+from Config.profiling import init_app as init_profiling
+from Config.compression import init_app as init_compression
 
 # Configurar clave secreta para sesiones
-app.secret_key = "adopt-me-secret-key-2025"  # En producción, usar variable de entorno
+app.secret_key = os.getenv("SECRET_KEY", "adopt-me-secret-key-2025")  # En producción, definir SECRET_KEY
 
 # Nota: reemplazamos el almacenamiento temporal por el modelo en la DB.
 from Models.usuario import usuario
 users_db = {}  # mantenemos la variable por compatibilidad con código antiguo pero no se usa para auth
 
+# Caché de páginas estáticas (varían solo por sesión iniciada / anónima)
+page_cache = PageCache(app)
 
-# Asegurar que la tabla adoptar_mascotas tenga las columnas esperadas por el formulario
-def ensure_adoptar_mascotas_schema():
-    insp = inspect(db.engine)
-    if not insp.has_table("adoptar_mascotas"):
-        db.create_all()
-        return
-
-    # Paso 1: columnas requeridas
-    cols_list = insp.get_columns("adoptar_mascotas")
-    cols = {c["name"] for c in cols_list}
-    required = [
-        ("telefono", "VARCHAR(30) NULL"),
-        ("direccion", "VARCHAR(200) NULL"),
-        ("ocupacion", "VARCHAR(100) NULL"),
-        ("vivienda", "VARCHAR(80) NULL"),
-        ("tiene_mascotas", "VARCHAR(80) NULL"),
-        ("motivo", "TEXT NULL"),
-        ("pet_name", "VARCHAR(120) NULL"),
-        ("adopter_id", "INT NULL"),
-        ("is_confirmed", "TINYINT(1) NOT NULL DEFAULT 0"),
-    ]
-    for name, ddl in required:
-        if name not in cols:
-            try:
-                db.session.execute(text(f"ALTER TABLE adoptar_mascotas ADD COLUMN {name} {ddl}"))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
+# Subidas: tope de tamaño, miniaturas y `upload_variants()` en plantillas
+init_uploads(app)
 
-    # Paso 2: índice adopter_id
-    cols_list = insp.get_columns("adoptar_mascotas")
-    cols = {c["name"] for c in cols_list}
-    if "adopter_id" in cols:
-        try:
-            idx = db.session.execute(text(
-                """
-                SELECT COUNT(1) AS n
-                FROM information_schema.statistics
-                WHERE table_schema = DATABASE()
-                  AND table_name = 'adoptar_mascotas'
-                  AND index_name = 'idx_adoptar_adopter_id'
-                """
-            )).scalar()
-            if not idx:
-                db.session.execute(text("CREATE INDEX idx_adoptar_adopter_id ON adoptar_mascotas(adopter_id)"))
-                db.session.commit()
-        except Exception:
-            db.session.rollback()
+# Estáticos con huella (static/dist, `flask assets build`): url_for('static') los usa si hay manifiesto
+init_assets(app)
 
-    # Paso 3: FK adopter_id -> usuarios.id
-    try:
-        if insp.has_table("usuarios") and "adopter_id" in cols:
-            fk_exists = db.session.execute(text(
-                """
-                SELECT COUNT(1) AS n
-                FROM information_schema.REFERENTIAL_CONSTRAINTS
-                WHERE CONSTRAINT_SCHEMA = DATABASE()
-                  AND CONSTRAINT_NAME = 'fk_adoptar_usuarios'
-                """
-            )).scalar()
-            if not fk_exists:
-                try:
-                    db.session.execute(text(
-                        "ALTER TABLE adoptar_mascotas ADD CONSTRAINT fk_adoptar_usuarios "
-                        "FOREIGN KEY (adopter_id) REFERENCES usuarios(id) "
-                        "ON UPDATE CASCADE ON DELETE SET NULL"
-                    ))
-                    db.session.commit()
-                except Exception:
-                    db.session.rollback()
-    except Exception:
-        db.session.rollback()
+# `flask export <tabla>` (las rutas de exportación están en el blueprint del admin)
+init_export(app)
 
-    # Paso 4: Relajar password_hash NOT NULL
-    try:
-        meta = {c["name"]: c for c in cols_list}
-        ph = meta.get("password_hash")
-        if ph and not ph.get("nullable", True):
-            try:
-                db.session.execute(text(
-                    "ALTER TABLE adoptar_mascotas MODIFY COLUMN password_hash VARCHAR(256) NULL"
-                ))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-    except Exception:
-        db.session.rollback()
+# Cola write-behind opcional de /formulario (ADOPTION_WRITE_BEHIND=1)
+init_adoption_queue(app)
 
-    # Paso 5: Defaults de timestamps si existen sin default
-    try:
-        cols_now = {c["name"] for c in insp.get_columns("adoptar_mascotas")}
-        if "created_at" in cols_now:
-            try:
-                db.session.execute(text(
-                    "ALTER TABLE adoptar_mascotas MODIFY COLUMN created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP"
-                ))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-        if "updated_at" in cols_now:
-            try:
-                db.session.execute(text(
-                    "ALTER TABLE adoptar_mascotas MODIFY COLUMN updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
-                ))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-    except Exception:
-        db.session.rollback()
+# GET /metrics (formato Prometheus): latencia, tamaño, SQL y plantillas por endpoint;
+# cerrado salvo METRICS_TOKEN o METRICS_ALLOWED_IPS
+init_metrics(app)
 
-    # Paso 6: Asegurar que 'username' NO tenga índice UNIQUE accidental
-    try:
-        rows = db.session.execute(text(
-            """
-            SELECT index_name, non_unique
-            FROM information_schema.statistics
-            WHERE table_schema = DATABASE()
-              AND table_name = 'adoptar_mascotas'
-              AND column_name = 'username'
-            """
-        )).fetchall()
-        # Eliminar cualquier índice único sobre username
-        for idx_name, non_unique in rows:
-            try:
-                if int(non_unique) == 0:
-                    db.session.execute(text(f"ALTER TABLE adoptar_mascotas DROP INDEX `{idx_name}`"))
-                    db.session.commit()
-            except Exception:
-                db.session.rollback()
-
-        # Si después de eliminar no queda ningún índice, crear uno normal (no único)
-        remaining = db.session.execute(text(
-            """
-            SELECT COUNT(1)
-            FROM information_schema.statistics
-            WHERE table_schema = DATABASE()
-              AND table_name = 'adoptar_mascotas'
-              AND column_name = 'username'
-            """
-        )).scalar() or 0
-        if int(remaining) == 0:
-            try:
-                db.session.execute(text("CREATE INDEX idx_adoptar_username ON adoptar_mascotas(username)"))
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-    except Exception:
-        db.session.rollback()
+# Perfilador de SQL opcional (SQL_PROFILER=1): consultas lentas con EXPLAIN, N+1 y presupuestos
+init_sql_profiler(app)
 
+# Perfilado por muestreo de un request (admin con X-Profile: 1 / ?_profile=1, o PROFILE_SAMPLE_RATE)
+init_profiling(app)
 
-# Ejecutar la verificación de esquema al iniciar la app
-with app.app_context():
-    ensure_adoptar_mascotas_schema()
+# Compresión gzip/brotli de HTML y JSON según Accept-Encoding (también respuestas en streaming)
+init_compression(app)
 
 
-# Endpoint utilitario (desarrollo) para forzar la migración de la tabla adoptar_mascotas
-@app.route("/_setup/migrate-adoptar", methods=["POST", "GET"])
-def migrate_adoptar_table():
-    try:
-        ensure_adoptar_mascotas_schema()
-        return jsonify({"ok": True, "msg": "Esquema de adoptar_mascotas verificado/ajustado"})
-    except Exception as e:
-        return jsonify({"ok": False, "msg": str(e)}), 500
+# Esquema: las migraciones versionadas (migrations/) se aplican una vez por despliegue con
+# `flask --app app migrate upgrade`; al arrancar solo se lee la versión actual.
+app.cli.add_command(migrate_cli)
+check_schema(app)
 
 
 # Decorador para rutas que requieren autenticación
@@ -226,20 +109,25 @@ def is_authenticated():
 
 
 # Función helper para obtener el usuario actual
+# Se resuelve una sola vez por request (memo en `g`) y, entre requests, desde la
+# caché TTL/LRU de Config.user_cache, así las páginas no consultan MySQL en cada render.
 def get_current_user():
-    if "user_id" in session:
-        try:
-            # si es admin, los datos están en la sesión
-            if session.get("is_admin"):
-                return {"id": session.get("user_id"), "email": session.get("user_email"), "nombre": session.get("user_name"), "is_admin": True}
-            u = usuario.query.get(session["user_id"])
-            if not u:
-                return None
-            # devolver un dict ligero similar al antiguo esquema usado en plantillas
-            return {"id": u.id, "email": u.email, "nombre": u.username}
-        except Exception:
-            return None
-    return None
+    if "user_id" not in session:
+        return None
+    if "current_user" in g:
+        return g.current_user
+    user = None
+    try:
+        # si es admin, los datos están en la sesión
+        if session.get("is_admin"):
+            user = {"id": session.get("user_id"), "email": session.get("user_email"), "nombre": session.get("user_name"), "is_admin": True}
+        else:
+            # dict ligero similar al antiguo esquema usado en plantillas
+            user = load_user(session["user_id"])
+    except Exception:
+        user = None
+    g.current_user = user
+    return user
 
 
 # Context processor para hacer disponible la información de autenticación en todas las plantillas
@@ -250,18 +138,21 @@ def inject_auth():
 
 # Página de detalle de cachorro
 @app.route("/cachorro")
+@page_cache.cached
 def Pagina2_Cachorro():
     return render_template("main/Pagina2_Cachorro.html")
 
 
 # Página de detalle de Michi
 @app.route("/michi")
+@page_cache.cached
 def Pagina_Michi():
     return render_template("main/Pagina_Michi.html")
 
 
 # Página de detalle de Rocky (perro 2)
 @app.route("/rocky")
+@page_cache.cached
 def Pagina_perro2():
     return render_template("main/Pagina_perro2.html")
 
@@ -271,88 +162,33 @@ def Pagina_perro2():
 @login_required
 def Formulario_Para_Adoptar():
     if request.method == "POST":
-        # Procesar solicitud de adopción con usuario autenticado y persistir en la tabla adoptar_mascotas
-        user = get_current_user()
-
-        nombre = request.form.get("nombre") or request.form.get("username") or None
-        email = request.form.get("email") or None
-        telefono = request.form.get("telefono") or None
-        direccion = request.form.get("direccion") or None
-        ocupacion = request.form.get("ocupacion") or None
-        vivienda = request.form.get("vivienda") or None
-        tiene_mascotas = request.form.get("mascotas") or None
-        motivo = request.form.get("motivo") or None
-
-        # El nombre de la mascota puede venir como parámetro en la URL (?pet=Nombre) o como campo
-        pet_name = request.args.get("pet") or request.form.get("pet_name") or None
-
-        # Log de depuración de los valores recibidos
-        print("[DEBUG][/formulario] Datos recibidos:")
-        print({
-            "nombre": nombre,
-            "email": email,
-            "telefono": telefono,
-            "direccion": direccion,
-            "ocupacion": ocupacion,
-            "vivienda": vivienda,
-            "tiene_mascotas(form campo 'mascotas')": tiene_mascotas,
-            "motivo": motivo,
-            "pet_name": pet_name,
-            "user_id_session": session.get("user_id"),
-        })
-
-        # Validación mínima antes de crear el objeto (evita INSERT con nulos inesperados)
-        if not nombre or not email:
-            msg = "Nombre y email son obligatorios";
-            print("[ERROR][/formulario]", msg)
+        # Procesar solicitud de adopción del usuario autenticado (tabla adoptar_mascotas)
+        wants_json = request.headers.get("X-Requested-With") == "XMLHttpRequest" or request.accept_mimetypes.accept_json
+        record = submission_from_form(request.form, request.args.get("pet"), session, request.args.get("pet_id"))
+        app.logger.debug("/formulario: solicitud para %r (user_id=%s)", record["pet_name"], session.get("user_id"))
+
+        # Validación mínima antes de guardar (evita INSERT con nulos inesperados)
+        if not record["username"] or not record["email"]:
+            msg = "Nombre y email son obligatorios"
             if request.headers.get("X-Requested-With") == "XMLHttpRequest":
                 return jsonify({"ok": False, "msg": msg}), 400
             flash(msg, "error")
             return redirect("/formulario")
 
-        # Crear registro en la tabla adoptar_mascotas (ya migrada con columnas nuevas)
-        a = adoptar_mascotas(
-            username=nombre,
-            email=email,
-            telefono=telefono,
-            direccion=direccion,
-            ocupacion=ocupacion,
-            vivienda=vivienda,
-            tiene_mascotas=tiene_mascotas,
-            motivo=motivo,
-            pet_name=pet_name,
-        )
-
-        # Si el usuario está autenticado y tenemos user_id, enlazamos adopter_id
         try:
-            # Solo enlazar adopter_id si es un usuario normal existente en 'usuarios'
-            if session.get("user_id") and not session.get("is_admin"):
-                try:
-                    uobj = usuario.query.get(session.get("user_id"))
-                except Exception:
-                    uobj = None
-                if uobj:
-                    a.adopter_id = uobj.id
-                else:
-                    print("[WARN][/formulario] user_id en sesión no encontrado en 'usuarios'; guardando sin FK")
-
-            db.session.add(a)
-            db.session.commit()
-            print(f"[DEBUG][/formulario] Solicitud guardada en adoptar_mascotas id={a.id}")
-            # Si la solicitud viene por AJAX/Fetch, devolver JSON para que el frontend pueda manejarlo
-            if request.headers.get("X-Requested-With") == "XMLHttpRequest" or request.accept_mimetypes.accept_json:
-                return jsonify({"ok": True, "msg": "Solicitud de adopción guardada"}), 201
-
+            if adoption_queue.enabled:
+                # write-behind: queda en el diario local y un hilo la escribe en lote (Config/adoption_queue.py)
+                adoption_queue.enqueue(record)
+                if wants_json:
+                    return jsonify({"ok": True, "msg": "Solicitud de adopción recibida", "id": record["submission_id"]}), 202
+            else:
+                write_submissions([record])
+                if wants_json:
+                    return jsonify({"ok": True, "msg": "Solicitud de adopción guardada"}), 201
             flash("¡Solicitud de adopción enviada correctamente! Te contactaremos pronto.", "success")
         except Exception as e:
-            db.session.rollback()
-            # Imprimir el error en la consola del servidor para depuración
-            import traceback
-            print("--- ERROR AL GUARDAR ADOPCIÓN ---")
-            traceback.print_exc()
-            print("---------------------------------")
-            # registrar/mostrar un mensaje genérico
-            if request.headers.get("X-Requested-With") == "XMLHttpRequest" or request.accept_mimetypes.accept_json:
+            app.logger.exception("/formulario: error al guardar la solicitud de adopción")
+            if wants_json:
                 return jsonify({"ok": False, "msg": f"Ocurrió un error al guardar la solicitud: {e}"}), 500
             flash("Ocurrió un error al guardar la solicitud. Intenta de nuevo más tarde.", "error")
         return redirect("/adopcion")
@@ -361,6 +197,7 @@ def Formulario_Para_Adoptar():
 
 # Home
 @app.route("/")
+@page_cache.cached
 def Pagina_Principal():
     return render_template("main/Pagina_Principal.html")
 
@@ -382,18 +219,12 @@ def Registro_Usuario():
             flash("Todos los campos son obligatorios", "error")
             return render_template("main/Registro_Usuario.html")
 
-        # Verificar si el usuario ya existe en la base de datos
-        if usuario.query.filter_by(email=email).first():
+        # Crear nuevo usuario; el índice login_keys rechaza emails ya registrados
+        # (el nombre es para mostrar y puede repetirse)
+        if create_usuario(nombre, email, password) is None:
             flash("Este email ya está registrado", "error")
             return render_template("main/Registro_Usuario.html")
 
-        # Crear nuevo usuario en la base de datos
-        username = nombre if nombre else email.split("@")[0]
-        u = usuario(username=username, email=email)
-        u.set_password(password)
-        db.session.add(u)
-        db.session.commit()
-
         flash("¡Registro exitoso! Ahora puedes iniciar sesión", "success")
         if next_url:
             try:
@@ -419,9 +250,10 @@ def Iniciar_Sesion():
             flash("Email y contraseña son obligatorios", "error")
             return render_template("main/Iniciar_Sesion.html")
 
-        # Primero intentar buscar en admins
-        admin_user = AdminModel.query.filter((AdminModel.email == email) | (AdminModel.username == email)).first()
-        if admin_user and admin_user.check_password(password):
+        # Una sola consulta al índice login_keys resuelve admin y usuario (admin primero)
+        account = authenticate(email, password)
+        if isinstance(account, AdminModel):
+            admin_user = account
             session["user_id"] = admin_user.id
             session["user_email"] = admin_user.email
             session["user_name"] = admin_user.username
@@ -437,9 +269,9 @@ def Iniciar_Sesion():
                 pass
             return redirect("/postularADM")
 
-        # Si no es admin, intentar usuario normal
-        user = usuario.query.filter((usuario.email == email) | (usuario.username == email)).first()
-        if user and user.check_password(password):
+        # Si no es admin, usuario normal
+        if account is not None:
+            user = account
             session["user_id"] = user.id
             session["user_email"] = user.email
             session["user_name"] = user.username
@@ -480,23 +312,14 @@ def Registro_Administrador():
 # postular Mascotas (ADMIN)
 @app.route("/postularADM", methods=["GET", "POST"])
 def Postular_Admin():
-    from werkzeug.utils import secure_filename
-    import os
     if request.method == "POST":
         nombre = request.form.get("nombre")
         descripcion = request.form.get("descripcion")
         imagen = request.files.get("imagen")
         autor = session.get("user_name", "Anónimo")
 
-        # Guardar la imagen en static/uploads/
-        uploads_dir = os.path.join(app.root_path, "static", "uploads")
-        os.makedirs(uploads_dir, exist_ok=True)
-        imagen_filename = ""
-        if imagen and imagen.filename:
-            import uuid
-            safe_name = secure_filename(imagen.filename)
-            imagen_filename = f"{uuid.uuid4().hex}_{safe_name}"
-            imagen.save(os.path.join(uploads_dir, imagen_filename))
+        # Guardar la imagen en static/uploads/ (miniaturas en segundo plano)
+        imagen_filename = save_upload(imagen)
 
         # Crear y persistir Mascota en la base de datos para que aparezca en /adopcion
         try:
@@ -520,14 +343,21 @@ def Postular_Admin():
 
 # Listado de adopción / Mascotas
 @app.route("/adopcion")
+@read_only
 def Pagina_Adopcion():
-    # Mostrar mascotas persistidas en la base de datos (no adoptadas)
+    # Mostrar mascotas persistidas en la base de datos (no adoptadas), paginadas por cursor.
+    # El HTML de las tarjetas se cachea por versión del catálogo.
     try:
-        mascotas_db = Mascota.query.filter_by(is_adopted=False).order_by(Mascota.id.desc()).all()
+        mascotas_html, next_cursor = mascotas_cards(request.args, is_adopted=False)
     except Exception:
         # fallback a la lista en memoria si hay error con la BD
-        mascotas_db = mascotas
-    return render_template("main/Pagina1_Adopcion.html", mascotas=mascotas_db)
+        return render_template("main/Pagina1_Adopcion.html", mascotas=mascotas)
+    return render_template(
+        "main/Pagina1_Adopcion.html",
+        mascotas_html=mascotas_html,
+        next_cursor=next_cursor,
+        cursor=request.args.get("cursor"),
+    )
 
 
 # Alias para compatibilidad: /mascotas -> /adopcion
@@ -538,12 +368,14 @@ def Mascotas_Alias():
 
 # Fundaciones
 @app.route("/fundaciones")
+@page_cache.cached
 def Pagina_Fundacion():
     return render_template("main/Pagina_Fundacion.html")
 
 
 # Página específica de la fundación Funcuan
 @app.route("/funcuan")
+@page_cache.cached
 def Pagina_Funcuan():
     # reutilizamos la plantilla de fundación por ahora; si luego hay varias, podemos parametrizar
     return render_template("main/Pagina_Fundacion.html")
@@ -554,9 +386,6 @@ def Pagina_Funcuan():
 def Postular_Mascotas():
     if request.method == "POST":
         # Procesar formulario y guardar en la tabla postular_mascotas
-        from werkzeug.utils import secure_filename
-        import os
-
         nombre = request.form.get("nombre")
         especie = request.form.get("especie")
         raza = request.form.get("raza")
@@ -568,12 +397,8 @@ def Postular_Mascotas():
         ubicacion = request.form.get("ubicacion")
         file = request.files.get("imagen")
 
-        imagen_filename = ""
-        if file and file.filename:
-            uploads_dir = os.path.join(app.root_path, "static", "uploads")
-            os.makedirs(uploads_dir, exist_ok=True)
-            imagen_filename = secure_filename(file.filename)
-            file.save(os.path.join(uploads_dir, imagen_filename))
+        # nombre único: dos postulaciones con "foto.jpg" ya no se pisan
+        imagen_filename = save_upload(file)
 
         p = PostularMascotas(
             nombre=nombre,
@@ -597,5 +422,21 @@ def Postular_Mascotas():
     return render_template("main/Postular_Mascotas.html")
 
 
+def create_app(config=None):
+    """Punto de entrada de la aplicación para servidores WSGI (ver wsgi.py).
+
+    Los modelos y blueprints se enlazan a la instancia única de Config.db al
+    importarse, así que la fábrica configura y devuelve esa misma instancia
+    aplicando `config` (dict) si se indica.
+    """
+    if config:
+        app.config.update(config)
+    return app
+
+
 if __name__ == "__main__":
+    # servidor de desarrollo: aplicar migraciones pendientes antes de arrancar
+    with app.app_context():
+        upgrade_schema()
+    reset_metrics()
     app.run(debug=True, port=5100, host="0.0.0.0")
\ No newline at end of file
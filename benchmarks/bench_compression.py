@@ -0,0 +1,109 @@
+"""Benchmark: bytes ahorrados y costo de CPU de la compresión de respuestas por ruta.
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_compression.py [--rows 2000] [--repeat 50]
+                                           [--gzip-levels 1,6,9] [--br-qualities 1,4,9]
+                                           [--output compresion.json]
+
+Siembra una base SQLite temporal con `benchmarks/seed.py` y, para cada ruta
+(páginas HTML, listados JSON de `/api/admin/*` y `/postular/`, y una
+exportación NDJSON en streaming), pide el cuerpo sin comprimir
+(`Accept-Encoding: identity`) y luego con cada codificación y nivel a través
+del middleware de `Config/compression.py`. Reporta bytes transferidos, ahorro
+y el CPU extra por request (tiempo de CPU del proceso con compresión menos sin
+ella, promedio de `--repeat` requests).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import seed as seeding  # noqa: E402  (benchmarks/seed.py)
+
+ROUTES = (
+    "/",
+    "/adopcion",
+    "/mascotas",
+    "/postular",
+    "/mascotas/api",
+    "/postular/",
+    "/api/admin/mascotas?limit=500",
+    "/api/admin/users?limit=500",
+    "/api/admin/postulares?limit=500",
+    "/api/admin/export/mascotas.ndjson",
+)
+LEVEL_KEYS = {"gzip": "COMPRESS_GZIP_LEVEL", "br": "COMPRESS_BR_QUALITY"}
+
+
+def cpu_per_request(client, path, encoding, repeat):
+    """`(ms de CPU por request, bytes del cuerpo, Content-Encoding)` promediado en `repeat` requests."""
+    headers = {"Accept-Encoding": encoding}
+    response = client.get(path, headers=headers)  # calentamiento (cachés de página y de catálogo)
+    size, used = len(response.get_data()), response.headers.get("Content-Encoding")
+    t0 = time.process_time()
+    for _ in range(repeat):
+        client.get(path, headers=headers).get_data()
+    return (time.process_time() - t0) / repeat * 1000, size, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--gzip-levels", default="1,6,9")
+    parser.add_argument("--br-qualities", default="1,4,9")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="Rutas separadas por comas.")
+    parser.add_argument("--output", help="Archivo del reporte JSON.")
+    args = parser.parse_args()
+
+    app = seeding.prepare()
+    with app.app_context():
+        seeding.seed(args.rows, log=lambda line: print(line, file=sys.stderr))
+
+    from Config.compression import brotli
+
+    levels = {"gzip": [int(x) for x in args.gzip_levels.split(",") if x]}
+    if brotli is not None:
+        levels["br"] = [int(x) for x in args.br_qualities.split(",") if x]
+    else:
+        print("brotli no está instalado: solo gzip", file=sys.stderr)
+    app.config["COMPRESS_ALGORITHMS"] = tuple(levels)
+
+    client = app.test_client()
+    with client.session_transaction() as s:  # las exportaciones de /api/admin/export piden admin
+        s["user_id"], s["is_admin"] = 1, True
+
+    results = []
+    print(f"{'ruta':<36}{'codif.':>7}{'nivel':>6}{'bytes':>10}{'ahorro':>8}{'CPU ms/req':>12}{'+CPU ms':>9}", file=sys.stderr)
+    for path in [p.strip() for p in args.routes.split(",") if p.strip()]:
+        base_cpu, raw, _ = cpu_per_request(client, path, "identity", args.repeat)
+        print(f"{path:<36}{'-':>7}{'-':>6}{raw:>10}{'':>8}{base_cpu:>12.3f}{'':>9}", file=sys.stderr)
+        results.append({"route": path, "encoding": "identity", "level": None, "bytes": raw,
+                        "saved_pct": 0.0, "cpu_ms": round(base_cpu, 4), "extra_cpu_ms": 0.0})
+        for encoding, options in levels.items():
+            for level in options:
+                app.config[LEVEL_KEYS[encoding]] = level
+                cpu, size, used = cpu_per_request(client, path, encoding, args.repeat)
+                saved = (1 - size / raw) * 100 if raw else 0.0
+                results.append({"route": path, "encoding": used or "identity", "level": level, "bytes": size,
+                                "saved_pct": round(saved, 1), "cpu_ms": round(cpu, 4),
+                                "extra_cpu_ms": round(cpu - base_cpu, 4)})
+                print(f"{'':<36}{used or '(no)':>7}{level:>6}{size:>10}{saved:>7.1f}%{cpu:>12.3f}"
+                      f"{cpu - base_cpu:>+9.3f}", file=sys.stderr)
+
+    report = {"rows": args.rows, "repeat": args.repeat, "min_size": app.config["COMPRESS_MIN_SIZE"], "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+            fh.write("\n")
+
+
+if __name__ == "__main__":
+    main()
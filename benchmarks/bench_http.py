@@ -0,0 +1,300 @@
+"""Benchmark HTTP: latencia y throughput de las rutas principales con reporte JSON.
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_http.py [--rows 10000] [--requests 500] [--concurrency 1,8,32]
+                                    [--scenarios home,adopcion,...] [--output reporte.json]
+                                    [--compare reporte_anterior.json --max-regression 0.2]
+
+Fixture: sin opciones crea una base SQLite temporal, la migra y la siembra con
+`benchmarks/seed.py` (`--rows` por tabla). `--database-url` apunta a una base
+local (p. ej. MySQL del docker-compose) y `--no-seed` reutiliza sus datos.
+
+Por defecto la carga corre en proceso (un cliente de prueba de Flask por hilo,
+sin red). Con `--base-url http://127.0.0.1:5100` se golpea un servidor real
+(gunicorn o `python app.py`) con conexiones keep-alive; en ese caso la base del
+servidor debe estar sembrada antes con `seed.py` usando la misma `--rows`.
+
+Cada escenario corre por separado en cada nivel de concurrencia: primero unos
+requests de calentamiento y luego `--requests` medidos. El reporte JSON trae,
+por escenario y nivel, p50/p95/p99/media/máximo en ms, requests/s y conteo de
+estados; `meta` incluye el commit de git para comparar corridas. Con
+`--compare` se imprime la diferencia contra un reporte anterior y el proceso
+termina con código 1 si algún p95 sube (o el throughput baja) más de
+`--max-regression`.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import seed as seeding  # noqa: E402  (benchmarks/seed.py)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+# --- escenarios: (nombre, método, ruta, sesión, estados esperados, cuerpo) ---
+
+def _formulario(rng, ranges):
+    mid = rng.randint(*ranges["mascotas"])
+    return {"form": {
+        "nombre": "Bench Adoptante", "email": "bench@bench.local", "telefono": "3001234567",
+        "direccion": "Calle 1 # 2-3", "ocupacion": "Empleado", "vivienda": "casa",
+        "tiene_mascotas": "no", "motivo": "Benchmark", "pet_id": str(mid),
+    }}
+
+
+def _login(rng, ranges):
+    uid = rng.randint(*ranges["usuarios"])
+    return {"json": {"identifier": f"user{uid}@bench.local", "password": seeding.BENCH_PASSWORD}}
+
+
+SCENARIOS = {
+    "home": ("GET", "/", None, (200,), None),
+    "adopcion": ("GET", "/adopcion", None, (200,), None),
+    "mascotas_api": ("GET", "/mascotas/api", None, (200,), None),
+    "admin_mascotas": ("GET", "/api/admin/mascotas?limit=50", None, (200,), None),
+    "admin_mascota": ("GET", "/api/admin/mascotas/{mascota}", None, (200,), None),
+    "admin_users": ("GET", "/api/admin/users?limit=50", None, (200,), None),
+    "admin_postulares": ("GET", "/api/admin/postulares?limit=50", None, (200,), None),
+    "login": ("POST", "/api/users/login", None, (200,), _login),
+    "formulario": ("POST", "/formulario", "usuario", (201, 202), _formulario),
+}
+
+
+# --- clientes: en proceso (test client de Flask) o HTTP real con keep-alive ---
+
+class AppClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json=None, form=None, headers=None):
+        response = self.client.open(path, method=method, json=json, data=form, headers=headers)
+        size = len(response.get_data())  # consume el cuerpo (también en streaming)
+        response.close()
+        return response.status_code, size
+
+
+def _json_bytes(data):
+    return json.dumps(data).encode()  # el parámetro `json` de request() tapa el módulo
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.conn = None
+        self.cookies = {}
+
+    def request(self, method, path, json=None, form=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if json is not None:
+            body, headers["Content-Type"] = _json_bytes(json), "application/json"
+        elif form is not None:
+            body, headers["Content-Type"] = urlencode(form), "application/x-www-form-urlencoded"
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        for attempt in (1, 2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                size = len(response.read())
+                break
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None  # el servidor cerró la conexión keep-alive: reintentar una vez
+                if attempt == 2:
+                    raise
+        for header in response.msg.get_all("Set-Cookie") or ():
+            name, _, value = header.split(";", 1)[0].partition("=")
+            self.cookies[name.strip()] = value
+        return response.status, size
+
+
+def login(client, kind, ranges):
+    if kind == "usuario":
+        uid = ranges["usuarios"][0]
+        status, _ = client.request("POST", "/api/users/login",
+                                   json={"identifier": f"user{uid}@bench.local", "password": seeding.BENCH_PASSWORD})
+        if status != 200:
+            raise SystemExit(f"no se pudo iniciar sesión como user{uid} (HTTP {status}); ¿base sembrada?")
+
+
+def run_scenario(name, make_client, ranges, concurrency, requests, warmup):
+    method, path, session_kind, expected, body = SCENARIOS[name]
+    local = threading.local()
+
+    def one(i):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = make_client()
+            local.rng = random.Random(f"{name}-{threading.get_ident()}")
+            if session_kind:
+                login(client, session_kind, ranges)
+        url = path.format(mascota=local.rng.randint(*ranges["mascotas"]))
+        kwargs = body(local.rng, ranges) if body else {}
+        headers = {"X-Requested-With": "XMLHttpRequest", "Accept": "application/json"} if method == "POST" else None
+        t0 = time.perf_counter()
+        status, size = client.request(method, url, headers=headers, **kwargs)
+        return time.perf_counter() - t0, status, size
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(warmup)))
+        t0 = time.perf_counter()
+        results = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - t0
+
+    lat = [r[0] * 1000 for r in results]
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "scenario": name,
+        "method": method,
+        "path": path,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": sum(1 for r in results if r[1] not in expected),
+        "status_counts": statuses,
+        "throughput_rps": round(len(results) / elapsed, 2),
+        "bytes_per_response": round(statistics.mean(r[2] for r in results), 1),
+        "latency_ms": {
+            "p50": round(percentile(lat, 50), 3),
+            "p95": round(percentile(lat, 95), 3),
+            "p99": round(percentile(lat, 99), 3),
+            "mean": round(statistics.mean(lat), 3),
+            "max": round(max(lat), 3),
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, previous, max_regression):
+    """Imprime p95/throughput contra `previous`; devuelve las regresiones que superan el umbral."""
+    before = {(r["scenario"], r["concurrency"]): r for r in previous.get("results", ())}
+    regressions = []
+    out = sys.stderr
+    print(f"\ncomparación con {previous.get('meta', {}).get('commit') or 'reporte anterior'}:", file=out)
+    print(f"{'escenario':<18}{'hilos':>6}{'p95 antes':>11}{'p95 ahora':>11}{'Δp95':>8}{'rps antes':>11}{'rps ahora':>11}{'Δrps':>8}", file=out)
+    for r in report["results"]:
+        old = before.get((r["scenario"], r["concurrency"]))
+        if old is None:
+            continue
+        p95_old, p95_new = old["latency_ms"]["p95"], r["latency_ms"]["p95"]
+        rps_old, rps_new = old["throughput_rps"], r["throughput_rps"]
+        d_p95 = (p95_new - p95_old) / p95_old if p95_old else 0.0
+        d_rps = (rps_new - rps_old) / rps_old if rps_old else 0.0
+        flag = d_p95 > max_regression or -d_rps > max_regression
+        if flag:
+            regressions.append(r["scenario"])
+        print(f"{r['scenario']:<18}{r['concurrency']:>6}{p95_old:>11.2f}{p95_new:>11.2f}{d_p95:>+8.0%}"
+              f"{rps_old:>11.1f}{rps_new:>11.1f}{d_rps:>+8.0%}{'  <-- regresión' if flag else ''}", file=out)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000, help="Escala de la siembra (ver seed.py).")
+    parser.add_argument("--requests", type=int, default=500, help="Requests medidos por escenario y nivel.")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Subconjunto separado por comas.")
+    parser.add_argument("--database-url", help="Base local a usar (por defecto SQLite temporal).")
+    parser.add_argument("--no-seed", action="store_true", help="No sembrar: la base ya tiene los datos de seed.py.")
+    parser.add_argument("--base-url", help="Golpear un servidor real en vez de la app en proceso.")
+    parser.add_argument("--output", help="Archivo del reporte JSON (por defecto stdout).")
+    parser.add_argument("--compare", help="Reporte JSON anterior para comparar.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Umbral relativo de regresión (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"escenarios desconocidos: {', '.join(sorted(unknown))} (disponibles: {', '.join(SCENARIOS)})")
+
+    dialect = None
+    if args.base_url or args.no_seed:
+        # datos de `seed.py --reset --rows N`: ids desde 1 en cada tabla
+        ranges = {name: (1, size) for name, size in seeding.table_sizes(args.rows).items()}
+    if args.base_url:
+        make_client = lambda: HttpClient(args.base_url)  # noqa: E731
+    else:
+        app = seeding.prepare(args.database_url)
+        with app.app_context():
+            from Config.db import db
+
+            dialect = db.engine.dialect.name
+            if not args.no_seed:
+                print(f"sembrando {args.rows} filas por tabla en {dialect}...", file=sys.stderr)
+                ranges = seeding.seed(args.rows, log=lambda line: print(line, file=sys.stderr))
+        make_client = lambda: AppClient(app)  # noqa: E731
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "target": args.base_url or "in-process",
+            "database": dialect,
+            "rows": args.rows,
+            "requests": args.requests,
+            "concurrency": [int(x) for x in args.concurrency.split(",")],
+        },
+        "results": [],
+    }
+    print(f"{'escenario':<18}{'hilos':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}", file=sys.stderr)
+    for level in report["meta"]["concurrency"]:
+        for name in names:
+            r = run_scenario(name, make_client, ranges, level, args.requests, args.warmup)
+            report["results"].append(r)
+            lat = r["latency_ms"]
+            print(f"{name:<18}{level:>6}{r['throughput_rps']:>9.1f}{lat['p50']:>9.2f}{lat['p95']:>9.2f}"
+                  f"{lat['p99']:>9.2f}{r['errors']:>9}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            regressions = compare(report, json.load(fh), args.max_regression)
+        if regressions:
+            print(f"\nregresiones (> {args.max_regression:.0%}): {', '.join(sorted(set(regressions)))}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark: throughput de login bajo concurrencia con el servicio de hashing.
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_login.py [--users 50] [--requests 400] [--concurrency 1,8,32]
+
+Crea una base SQLite temporal (vía DATABASE_URL), registra N usuarios y lanza
+logins contra `/api/users/login` desde varios hilos (un cliente de prueba de
+Flask por hilo), mezclando contraseñas correctas, incorrectas y usuarios
+inexistentes. Para cada nivel de concurrencia reporta logins/s y latencias
+p50/p95/p99, además de la latencia de una ruta barata (`/adopciones/ping`)
+medida durante la ráfaga: con el pool acotado esa ruta no debería degradarse.
+
+El algoritmo/costo y el tamaño del pool se toman del entorno como en la app
+(`PASSWORD_HASH_METHOD`, `PASSWORD_HASH_WORKERS`; `0` = hash en el hilo del
+request), p. ej.:
+
+    PASSWORD_HASH_WORKERS=0 python benchmarks/bench_login.py
+    PASSWORD_HASH_METHOD=pbkdf2:sha256:600000 python benchmarks/bench_login.py
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=400, help="Logins por nivel de concurrencia.")
+    parser.add_argument("--concurrency", default="1,8,32")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_login_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+    os.environ.setdefault("PAGE_CACHE_BACKEND", "none")
+
+    from app import app
+    from Config import passwords
+    from Config.migrations import upgrade
+
+    with app.app_context():
+        upgrade()
+    client = app.test_client()
+    for i in range(args.users):
+        client.post("/api/users/register", json={"username": f"u{i}", "email": f"u{i}@x.com", "password": f"pw{i}"})
+
+    print(f"método={passwords.PASSWORD_HASH_METHOD} workers={passwords.PASSWORD_HASH_WORKERS} "
+          f"usuarios={args.users} logins/nivel={args.requests}")
+    print(f"{'hilos':>6} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ping p95 ms':>12} {'errores':>8}")
+
+    local = threading.local()
+
+    def one(i):
+        c = getattr(local, "client", None) or app.test_client()
+        local.client = c
+        kind = i % 4
+        if kind == 3:
+            payload = {"identifier": f"nadie{i}@x.com", "password": "x"}  # inexistente (hash señuelo)
+        else:
+            u = i % args.users
+            payload = {"identifier": f"u{u}@x.com", "password": f"pw{u}" if kind else "mal"}
+        t0 = time.perf_counter()
+        status = c.post("/api/users/login", json=payload).status_code
+        return time.perf_counter() - t0, status in (200, 401)
+
+    for level in [int(x) for x in args.concurrency.split(",")]:
+        pings, stop = [], threading.Event()
+
+        def pinger():
+            c = app.test_client()
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                c.get("/adopciones/ping")
+                pings.append(time.perf_counter() - t0)
+                time.sleep(0.005)
+
+        ping_thread = threading.Thread(target=pinger, daemon=True)
+        ping_thread.start()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as pool:
+            results = list(pool.map(one, range(args.requests)))
+        elapsed = time.perf_counter() - t0
+        stop.set()
+        ping_thread.join()
+
+        lat = [r[0] * 1000 for r in results]
+        errors = sum(1 for r in results if not r[1])
+        print(f"{level:>6} {len(results) / elapsed:>9.1f} {statistics.median(lat):>8.1f} "
+              f"{percentile(lat, 95):>8.1f} {percentile(lat, 99):>8.1f} "
+              f"{percentile([p * 1000 for p in pings], 95):>12.1f} {errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
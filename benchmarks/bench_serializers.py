@@ -0,0 +1,100 @@
+"""Microbenchmark: schemas marshmallow (many=True) vs codificador columnar.
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_serializers.py [--rows 10000] [--repeat 5]
+
+Crea una base SQLite temporal (vía DATABASE_URL), inserta N filas por modelo y
+compara, para cada uno, `Model.query.all()` + `Schema(many=True).dump()` contra
+`select()` de Core + `RowEncoder.dump_rows()`. Antes de medir verifica que el
+JSON producido por ambos caminos sea idéntico byte a byte.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_serializers_")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+
+    from sqlalchemy import insert
+    from Config.db import app, db
+    from Config.serializers import row_encoder
+    from Models.admins import admin, adminSchema
+    from Models.mascotas import Mascota, MascotaSchema
+    from Models.postular_mascotas import PostularMascotas, PostularMascotasSchema
+    from Models.usuario import usuario, usuarioSchema
+
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    n = args.rows
+    fixtures = [
+        (Mascota, MascotaSchema, [
+            {"nombre": f"Mascota {i}", "descripcion": "Cariñosa y juguetona " * 3, "imagen": f"{i}.jpg",
+             "autor": f"Fundación {i % 50}", "is_adopted": i % 7 == 0,
+             "created_at": now + timedelta(seconds=i), "updated_at": now + timedelta(seconds=i)}
+            for i in range(n)]),
+        (usuario, usuarioSchema, [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x" * 100,
+             "created_at": now, "updated_at": now}
+            for i in range(n)]),
+        (admin, adminSchema, [
+            {"username": f"admin{i}", "email": f"admin{i}@example.com", "password_hash": "x" * 100,
+             "role": "admin", "active": i % 2 == 0, "created_at": now, "updated_at": now}
+            for i in range(n)]),
+        (PostularMascotas, PostularMascotasSchema, [
+            {"nombre": f"Postulada {i}", "especie": "perro", "raza": "criollo", "edad": "2 años",
+             "sexo": "macho", "tamanio": "mediano", "color": "café", "ubicacion": "Bogotá",
+             "imagen": f"{i}.jpg", "password_hash": None, "created_at": now, "updated_at": now}
+            for i in range(n)]),
+    ]
+
+    print(f"{'modelo':<18}{'schema (s)':>12}{'encoder (s)':>13}{'speedup':>9}   JSON idéntico")
+    with app.app_context():
+        db.create_all()
+        for model, schema_cls, rows in fixtures:
+            db.session.execute(insert(model), rows)
+            db.session.commit()
+
+            schema = schema_cls(many=True)
+            encoder = row_encoder(schema_cls)
+
+            def via_schema():
+                db.session.expunge_all()
+                return schema.dump(model.query.order_by(model.id.desc()).all())
+
+            def via_encoder():
+                result = db.session.execute(encoder.select().order_by(model.id.desc()))
+                return encoder.dump_rows(result.all())
+
+            same = app.json.dumps(via_schema()) == app.json.dumps(via_encoder())
+            t_schema = best_of(via_schema, args.repeat)
+            t_encoder = best_of(via_encoder, args.repeat)
+            print(f"{model.__name__:<18}{t_schema:>12.4f}{t_encoder:>13.4f}{t_schema / t_encoder:>8.1f}x   {same}")
+            if not same:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
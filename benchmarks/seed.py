@@ -0,0 +1,209 @@
+"""Generador de datos sintéticos para los benchmarks (de 1k a 1M filas por tabla).
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/seed.py --rows 100000 [--reset] [--database-url mysql+pymysql://...]
+
+Sin `--database-url` (ni DATABASE_URL) usa una base SQLite temporal. Aplica las
+migraciones y llena `usuarios`, `admins`, `mascotas`, `postular_mascotas` y
+`adoptar_mascotas` con inserciones de Core por lotes (memoria constante), con
+ids explícitos a partir del máximo actual y datos deterministas para una misma
+`--seed`. Como las inserciones de Core no pasan por los eventos del ORM, aquí
+mismo se escriben las claves de `login_keys` y se recalculan `adopcion_conteos`.
+
+Todas las cuentas sembradas usan la contraseña `BENCH_PASSWORD`
+(`user<N>@bench.local`, `admin<N>@bench.local`).
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BENCH_PASSWORD = "bench-pass-123"
+NOMBRES = ("Luna", "Rocky", "Michi", "Toby", "Nala", "Simba", "Coco", "Kira", "Max", "Lola", "Bruno", "Mia")
+ESPECIES = ("perro", "gato", "conejo")
+RAZAS = ("criollo", "labrador", "siamés", "persa", "beagle", "pastor alemán")
+TAMANIOS = ("pequeño", "mediano", "grande")
+COLORES = ("negro", "blanco", "café", "gris", "atigrado", "manchado")
+CIUDADES = ("Bogotá", "Medellín", "Cali", "Barranquilla", "Cartagena", "Bucaramanga")
+FUNDACIONES = tuple(f"Fundación {i}" for i in range(50))
+BASE_DATE = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def table_sizes(rows):
+    """Filas por tabla para una escala dada (los admins son pocos, como en producción)."""
+    return {
+        "usuarios": rows,
+        "admins": max(5, rows // 1000),
+        "mascotas": rows,
+        "postular_mascotas": rows,
+        "adoptar_mascotas": rows,
+    }
+
+
+def pet_name(pk):
+    return f"{NOMBRES[pk % len(NOMBRES)]} {pk}"
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _next_id(conn, table):
+    from sqlalchemy import func, select
+
+    return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def reset():
+    """Vacía las tablas que siembra `seed()` (en orden de claves foráneas)."""
+    from sqlalchemy import delete
+    from Config.db import db
+    from Models.admins import admin
+    from Models.adopcion_conteos import AdopcionConteo
+    from Models.adoptar_mascotas import adoptar_mascotas
+    from Models.login_keys import LoginKey
+    from Models.mascotas import Mascota
+    from Models.postular_mascotas import PostularMascotas
+    from Models.usuario import usuario
+
+    for model in (AdopcionConteo, adoptar_mascotas, LoginKey, PostularMascotas, Mascota, usuario, admin):
+        db.session.execute(delete(model.__table__))
+    db.session.commit()
+
+
+def seed(rows, batch_size=5000, seed=42, log=print):
+    """Siembra `table_sizes(rows)` filas; requiere contexto de app. Devuelve los rangos de ids."""
+    from sqlalchemy import insert
+    from Config.adopciones import recount
+    from Config.db import db
+    from Config.identity import KIND_ADMIN, KIND_USUARIO
+    from Config.passwords import hash_password
+    from Models.admins import admin
+    from Models.adoptar_mascotas import adoptar_mascotas
+    from Models.login_keys import LoginKey
+    from Models.mascotas import Mascota
+    from Models.postular_mascotas import PostularMascotas
+    from Models.usuario import usuario
+
+    rng = random.Random(seed)
+    sizes = table_sizes(rows)
+    password_hash = hash_password(BENCH_PASSWORD)  # un solo hash (scrypt es caro a propósito)
+    conn = db.session
+    ranges = {}
+
+    def write(name, table, generate, keys_kind=None):
+        t0 = time.perf_counter()
+        first = _next_id(conn, table)
+        ranges[name] = (first, first + sizes[name] - 1)
+        for batch in _batches(generate(first, sizes[name]), batch_size):
+            conn.execute(insert(table), batch)
+            if keys_kind:
+                conn.execute(insert(LoginKey.__table__), [
+                    {"login_key": key, "kind": keys_kind, "ref_id": row["id"]}
+                    for row in batch for key in (row["username"].lower(), row["email"].lower())
+                ])
+            db.session.commit()
+        log(f"{name:<18} {sizes[name]:>9} filas  {time.perf_counter() - t0:6.1f} s")
+
+    def cuentas(prefix, extra):
+        def generate(first, n):
+            for pk in range(first, first + n):
+                created = BASE_DATE + timedelta(minutes=pk)
+                yield {"id": pk, "username": f"{prefix}{pk}", "email": f"{prefix}{pk}@bench.local",
+                       "password_hash": password_hash, "created_at": created, "updated_at": created, **extra}
+        return generate
+
+    def mascotas(first, n):
+        for pk in range(first, first + n):
+            created = BASE_DATE + timedelta(minutes=pk)
+            yield {"id": pk, "nombre": pet_name(pk),
+                   "descripcion": f"{rng.choice(ESPECIES).capitalize()} {rng.choice(TAMANIOS)}, {rng.choice(COLORES)}; "
+                                  "cariñoso, vacunado y esterilizado.",
+                   "imagen": "", "autor": rng.choice(FUNDACIONES), "is_adopted": rng.random() < 0.15,
+                   "created_at": created, "updated_at": created}
+
+    def postulares(first, n):
+        users = ranges["usuarios"]
+        for pk in range(first, first + n):
+            created = BASE_DATE + timedelta(minutes=pk)
+            uid = rng.randint(*users)
+            yield {"id": pk, "username": f"user{uid}", "email": f"user{uid}@bench.local", "password_hash": None,
+                   "nombre": f"{rng.choice(NOMBRES)} {pk}", "descripcion": "Busca un hogar responsable.",
+                   "especie": rng.choice(ESPECIES), "raza": rng.choice(RAZAS), "edad": f"{rng.randint(1, 12)} años",
+                   "sexo": rng.choice(("macho", "hembra")), "tamanio": rng.choice(TAMANIOS),
+                   "color": rng.choice(COLORES), "ubicacion": rng.choice(CIUDADES), "imagen": "",
+                   "created_at": created, "updated_at": created}
+
+    def solicitudes(first, n):
+        users, pets = ranges["usuarios"], ranges["mascotas"]
+        for pk in range(first, first + n):
+            uid, mid = rng.randint(*users), rng.randint(*pets)
+            yield {"id": pk, "username": f"user{uid}", "email": f"user{uid}@bench.local",
+                   "telefono": f"3{rng.randint(100000000, 199999999)}", "direccion": f"Calle {rng.randint(1, 200)} # {pk}",
+                   "ocupacion": "Empleado", "vivienda": rng.choice(("casa", "apartamento")),
+                   "tiene_mascotas": rng.choice(("si", "no")), "motivo": "Quiero darle un hogar.",
+                   "pet_name": pet_name(mid), "mascota_id": mid, "adopter_id": uid,
+                   "is_confirmed": rng.random() < 0.3, "submission_id": f"{rng.getrandbits(128):032x}"}
+
+    write("usuarios", usuario.__table__, cuentas("user", {}), keys_kind=KIND_USUARIO)
+    write("admins", admin.__table__, cuentas("admin", {"role": "admin", "active": True}), keys_kind=KIND_ADMIN)
+    write("mascotas", Mascota.__table__, mascotas)
+    write("postular_mascotas", PostularMascotas.__table__, postulares)
+    write("adoptar_mascotas", adoptar_mascotas.__table__, solicitudes)
+    recount(db.session)
+    db.session.commit()
+    return ranges
+
+
+def prepare(database_url=None):
+    """Apunta la app a `database_url` (o a una SQLite temporal), migra y devuelve la app."""
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+    elif not os.getenv("DATABASE_URL"):
+        tmpdir = tempfile.mkdtemp(prefix="bench_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    from app import app
+    from Config.migrations import upgrade
+
+    with app.app_context():
+        upgrade()
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000, help="Escala: filas de mascotas/usuarios/solicitudes.")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="Base a sembrar (por defecto DATABASE_URL o SQLite temporal).")
+    parser.add_argument("--reset", action="store_true", help="Vaciar las tablas antes de sembrar.")
+    args = parser.parse_args()
+
+    app = prepare(args.database_url)
+    print(f"base: {os.environ['DATABASE_URL']}")
+    with app.app_context():
+        if args.reset:
+            reset()
+        t0 = time.perf_counter()
+        seed(args.rows, batch_size=args.batch_size, seed=args.seed)
+    print(f"total {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Configuración de gunicorn (workers prefork + hilos por worker).
+
+Variables de entorno:
+- GUNICORN_BIND            dirección de escucha (0.0.0.0:5100)
+- WEB_CONCURRENCY          número de procesos worker (2 * CPUs + 1)
+- GUNICORN_THREADS         hilos por worker (4); también dimensiona el pool de BD (Config/db.py)
+- GUNICORN_MAX_REQUESTS    requests antes de reciclar un worker (1000, con jitter)
+- GUNICORN_TIMEOUT         segundos antes de matar un worker colgado (60)
+- METRICS_DIR              instantáneas de métricas por worker (Config/metrics.py)
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5100")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+
+# La app se importa una vez en el master y los workers la heredan con fork (arranque rápido)
+preload_app = True
+
+# Reciclado gradual de workers para acotar fugas de memoria; el jitter evita que reinicien todos juntos
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Con preload_app el master pudo abrir conexiones (lectura de schema_version); los sockets
+    # no se comparten entre procesos, así que cada worker descarta el pool heredado sin cerrarlo.
+    from Config.db import app, db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def on_starting(server):
+    # Las instantáneas de métricas de una ejecución anterior no cuentan
+    from Config import metrics
+
+    metrics.reset()
+
+
+def child_exit(server, worker):
+    # Los contadores del worker que termina (reciclado o caído) pasan al acumulado
+    from Config import metrics
+
+    metrics.archive(worker.pid)
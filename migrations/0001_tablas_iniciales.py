@@ -0,0 +1,13 @@
+"""Tablas base del proyecto (antes se creaban con db.create_all() al importar cada modelo)."""
+
+from Config.migrations import create_tables
+from Models.admins import admin
+from Models.adoptar_mascotas import adoptar_mascotas
+from Models.mascotas import Mascota
+from Models.postular_mascotas import PostularMascotas
+from Models.solicitudes_adopcion import SolicitudAdopcion
+from Models.usuario import usuario
+
+
+def upgrade(conn):
+    create_tables(conn, usuario, admin, Mascota, PostularMascotas, adoptar_mascotas, SolicitudAdopcion)
@@ -0,0 +1,93 @@
+"""Columnas, índices y restricciones de adoptar_mascotas usados por /formulario.
+
+Reemplaza a `ensure_adoptar_mascotas_schema()`, que se ejecutaba en cada arranque.
+Los ajustes de tipos/defaults son específicos de MySQL; en otros motores la
+tabla ya nace con la forma correcta desde 0001.
+"""
+
+import logging
+
+from sqlalchemy import text
+
+from Config.migrations import add_column, create_index, has_column, has_table
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade(conn):
+    mysql = conn.dialect.name == "mysql"
+
+    # Paso 1: columnas requeridas
+    required = [
+        ("telefono", "VARCHAR(30) NULL"),
+        ("direccion", "VARCHAR(200) NULL"),
+        ("ocupacion", "VARCHAR(100) NULL"),
+        ("vivienda", "VARCHAR(80) NULL"),
+        ("tiene_mascotas", "VARCHAR(80) NULL"),
+        ("motivo", "TEXT NULL"),
+        ("pet_name", "VARCHAR(120) NULL"),
+        ("adopter_id", "INT NULL"),
+        ("is_confirmed", "TINYINT(1) NOT NULL DEFAULT 0" if mysql else "BOOLEAN NOT NULL DEFAULT 0"),
+    ]
+    for name, ddl in required:
+        add_column(conn, "adoptar_mascotas", name, ddl)
+
+    # Paso 2: índice adopter_id
+    create_index(conn, "adoptar_mascotas", "idx_adoptar_adopter_id", ["adopter_id"])
+
+    if not mysql:
+        return
+
+    # Paso 3: FK adopter_id -> usuarios.id
+    fk_exists = conn.execute(text(
+        """
+        SELECT COUNT(1)
+        FROM information_schema.REFERENTIAL_CONSTRAINTS
+        WHERE CONSTRAINT_SCHEMA = DATABASE()
+          AND CONSTRAINT_NAME = 'fk_adoptar_usuarios'
+        """
+    )).scalar()
+    if not fk_exists and has_table(conn, "usuarios"):
+        try:
+            conn.execute(text(
+                "ALTER TABLE adoptar_mascotas ADD CONSTRAINT fk_adoptar_usuarios "
+                "FOREIGN KEY (adopter_id) REFERENCES usuarios(id) "
+                "ON UPDATE CASCADE ON DELETE SET NULL"
+            ))
+        except Exception as exc:
+            # filas huérfanas previas impiden la FK; igual que antes, no bloquea el resto
+            logger.warning("No se pudo crear fk_adoptar_usuarios: %s", exc)
+
+    # Paso 4: relajar password_hash NOT NULL (columna legacy)
+    if has_column(conn, "adoptar_mascotas", "password_hash"):
+        conn.execute(text("ALTER TABLE adoptar_mascotas MODIFY COLUMN password_hash VARCHAR(256) NULL"))
+
+    # Paso 5: defaults de timestamps si existen
+    if has_column(conn, "adoptar_mascotas", "created_at"):
+        conn.execute(text(
+            "ALTER TABLE adoptar_mascotas MODIFY COLUMN created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP"
+        ))
+    if has_column(conn, "adoptar_mascotas", "updated_at"):
+        conn.execute(text(
+            "ALTER TABLE adoptar_mascotas MODIFY COLUMN updated_at DATETIME NOT NULL "
+            "DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+        ))
+
+    # Paso 6: 'username' no debe tener índice UNIQUE accidental (varios pedidos por persona)
+    rows = conn.execute(text(
+        """
+        SELECT DISTINCT index_name, non_unique
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+          AND table_name = 'adoptar_mascotas'
+          AND column_name = 'username'
+        """
+    )).fetchall()
+    remaining = 0
+    for idx_name, non_unique in rows:
+        if int(non_unique) == 0:
+            conn.execute(text(f"ALTER TABLE adoptar_mascotas DROP INDEX `{idx_name}`"))
+        else:
+            remaining += 1
+    if remaining == 0:
+        create_index(conn, "adoptar_mascotas", "idx_adoptar_username", ["username"])
@@ -0,0 +1,7 @@
+"""Índice compuesto (is_adopted, id) para el listado paginado por cursor de mascotas."""
+
+from Config.migrations import create_index
+
+
+def upgrade(conn):
+    create_index(conn, "mascotas", "ix_mascotas_is_adopted_id", ["is_adopted", "id"])
@@ -0,0 +1,12 @@
+"""Tabla upload_blobs: almacén de imágenes por contenido con conteo de referencias.
+
+Los archivos existentes (nombres con prefijo uuid) se renombran por contenido
+con `flask --app app uploads dedupe`, que también actualiza las referencias.
+"""
+
+from Config.migrations import create_tables
+from Models.upload_blobs import UploadBlob
+
+
+def upgrade(conn):
+    create_tables(conn, UploadBlob)
@@ -0,0 +1,15 @@
+"""Índice de identidades `login_keys` (email/username en minúsculas -> cuenta) y su carga inicial."""
+
+import logging
+
+from Config.identity import backfill
+from Config.migrations import create_tables
+from Models.login_keys import LoginKey
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade(conn):
+    create_tables(conn, LoginKey)
+    for kind, ref_id, key in backfill(conn):
+        logger.warning("login_keys: %s %s comparte la clave %r con otra cuenta; no se indexa", kind, ref_id, key)
@@ -0,0 +1,11 @@
+"""Ensancha postular_mascotas.password_hash a 256: un hash scrypt de werkzeug ocupa ~162 caracteres.
+
+Igual que usuarios/admins. Solo MySQL: SQLite no aplica longitudes de VARCHAR.
+"""
+
+from sqlalchemy import text
+
+
+def upgrade(conn):
+    if conn.dialect.name == "mysql":
+        conn.execute(text("ALTER TABLE postular_mascotas MODIFY COLUMN password_hash VARCHAR(256) NULL"))
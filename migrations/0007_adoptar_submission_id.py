@@ -0,0 +1,8 @@
+"""Columna `submission_id` (única) en adoptar_mascotas para la cola write-behind de /formulario."""
+
+from Config.migrations import add_column, create_index
+
+
+def upgrade(conn):
+    add_column(conn, "adoptar_mascotas", "submission_id", "VARCHAR(32) NULL")
+    create_index(conn, "adoptar_mascotas", "ux_adoptar_submission_id", ["submission_id"], unique=True)
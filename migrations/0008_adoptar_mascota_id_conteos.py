@@ -0,0 +1,45 @@
+"""Solicitudes de adopción enlazadas a `mascotas.id` y conteos por mascota.
+
+- `adoptar_mascotas.mascota_id` (FK, ON DELETE SET NULL) con índices
+  `(mascota_id, id)` e `(is_confirmed, id)` para la API /adopciones.
+- Tabla `adopcion_conteos`, que desde aquí se mantiene de forma incremental.
+- Carga inicial: las solicitudes existentes se enlazan por `pet_name` y se
+  cuentan una sola vez.
+"""
+
+import logging
+
+from sqlalchemy import text
+
+from Config.adopciones import link_pending, recount
+from Config.migrations import add_column, create_index, create_tables
+from Models.adopcion_conteos import AdopcionConteo
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade(conn):
+    add_column(conn, "adoptar_mascotas", "mascota_id", "INT NULL")
+    create_index(conn, "adoptar_mascotas", "ix_adoptar_mascota_id_id", ["mascota_id", "id"])
+    create_index(conn, "adoptar_mascotas", "ix_adoptar_is_confirmed_id", ["is_confirmed", "id"])
+
+    if conn.dialect.name == "mysql":
+        fk_exists = conn.execute(text(
+            """
+            SELECT COUNT(1)
+            FROM information_schema.REFERENTIAL_CONSTRAINTS
+            WHERE CONSTRAINT_SCHEMA = DATABASE()
+              AND TABLE_NAME = 'adoptar_mascotas'
+              AND REFERENCED_TABLE_NAME = 'mascotas'
+            """
+        )).scalar()
+        if not fk_exists:
+            conn.execute(text(
+                "ALTER TABLE adoptar_mascotas ADD CONSTRAINT fk_adoptar_mascotas "
+                "FOREIGN KEY (mascota_id) REFERENCES mascotas(id) ON DELETE SET NULL"
+            ))
+
+    create_tables(conn, AdopcionConteo)
+    linked = link_pending(conn)
+    recount(conn)
+    logger.info("adoptar_mascotas: %s solicitudes enlazadas a su mascota", linked)
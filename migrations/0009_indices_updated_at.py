@@ -0,0 +1,12 @@
+"""Índices por `updated_at` en mascotas y postulaciones.
+
+Los índices en memoria (búsqueda, facetas) se ponen al día con los commits de
+otros workers leyendo solo `updated_at >= marca` (Config.catalog_cache.changed_since).
+"""
+
+from Config.migrations import create_index
+
+
+def upgrade(conn):
+    create_index(conn, "mascotas", "ix_mascotas_updated_at", ["updated_at"])
+    create_index(conn, "postular_mascotas", "ix_postular_mascotas_updated_at", ["updated_at"])
@@ -0,0 +1,40 @@
+"""Índice único `(nombre, autor)` en mascotas (altas en lote con INSERT que ignora duplicados).
+
+Antes de crearlo se resuelven los duplicados que ya existan: en cada grupo se
+conserva la fila de menor id y a las demás se les agrega ` #<id>` al nombre
+(no se borran: pueden tener solicitudes de adopción enlazadas). Los grupos se
+arman con GROUP BY, es decir, con la misma collation que aplicará el índice.
+"""
+
+import logging
+
+from sqlalchemy import func, select, update
+
+from Config.migrations import create_index
+from Models.mascotas import Mascota
+
+logger = logging.getLogger(__name__)
+
+NOMBRE_MAX = Mascota.__table__.c.nombre.type.length
+
+
+def upgrade(conn):
+    table = Mascota.__table__
+    groups = conn.execute(
+        select(table.c.nombre, table.c.autor, func.min(table.c.id))
+        .group_by(table.c.nombre, table.c.autor)
+        .having(func.count() > 1)
+    ).all()
+    renamed = 0
+    for nombre, autor, keep in groups:
+        rows = conn.execute(
+            select(table.c.id, table.c.nombre)
+            .where(table.c.nombre == nombre, table.c.autor == autor, table.c.id != keep)
+        ).all()
+        for pk, current in rows:
+            suffix = f" #{pk}"
+            conn.execute(update(table).where(table.c.id == pk).values(nombre=current[: NOMBRE_MAX - len(suffix)] + suffix))
+            renamed += 1
+    if renamed:
+        logger.info("mascotas: %s duplicados (nombre, autor) renombrados", renamed)
+    create_index(conn, "mascotas", "uq_mascotas_nombre_autor", ["nombre", "autor"], unique=True)
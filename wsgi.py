@@ -0,0 +1,10 @@
+"""Entrada WSGI para producción.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+El servidor de desarrollo (`python app.py`) sigue disponible para trabajo local.
+"""
+
+from app import create_app
+
+app = create_app()